@@ -1,12 +1,21 @@
 # Terminal -> cd Dashboard -> Enter
 # streamlit run Home.py -> Enter
 
+import os
+
 import streamlit as st
 import pandas as pd
 import seaborn as sns
 import plotly.express as ps
 import plotly.graph_objects as go
 
+from housing_data import load_housing
+from uploads import active_dataset_path, uploader_section
+
+# Load the dataset (shared, cached loader)
+
+df = load_housing(active_dataset_path(), columns=['id'])
+
 #logo
 
 st.sidebar.image("2D logo.png",width = 200)
@@ -37,9 +46,10 @@ st.markdown(
 
 st.markdown("<h1 class='custom-heading'>Analyzing Housing Price Dataset</h1>", unsafe_allow_html=True)
 
-#Banner
+#Banner (optional; the page, and the uploader below, render without it)
 
-st.image("Assets\Banner.png", use_column_width=True)
+if os.path.exists("Assets/Banner.png"):
+    st.image("Assets/Banner.png", use_column_width=True)
 
 
 st.sidebar.title("Insights & Findings")
@@ -58,8 +68,8 @@ st.sidebar.markdown("""
 
 st.sidebar.title("Dataset Details")
 
-st.sidebar.markdown("""
-**Total Records:** 21,613 properties
+st.sidebar.markdown(f"""
+**Total Records:** {len(df):,} properties
 
 **Key Columns:**
 - **Date:** Sale date
@@ -116,8 +126,14 @@ st.markdown("""
 </ul>
 
 <p style='font-size:25px;'><b>Getting Started</b></p>
-<p style='font-size:18px;'>Ready to dive in? Start by exploring data visualizations that bring each feature to life, allowing you to analyze pricing trends, compare property attributes, and understand the regional impact on real estate values. You can also upload your own real estate dataset to personalize the analysis and gain insights tailored to your specific interests or region.</p>
+<p style='font-size:18px;'>Ready to dive in? Start by exploring data visualizations that bring each feature to life, allowing you to analyze pricing trends, compare property attributes, and understand the regional impact on real estate values. You can also upload your own real estate dataset below to personalize the analysis and gain insights tailored to your specific interests or region.</p>
 
 <p style='font-size:25px;'><b>Uncover Real Estate Insights Like Never Before</b></p>
 <p style='font-size:18px;'>With our Real Estate Price Analysis Dashboard, data turns into strategy. Whether you're a real estate professional, investor, or enthusiast, this tool provides the knowledge you need to make data-backed decisions and spot new opportunities in the market.</p>
 """, unsafe_allow_html=True)
+
+# Upload your own dataset
+
+st.markdown("<p style='font-size:25px;'><b>Use Your Own Dataset</b></p>", unsafe_allow_html=True)
+
+uploader_section()
@@ -0,0 +1,104 @@
+# Terminal -> cd Dashboard -> Enter
+# streamlit run Home.py -> Enter
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from charts import cached_figure
+from ingest import INCOMING_DIR, get_live_store
+
+# How often the page checks the drop folder for new files
+
+REFRESH_SECONDS = 10
+
+# header
+
+st.markdown(
+    """
+    <style>
+    .custom-heading {
+        color: #FFFFFF; /* White text */
+        font-weight: bolder;
+        background-color: #2C3E50; /* Dark Blue background */
+        border: 2px solid #1ABC9C; /* Turquoise border */
+        text-align: center;
+        padding: 10px;
+        border-radius: 10px;
+        font-size: 26px;
+        width: 100%; /* Makes the header wider */
+        box-sizing: border-box; /* Ensures padding and border are included in the width */
+    }
+    </style>
+    """,
+    unsafe_allow_html=True
+)
+
+# Applying the custom heading
+
+st.markdown("<h1 class='custom-heading'>Live Sales Feed</h1>", unsafe_allow_html=True)
+
+st.markdown(f"""
+<p style='font-size:18px;'>New sales are picked up from the <b>{INCOMING_DIR}/</b> folder every {REFRESH_SECONDS} seconds. Each file is validated against the Housing dataset columns and folded into running statistics, so the charts below update without reloading the dataset. Medians and quartiles come from mergeable sketches and are accurate to within about 1%. Ingested sales appear on this page only; the Dashboard page shows the dataset file as it is.</p>
+""", unsafe_allow_html=True)
+
+store = get_live_store()
+
+
+# Only this fragment reruns on the timer. Figures are cached on the version of
+# the statistics they show, so a chart is rebuilt only after its numbers change.
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def live_view():
+    store.poll()
+    aggregates = store.aggregates
+    versions = aggregates.versions
+    store_key = (store.path, store.fingerprint)
+
+    total, ingested, files = st.columns(3)
+    total.metric('Total Sales', f'{aggregates.n_rows:,}')
+    ingested.metric('Ingested Since Start', f'{store.ingested_rows:,}')
+    files.metric('Files Processed', f'{store.files_processed:,}')
+
+    if store.history:
+        with st.expander('Recent Ingests'):
+            st.dataframe(pd.DataFrame(list(store.history)).drop(columns='groups_touched'))
+
+    # Median price by zipcode
+
+    st.markdown("<h1 style='font-size:40px; text-align: center'>Median Price by Zipcode</h1>", unsafe_allow_html=True)
+    fig = cached_figure('live_zipcode_price', store_key + (versions['zipcode'],),
+                        lambda: px.bar(aggregates.stat('zipcode', 'median'), x='zipcode', y='price',
+                                       labels={'zipcode': 'Zipcode', 'price': 'Median Price (Millions)'},
+                                       color_discrete_sequence=px.colors.sequential.Viridis))
+    st.plotly_chart(fig)
+
+    # Average price over time
+
+    st.markdown("<h1 style='font-size:40px; text-align: center'>Date vs Price</h1>", unsafe_allow_html=True)
+    fig = cached_figure('live_date_price', store_key + (versions['date'],),
+                        lambda: px.line(aggregates.stat('date', 'mean'), x='date', y='price',
+                                        labels={'date': 'Date', 'price': 'Average Price (Millions)'},
+                                        color_discrete_sequence=px.colors.sequential.Plasma))
+    st.plotly_chart(fig)
+
+    # Median price by grade
+
+    st.markdown("<h1 style='font-size:40px; text-align: center'>Relationship between Grade and Price</h1>", unsafe_allow_html=True)
+    fig = cached_figure('live_grade_price', store_key + (versions['grade'],),
+                        lambda: px.bar(aggregates.stat('grade', 'median'), x='grade', y='price',
+                                       labels={'grade': 'Grade', 'price': 'Median Price (Millions)'},
+                                       color='grade', color_discrete_sequence=px.colors.sequential.Teal))
+    st.plotly_chart(fig)
+
+    # Grade and condition counts
+
+    st.markdown("<h1 style='font-size:40px; text-align: center'>Cross-tabulation between Grade and Condition</h1>", unsafe_allow_html=True)
+    fig = cached_figure('live_grade_condition', store_key + (versions[('grade', 'condition')],),
+                        lambda: px.imshow(aggregates.crosstab('grade', 'condition'),
+                                          labels=dict(x='Condition', y='Grade', color='count'),
+                                          color_continuous_scale='viridis'))
+    st.plotly_chart(fig)
+
+
+live_view()
@@ -0,0 +1,97 @@
+# Terminal -> cd Dashboard -> Enter
+# streamlit run Home.py -> Enter
+
+import plotly.express as px
+import streamlit as st
+
+from charts import cached_figure
+from housing_data import file_fingerprint, load_housing
+from spatial import RAW_POINT_LIMIT, get_spatial_index, map_zoom, radius_bbox
+from uploads import active_dataset_path
+
+data_path = active_dataset_path()
+dataset_fingerprint = file_fingerprint(data_path)
+spatial_index = get_spatial_index(data_path)
+
+# header
+
+st.markdown(
+    """
+    <style>
+    .custom-heading {
+        color: #FFFFFF; /* White text */
+        font-weight: bolder;
+        background-color: #2C3E50; /* Dark Blue background */
+        border: 2px solid #1ABC9C; /* Turquoise border */
+        text-align: center;
+        padding: 10px;
+        border-radius: 10px;
+        font-size: 26px;
+        width: 100%; /* Makes the header wider */
+        box-sizing: border-box; /* Ensures padding and border are included in the width */
+    }
+    </style>
+    """,
+    unsafe_allow_html=True
+)
+
+# Applying the custom heading
+
+st.markdown("<h1 class='custom-heading'>Property Prices on the Map</h1>", unsafe_allow_html=True)
+
+# Area options
+
+st.sidebar.header("Map Area")
+
+area = st.sidebar.radio('Show', ['Whole area', 'Bounding box', 'Around a zipcode'])
+
+lat_low, lat_high = spatial_index.lat_range
+long_low, long_high = spatial_index.long_range
+radius = None
+
+if area == 'Bounding box':
+    lat_low, lat_high = st.sidebar.slider('Latitude', min_value=lat_low, max_value=lat_high,
+                                          value=(lat_low, lat_high), step=0.001, format='%.3f')
+    long_low, long_high = st.sidebar.slider('Longitude', min_value=long_low, max_value=long_high,
+                                            value=(long_low, long_high), step=0.001, format='%.3f')
+elif area == 'Around a zipcode':
+    zipcode = st.sidebar.selectbox('Zipcode', sorted(spatial_index.zipcode_centers))
+    radius_km = st.sidebar.slider('Radius (km)', min_value=0.5, max_value=30.0, value=3.0, step=0.5)
+    center_lat, center_long = spatial_index.zipcode_centers[zipcode]
+    radius = (center_lat, center_long, radius_km)
+    lat_low, lat_high, long_low, long_high = radius_bbox(center_lat, center_long, radius_km)
+
+box = (lat_low, lat_high, long_low, long_high)
+kind, view, n_sales = spatial_index.view(box, radius=radius)
+
+st.markdown(f"""
+<p style='font-size:18px;'>Each sale has a latitude and longitude. When the selected area holds at most {RAW_POINT_LIMIT:,} sales they are drawn individually; larger areas are split into square tiles, each drawn at the average position of its sales, sized by the number of sales and colored by their average price.</p>
+""", unsafe_allow_html=True)
+
+sales, shown = st.columns(2)
+sales.metric('Sales in Area', f'{n_sales:,}')
+shown.metric('Shown As', 'Individual sales' if kind == 'points' else f'{len(view):,} tiles')
+
+center = dict(lat=(lat_low + lat_high) / 2, lon=(long_low + long_high) / 2)
+zoom = map_zoom(*box)
+figure_key = (dataset_fingerprint, box, radius)
+
+if kind == 'points':
+    points = load_housing(data_path).iloc[view]
+    fig = cached_figure('map_points', figure_key,
+                        lambda: px.scatter_map(points, lat='lat', lon='long', color='price',
+                                               hover_data=['price', 'bedrooms', 'sqft_living', 'zipcode'],
+                                               labels={'price': 'Price'}, center=center, zoom=zoom,
+                                               color_continuous_scale='viridis', height=600))
+else:
+    fig = cached_figure('map_tiles', figure_key,
+                        lambda: px.scatter_map(view, lat='lat', lon='long', size='count', color='mean',
+                                               hover_data={'count': ':,', 'mean': ':,.0f', 'min': ':,.0f', 'max': ':,.0f'},
+                                               labels={'mean': 'Average Price', 'count': 'Sales'},
+                                               center=center, zoom=zoom, size_max=18,
+                                               color_continuous_scale='viridis', height=600))
+st.plotly_chart(fig)
+
+if kind == 'points' and len(points):
+    with st.expander('Sales in this area'):
+        st.dataframe(points)
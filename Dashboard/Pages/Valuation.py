@@ -0,0 +1,115 @@
+# Terminal -> cd Dashboard -> Enter
+# streamlit run Home.py -> Enter
+
+import time
+
+import pandas as pd
+import streamlit as st
+
+from housing_data import load_housing
+from pricing import INPUT_COLUMNS, get_price_model, score_frame
+from uploads import active_dataset_path
+
+data_path = active_dataset_path()
+df = load_housing(data_path, columns=list(INPUT_COLUMNS))
+
+started = time.perf_counter()
+model = get_price_model(data_path)
+load_seconds = time.perf_counter() - started
+
+# header
+
+st.markdown(
+    """
+    <style>
+    .custom-heading {
+        color: #FFFFFF; /* White text */
+        font-weight: bolder;
+        background-color: #2C3E50; /* Dark Blue background */
+        border: 2px solid #1ABC9C; /* Turquoise border */
+        text-align: center;
+        padding: 10px;
+        border-radius: 10px;
+        font-size: 26px;
+        width: 100%; /* Makes the header wider */
+        box-sizing: border-box; /* Ensures padding and border are included in the width */
+    }
+    </style>
+    """,
+    unsafe_allow_html=True
+)
+
+# Applying the custom heading
+
+st.markdown("<h1 class='custom-heading'>Property Valuation</h1>", unsafe_allow_html=True)
+
+st.markdown("""
+<p style='font-size:18px;'>Estimate the sale price of a property from its size, layout, quality, location and history. The model is a regularized linear regression on the logarithm of price, trained on every sale in the dataset, with a separate adjustment for each zipcode.</p>
+""", unsafe_allow_html=True)
+
+# Model accuracy on sales it was not trained on
+
+r2, error, ape = st.columns(3)
+r2.metric('Holdout R²', f"{model.metrics['holdout_r2']:.3f}")
+error.metric('Mean Absolute Error', f"{model.metrics['holdout_mae']:,.0f}")
+ape.metric('Median % Error', f"{model.metrics['holdout_median_ape']:.1%}")
+st.caption(f"Measured on {model.metrics['holdout_rows']:,.0f} held-out sales. Training took "
+           f"{model.train_seconds:.2f}s; getting the model for this page took {load_seconds * 1000:.1f} ms.")
+
+# Single property form, prefilled with the typical property
+
+st.markdown("<h1 style='font-size:40px; text-align: center'>Value a Property</h1>", unsafe_allow_html=True)
+
+typical = df.drop(columns='zipcode').median()
+zipcodes = sorted(df['zipcode'].astype(str).unique())
+
+with st.form('valuation'):
+    left, middle, right = st.columns(3)
+    subject = {
+        'bedrooms': left.number_input('Bedrooms', value=int(typical['bedrooms']), min_value=0, step=1),
+        'bathrooms': left.number_input('Bathrooms', value=float(typical['bathrooms']), min_value=0.0, step=0.25),
+        'floors': left.number_input('Floors', value=float(typical['floors']), min_value=1.0, step=0.5),
+        'sqft_living': left.number_input('Sqft living', value=int(typical['sqft_living']), min_value=1, step=50),
+        'sqft_lot': left.number_input('Sqft lot', value=int(typical['sqft_lot']), min_value=1, step=100),
+        'sqft_above': middle.number_input('Sqft above ground', value=int(typical['sqft_above']), min_value=0, step=50),
+        'sqft_basement': middle.number_input('Sqft basement', value=int(typical['sqft_basement']), min_value=0, step=50),
+        'grade': middle.slider('Grade', min_value=1, max_value=13, value=int(typical['grade'])),
+        'condition': middle.slider('Condition', min_value=1, max_value=5, value=int(typical['condition'])),
+        'view': middle.slider('View', min_value=0, max_value=4, value=int(typical['view'])),
+        'waterfront': int(right.checkbox('Waterfront')),
+        'yr_built': right.number_input('Year built', value=int(typical['yr_built']), min_value=1800, max_value=2100, step=1),
+        'yr_renovated': right.number_input('Year renovated (0 if never)', value=0, min_value=0, max_value=2100, step=1),
+        'zipcode': right.selectbox('Zipcode', zipcodes),
+    }
+    st.form_submit_button('Estimate price')
+
+# Location and neighbourhood features default to the zipcode's typical values
+
+neighbours = df[df['zipcode'].astype(str) == subject['zipcode']].drop(columns='zipcode').median()
+for col in ('lat', 'long', 'sqft_living15', 'sqft_lot15'):
+    subject[col] = float(neighbours[col])
+
+prices, seconds = model.timed_predict(pd.DataFrame([subject]))
+st.metric('Estimated Price', f'{prices[0]:,.0f}')
+st.caption(f'Scored in {seconds * 1000:.2f} ms.')
+
+# Bulk scoring
+
+st.markdown("<h1 style='font-size:40px; text-align: center'>Value Many Properties</h1>", unsafe_allow_html=True)
+
+st.markdown(f"Upload a CSV with the columns {', '.join(INPUT_COLUMNS)}. Every row is scored in one batch.")
+
+uploaded = st.file_uploader('Properties to value', type=['csv'])
+if uploaded is not None:
+    properties = pd.read_csv(uploaded)
+    try:
+        started = time.perf_counter()
+        scored = score_frame(model, properties)
+        seconds = time.perf_counter() - started
+    except ValueError as exc:
+        st.error(str(exc))
+    else:
+        st.caption(f'Scored {len(scored):,} properties in {seconds * 1000:.1f} ms '
+                   f'({len(scored) / max(seconds, 1e-9):,.0f} per second).')
+        st.dataframe(scored)
+        st.download_button('Download valuations', scored.to_csv(index=False), 'valuations.csv', 'text/csv')
@@ -0,0 +1,190 @@
+# Price statistics for every category dimension of the Dashboard, computed
+# together instead of one groupby per chart.
+# A CubeIndex is built once per dataset version: each dimension is encoded
+# as small integer codes and the rows are pre-sorted by price. For a filter
+# mask, the price-ordered rows are taken once, and each dimension then needs
+# only a stable (radix) sort of its codes to have prices sorted within every
+# group, which gives counts, means, stds, quantiles and box fences in a few
+# vectorized passes. The resulting PriceCube is cached per filter state (see
+# analytics.py) and every chart on the page reads from it.
+
+import numpy as np
+import pandas as pd
+
+from housing_data import DATA_PATH, file_fingerprint, load_housing
+from resources import dataset_resource
+
+DIMENSIONS = ('bedrooms', 'floors', 'waterfront', 'view', 'condition', 'grade',
+              'zipcode', 'yr_built', 'date')
+
+CROSSTABS = (('waterfront', 'view'), ('grade', 'condition'))
+
+QUANTILES = {'q25': 0.25, 'median': 0.5, 'q75': 0.75}
+
+HISTOGRAM_BINS = 50
+
+STAT_COLUMNS = ('count', 'mean', 'std', 'min', 'q25', 'median', 'q75', 'max',
+                'lowerfence', 'upperfence')
+
+
+def _small_int_codes(codes):
+    for dtype in (np.int8, np.int16, np.int32):
+        if codes.max(initial=0) < np.iinfo(dtype).max:
+            return codes.astype(dtype)
+    return codes
+
+
+def group_stats(sorted_prices, codes, uniques):
+    k = len(uniques)
+    counts = np.bincount(codes, minlength=k)
+    present = np.flatnonzero(counts)
+    n = counts[present]
+    starts = (np.cumsum(counts) - counts)[present]
+    ends = starts + n - 1
+
+    sums = np.bincount(codes, weights=sorted_prices, minlength=k)
+    mean = sums[present] / n
+    deviation = sorted_prices - (sums / np.maximum(counts, 1))[codes]
+    squares = np.bincount(codes, weights=deviation * deviation, minlength=k)[present]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(squares / (n - 1))
+
+    stats = {'count': n, 'mean': mean, 'std': std,
+             'min': sorted_prices[starts], 'max': sorted_prices[ends]}
+    for name, q in QUANTILES.items():
+        position = starts + q * (n - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, ends)
+        fraction = position - low
+        stats[name] = sorted_prices[low] + fraction * (sorted_prices[high] - sorted_prices[low])
+
+    # Tukey fences: most extreme prices within 1.5 IQR of the quartiles
+    iqr = stats['q75'] - stats['q25']
+    lower_limit = stats['q25'] - 1.5 * iqr
+    upper_limit = stats['q75'] + 1.5 * iqr
+    lowerfence = np.empty(len(present))
+    upperfence = np.empty(len(present))
+    for i, (start, end) in enumerate(zip(starts, ends + 1)):
+        group = sorted_prices[start:end]
+        lowerfence[i] = group[np.searchsorted(group, lower_limit[i], side='left')]
+        upperfence[i] = group[np.searchsorted(group, upper_limit[i], side='right') - 1]
+    stats['lowerfence'] = lowerfence
+    stats['upperfence'] = upperfence
+
+    return pd.DataFrame(stats, index=uniques[present], columns=list(STAT_COLUMNS))
+
+
+class PriceCube:
+
+    # Exact; see approximate.ApproximateCube
+    approximate = False
+
+    def __init__(self, n_rows, stats, crosstabs, histogram):
+        self.n_rows = n_rows
+        self._stats = stats
+        self._crosstabs = crosstabs
+        self.histogram = histogram
+
+    # All statistics for one dimension, indexed by its values
+
+    def stats(self, dimension):
+        return self._stats[dimension]
+
+    # One statistic as a two-column frame, shaped like groupby(...).agg().reset_index()
+
+    def stat(self, dimension, stat, name='price'):
+        return self._stats[dimension][stat].rename(name).reset_index()
+
+    def crosstab(self, rows, columns):
+        return self._crosstabs[(rows, columns)]
+
+
+class CubeIndex:
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self._prices = df['price'].to_numpy(dtype=np.float64)
+        self._price_order = np.argsort(self._prices, kind='stable')
+
+        self._codes = {}
+        self._uniques = {}
+        for col in DIMENSIONS:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            self._codes[col] = _small_int_codes(codes)
+            self._uniques[col] = pd.Index(uniques, name=col)
+
+    def _rows(self, mask):
+        rows = self._price_order if mask is None else self._price_order[mask[self._price_order]]
+        return rows, self._prices[rows]
+
+    def _group_stats(self, col, codes, prices):
+        within = np.argsort(codes, kind='stable')
+        return group_stats(prices[within], codes[within].astype(np.intp), self._uniques[col])
+
+    def _crosstab(self, row_col, column_col, row_codes, column_codes):
+        n_columns = len(self._uniques[column_col])
+        cells = row_codes.astype(np.intp) * n_columns + column_codes
+        counts = np.bincount(cells, minlength=len(self._uniques[row_col]) * n_columns)
+        table = pd.DataFrame(counts.reshape(-1, n_columns),
+                             index=self._uniques[row_col], columns=self._uniques[column_col])
+        # Like pd.crosstab, only keep values that occur
+        return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+    @staticmethod
+    def _histogram(prices):
+        if not len(prices):
+            return None
+        edges = np.linspace(prices[0], prices[-1], HISTOGRAM_BINS + 1)
+        # prices are sorted, so bin counts are differences of insert positions
+        positions = np.searchsorted(prices, edges[1:-1], side='left')
+        counts = np.diff(np.concatenate([[0], positions, [len(prices)]]))
+        return pd.DataFrame({'low': edges[:-1], 'high': edges[1:], 'count': counts})
+
+    def cube(self, mask=None):
+        rows, prices = self._rows(mask)
+        codes = {col: self._codes[col][rows] for col in DIMENSIONS}
+        stats = {col: self._group_stats(col, codes[col], prices) for col in DIMENSIONS}
+        crosstabs = {(row_col, column_col): self._crosstab(row_col, column_col, codes[row_col], codes[column_col])
+                     for row_col, column_col in CROSSTABS}
+        return PriceCube(len(rows), stats, crosstabs, self._histogram(prices))
+
+    # Single pieces of a cube, for views that need one chart's numbers at a time
+
+    def stats(self, col, mask=None):
+        rows, prices = self._rows(mask)
+        return self._group_stats(col, self._codes[col][rows], prices)
+
+    def crosstab(self, row_col, column_col, mask=None):
+        if mask is None:
+            return self._crosstab(row_col, column_col, self._codes[row_col], self._codes[column_col])
+        return self._crosstab(row_col, column_col, self._codes[row_col][mask], self._codes[column_col][mask])
+
+    def histogram(self, mask=None):
+        return self._histogram(self._rows(mask)[1])
+
+    # Row masks for chart selections: rows whose value is one of values, or
+    # whose (row value, column value) pair is one of cells
+
+    def value_mask(self, col, values):
+        return self._uniques[col].isin(list(values))[self._codes[col]]
+
+    def cell_mask(self, row_col, column_col, cells):
+        row_index = self._uniques[row_col].get_indexer([cell[0] for cell in cells])
+        column_index = self._uniques[column_col].get_indexer([cell[1] for cell in cells])
+        n_columns = len(self._uniques[column_col])
+        keep = np.zeros(len(self._uniques[row_col]) * n_columns, dtype=bool)
+        found = (row_index >= 0) & (column_index >= 0)
+        keep[row_index[found] * n_columns + column_index[found]] = True
+        return keep[self._codes[row_col].astype(np.intp) * n_columns + self._codes[column_col]]
+
+
+# Shared by every session; rebuilt when the dataset fingerprint changes
+
+@dataset_resource('cube_index')
+def _cube_index(path, fingerprint):
+    return CubeIndex(load_housing(path))
+
+
+def get_cube_index(path=DATA_PATH):
+    return _cube_index(path, file_fingerprint(path))
+
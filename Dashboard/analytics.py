@@ -0,0 +1,277 @@
+# The Dashboard's aggregations as a library, independent of any page.
+# An Analytics object bundles the filter index, the price cube index and the
+# dataset's columns for one dataset version, and answers everything the
+# Dashboard charts (and api.py) need for a filter state: per-category price
+# statistics, crosstabs, the price histogram, row counts and OLS trendlines.
+# Cubes and fits are memoized per filter state (LRU), so every caller, page
+# or HTTP client, shares the work.
+#
+# Chart selections (a clicked bar or heatmap cell) narrow a filter state
+# further; see make_selection. A cube for a selection is a CrossFilteredCube,
+# whose per-chart pieces are memoized separately, so changing one selection
+# recomputes only the pieces that depend on it.
+#
+#     engine = Analytics.from_path('Housing.csv')
+#     state = engine.state(price=(200_000, 500_000), waterfront=[0])
+#     engine.stats('grade', state, 'median')
+#
+# get_analytics() serves datasets too big for memory from outofcore.py's
+# PartitionedAnalytics instead, which answers the same calls.
+
+import collections
+import os
+import threading
+
+import numpy as np
+
+from aggregations import CROSSTABS, DIMENSIONS, STAT_COLUMNS, CubeIndex, get_cube_index
+from filters import FilterIndex, get_filter_index, make_filter_state
+from housing_data import (DATA_PATH, ensure_binary, file_fingerprint, load_housing, read_housing_binary,
+                          read_housing_csv)
+from regression import fit_line
+from resources import dataset_resource
+
+# Datasets bigger than this on disk are aggregated out of core, streaming
+# over partitions instead of loading them (DASHBOARD_OUT_OF_CORE_MB, see
+# outofcore.py)
+
+OUT_OF_CORE_BYTES = int(float(os.environ.get('DASHBOARD_OUT_OF_CORE_MB', 1024)) * (1 << 20))
+
+# Numeric columns a trendline can be drawn over
+
+TRENDLINE_COLUMNS = ('price', 'bedrooms', 'bathrooms', 'sqft_living', 'sqft_lot', 'floors', 'sqft_above',
+                     'sqft_basement', 'yr_built', 'yr_renovated', 'sqft_living15', 'sqft_lot15')
+
+
+# Thread-safe LRU memo: get() returns the cached value for key or stores build()
+
+class LRUCache:
+
+    def __init__(self, size):
+        self._items = collections.OrderedDict()
+        self._size = size
+        self._lock = threading.Lock()
+
+    def lookup(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        return default
+
+    def get(self, key, build):
+        missing = object()
+        value = self.lookup(key, missing)
+        if value is not missing:
+            return value
+        value = build()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self._size:
+                self._items.popitem(last=False)
+        return value
+
+
+# Chart selections as a hashable, order-independent tuple of (key, values)
+# pairs. A key is a dimension ('zipcode') or a crosstab pair
+# (('grade', 'condition')); values are category values or (row, column) cells.
+
+def make_selection(selected):
+    pairs = [(key, tuple(sorted(set(values)))) for key, values in selected.items() if values]
+    return tuple(sorted(pairs, key=lambda pair: repr(pair[0])))
+
+
+def without_selection(selection, key):
+    return tuple(pair for pair in selection if pair[0] != key)
+
+
+# PriceCube-like view of a filter state plus chart selections. Every piece
+# ignores the selection made on its own chart, so a chart keeps showing the
+# values the user can still pick; its own selection only filters the others.
+
+class CrossFilteredCube:
+
+    approximate = False
+
+    def __init__(self, engine, state, selection):
+        self._engine = engine
+        self._state = state
+        self._selection = selection
+
+    @property
+    def n_rows(self):
+        return self._engine.count(self._state, self._selection)
+
+    def stats(self, dimension):
+        return self._engine.view_piece(('stats', dimension), self._state,
+                                       without_selection(self._selection, dimension))
+
+    def stat(self, dimension, stat, name='price'):
+        return self.stats(dimension)[stat].rename(name).reset_index()
+
+    def crosstab(self, rows, columns):
+        return self._engine.view_piece(('crosstab', rows, columns), self._state,
+                                       without_selection(self._selection, (rows, columns)))
+
+    @property
+    def histogram(self):
+        return self._engine.view_piece(('histogram',), self._state, self._selection)
+
+
+class Analytics:
+
+    out_of_core = False
+
+    def __init__(self, df, fingerprint='', filter_index=None, cube_index=None, cache_size=64):
+        self.fingerprint = fingerprint
+        self.n_rows = len(df)
+        self.filters = filter_index or FilterIndex(df)
+        self._cube_index = cube_index or CubeIndex(df)
+        self._columns = {col: df[col].to_numpy() for col in TRENDLINE_COLUMNS if col in df.columns}
+        self._cubes = LRUCache(cache_size)
+        self._fits = LRUCache(cache_size * 4)
+        self._selection_masks = LRUCache(cache_size * 4)
+        self._pieces = LRUCache(cache_size * 16)
+
+    @classmethod
+    def from_path(cls, path=DATA_PATH):
+        fingerprint = file_fingerprint(path)
+        try:
+            df = read_housing_binary(ensure_binary(path, fingerprint))
+        except (ImportError, OSError, ValueError):
+            df = read_housing_csv(path)
+        return cls(df, fingerprint)
+
+    # A FilterState; anything left out covers the whole dataset
+
+    def state(self, price=None, sqft_living=None, floors=None, waterfront=None):
+        full = self.filters.full_state()
+        return make_filter_state(
+            price=full.price if price is None else price,
+            sqft_living=full.sqft_living if sqft_living is None else sqft_living,
+            floors=full.floors if floors is None else floors,
+            waterfront=full.waterfront if waterfront is None else waterfront,
+        )
+
+    def mask(self, state, selection=()):
+        if not selection:
+            return self.filters.mask(state)
+        return self._selection_masks.get((state, selection), lambda: self._read_only(
+            self.filters.mask(state) & self.selection_mask(selection)))
+
+    # Rows matching every chart selection; one memoized mask per selected key
+
+    def selection_mask(self, selection):
+        mask = np.ones(self.n_rows, dtype=bool)
+        for key, values in selection:
+            mask &= self._selection_masks.get((key, values), lambda: self._read_only(self._key_mask(key, values)))
+        return mask
+
+    def _key_mask(self, key, values):
+        if isinstance(key, tuple):
+            return self._cube_index.cell_mask(key[0], key[1], values)
+        return self._cube_index.value_mask(key, values)
+
+    @staticmethod
+    def _read_only(mask):
+        mask.flags.writeable = False
+        return mask
+
+    def count(self, state, selection=()):
+        return int(np.count_nonzero(self.mask(state, selection)))
+
+    def cube(self, state, selection=()):
+        if selection:
+            return CrossFilteredCube(self, state, selection)
+        return self._cubes.get(state, lambda: self._cube_index.cube(self.mask(state)))
+
+    # One piece of a cross-filtered cube: ('stats', dimension),
+    # ('crosstab', rows, columns) or ('histogram',)
+
+    def view_piece(self, piece, state, selection):
+        if not selection:
+            cube = self.cube(state)
+            if piece[0] == 'stats':
+                return cube.stats(piece[1])
+            if piece[0] == 'crosstab':
+                return cube.crosstab(piece[1], piece[2])
+            return cube.histogram
+
+        def build():
+            mask = self.mask(state, selection)
+            if piece[0] == 'stats':
+                return self._cube_index.stats(piece[1], mask)
+            if piece[0] == 'crosstab':
+                return self._cube_index.crosstab(piece[1], piece[2], mask)
+            return self._cube_index.histogram(mask)
+
+        return self._pieces.get((piece, state, selection), build)
+
+    # All statistics for a dimension, or one of them as a two-column frame
+
+    def stats(self, dimension, state, stat=None):
+        if dimension not in DIMENSIONS:
+            raise KeyError(f'Unknown dimension {dimension!r}')
+        if stat is None:
+            return self.cube(state).stats(dimension)
+        if stat not in STAT_COLUMNS:
+            raise KeyError(f'Unknown statistic {stat!r}')
+        return self.cube(state).stat(dimension, stat)
+
+    def crosstab(self, rows, columns, state):
+        if (rows, columns) not in CROSSTABS:
+            raise KeyError(f'No crosstab for {rows!r} and {columns!r}')
+        return self.cube(state).crosstab(rows, columns)
+
+    def histogram(self, state):
+        return self.cube(state).histogram
+
+    # Row count, mean and median price, and median price per sqft of living space
+
+    def price_summary(self, state):
+        def summarize():
+            mask = self.mask(state)
+            prices = self._columns['price'][mask]
+            if not len(prices):
+                return {'count': 0, 'mean': np.nan, 'median': np.nan, 'median_price_per_sqft': np.nan}
+            return {'count': len(prices), 'mean': float(prices.mean()), 'median': float(np.median(prices)),
+                    'median_price_per_sqft': float(np.median(prices / self._columns['sqft_living'][mask]))}
+
+        return self._pieces.get((('summary',), state, ()), summarize)
+
+    def trendline(self, x, y, state, selection=()):
+        for col in (x, y):
+            if col not in self._columns:
+                raise KeyError(f'Unknown column {col!r}')
+
+        def fit():
+            mask = self.mask(state, selection)
+            return fit_line(self._columns[x][mask], self._columns[y][mask])
+
+        return self._fits.get((x, y, state, selection), fit)
+
+
+# Shared by every session; reuses the page-wide filter and cube indexes
+
+@dataset_resource('analytics')
+def _analytics(path, fingerprint):
+    return Analytics(load_housing(path, columns=list(TRENDLINE_COLUMNS)), fingerprint,
+                     filter_index=get_filter_index(path), cube_index=get_cube_index(path))
+
+
+def use_out_of_core(path):
+    return os.path.getsize(path) > OUT_OF_CORE_BYTES
+
+
+def get_in_memory_analytics(path=DATA_PATH):
+    return _analytics(path, file_fingerprint(path))
+
+
+def get_analytics(path=DATA_PATH):
+    if use_out_of_core(path):
+        # Imported here: outofcore builds on this module
+        from outofcore import get_partitioned_analytics
+
+        return get_partitioned_analytics(path)
+    return get_in_memory_analytics(path)
+
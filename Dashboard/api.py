@@ -0,0 +1,340 @@
+# Headless HTTP API over analytics.py, for services that need the
+# Dashboard's numbers without the Dashboard. It runs on Starlette/uvicorn,
+# which come with Streamlit, and talks to nothing else.
+#
+# GET endpoints (JSON). All take the Dashboard's sidebar filters as query
+# parameters, e.g. ?price=200000,500000&sqft_living=500,3000&floors=1,2&waterfront=0
+#     /v1/summary                         row counts, dimensions, crosstabs
+#     /v1/stats/{dimension}[?stat=median] price statistics per category
+#     /v1/crosstab/{rows}/{columns}       counts, e.g. /v1/crosstab/grade/condition
+#     /v1/histogram                       price histogram
+#     /v1/trendline?x=sqft_living&y=price OLS fit
+#
+# A response is computed once per dataset version and normalized request,
+# then kept (plain and gzipped) in an LRU cache, each with its own strong
+# ETag (the gzipped one ends in -gzip). Clients sending Accept-Encoding: gzip
+# get the compressed body, and If-None-Match with either current ETag gets
+# 304 Not Modified. Computation runs in a thread
+# pool, so the event loop keeps serving cached responses meanwhile. The
+# dataset is reloaded when its fingerprint changes; datasets over
+# DASHBOARD_OUT_OF_CORE_MB are served out of core (see outofcore.py).
+#
+# Run with:
+#     python api.py [--data Housing.csv] [--host 127.0.0.1] [--port 8765]
+# Measure requests per second with:
+#     python api.py --benchmark [--requests 2000] [--concurrency 16]
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import math
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Route
+
+from aggregations import CROSSTABS, DIMENSIONS
+from analytics import Analytics, LRUCache, use_out_of_core
+from filters import CATEGORY_COLUMNS, RANGE_COLUMNS
+from housing_data import DATA_PATH, file_fingerprint
+
+RESPONSE_CACHE_SIZE = 1024
+
+# Bodies smaller than this are sent uncompressed
+
+GZIP_MIN_BYTES = 512
+
+CACHE_CONTROL = 'no-cache'
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, tuple):
+        return list(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _records(frame):
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+
+def _fit_dict(fit):
+    return {name: (None if isinstance(value, float) and np.isnan(value) else value)
+            for name, value in fit._asdict().items()}
+
+
+def parse_filters(engine, params):
+    def numbers(name, cast):
+        raw = params.get(name)
+        if raw is None or raw == '':
+            return None
+        try:
+            values = [cast(part) for part in raw.split(',') if part.strip()]
+            # float() takes nan and inf, which JSON can't echo back, and int()
+            # integers no column holds (out of int64 raises OverflowError)
+            finite = all(math.isfinite(value) for value in values)
+            np.array(values, dtype=np.int64 if cast is int else np.float64)
+        except (ValueError, OverflowError, TypeError):
+            raise ApiError(400, f'{name} must be a comma-separated list of numbers')
+        if not finite:
+            raise ApiError(400, f'{name} must be finite numbers')
+        return values
+
+    ranges = {}
+    for col in RANGE_COLUMNS:
+        values = numbers(col, float)
+        if values is not None and len(values) != 2:
+            raise ApiError(400, f'{col} takes two numbers: low,high')
+        if values is not None and values[0] > values[1]:
+            raise ApiError(400, f'{col} takes low,high with low at most high')
+        ranges[col] = None if values is None else tuple(values)
+    floors = numbers('floors', float)
+    waterfront = numbers('waterfront', int)
+    return engine.state(price=ranges['price'], sqft_living=ranges['sqft_living'],
+                        floors=floors, waterfront=waterfront)
+
+
+# Each endpoint returns (cache key, function computing the JSON payload)
+
+def summary_request(engine, state, request):
+    return ('summary', state), lambda: {
+        'fingerprint': engine.fingerprint, 'rows': engine.n_rows,
+        'matching_rows': engine.count(state), 'filters': state._asdict(),
+        'filter_columns': list(RANGE_COLUMNS + CATEGORY_COLUMNS),
+        'dimensions': list(DIMENSIONS), 'crosstabs': [list(pair) for pair in CROSSTABS]}
+
+
+def stats_request(engine, state, request):
+    dimension = request.path_params['dimension']
+    stat = request.query_params.get('stat')
+    if dimension not in DIMENSIONS:
+        raise ApiError(404, f'Unknown dimension {dimension!r}; choose from {", ".join(DIMENSIONS)}')
+
+    def payload():
+        try:
+            stats = engine.stats(dimension, state, stat)
+        except KeyError as exc:
+            raise ApiError(400, exc.args[0])
+        return {'dimension': dimension, 'stat': stat, 'filters': state._asdict(),
+                'stats': _records(stats if stat else stats.reset_index())}
+    return ('stats', dimension, stat, state), payload
+
+
+def crosstab_request(engine, state, request):
+    rows, columns = request.path_params['rows'], request.path_params['columns']
+    if (rows, columns) not in CROSSTABS:
+        raise ApiError(404, f'No crosstab for {rows!r} and {columns!r}')
+
+    def payload():
+        table = engine.crosstab(rows, columns, state)
+        return {'rows': rows, 'columns': columns, 'filters': state._asdict(),
+                'row_values': table.index.tolist(), 'column_values': table.columns.tolist(),
+                'counts': table.to_numpy().tolist()}
+    return ('crosstab', rows, columns, state), payload
+
+
+def histogram_request(engine, state, request):
+    def payload():
+        histogram = engine.histogram(state)
+        return {'filters': state._asdict(), 'bins': [] if histogram is None else _records(histogram)}
+    return ('histogram', state), payload
+
+
+def trendline_request(engine, state, request):
+    x = request.query_params.get('x', 'sqft_living')
+    y = request.query_params.get('y', 'price')
+
+    def payload():
+        try:
+            fit = engine.trendline(x, y, state)
+        except KeyError as exc:
+            raise ApiError(400, exc.args[0])
+        return {'x': x, 'y': y, 'filters': state._asdict(), 'fit': _fit_dict(fit)}
+    return ('trendline', x, y, state), payload
+
+
+class AnalyticsService:
+
+    def __init__(self, data_path=DATA_PATH, cache_size=RESPONSE_CACHE_SIZE):
+        self.data_path = data_path
+        self.responses = LRUCache(cache_size)
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def _current_engine(self):
+        fingerprint = file_fingerprint(self.data_path)
+        with self._lock:
+            if self._engine is None or self._engine.fingerprint != fingerprint:
+                if use_out_of_core(self.data_path):
+                    from outofcore import PartitionedAnalytics
+
+                    self._engine = PartitionedAnalytics.from_path(self.data_path)
+                else:
+                    self._engine = Analytics.from_path(self.data_path)
+            return self._engine
+
+    async def engine(self):
+        engine = self._engine
+        if engine is not None and engine.fingerprint == file_fingerprint(self.data_path):
+            return engine
+        return await run_in_threadpool(self._current_engine)
+
+    # (etag, body, gzipped body) of a payload
+
+    @staticmethod
+    def encode(payload):
+        body = json.dumps(payload, default=_json_default, separators=(',', ':')).encode()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        compressed = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+        return etag, body, compressed
+
+    def endpoint(self, build_request):
+        async def handle(request):
+            try:
+                engine = await self.engine()
+                state = parse_filters(engine, request.query_params)
+                key, payload = build_request(engine, state, request)
+                key = (engine.fingerprint,) + key
+                entry = self.responses.lookup(key)
+                if entry is None:
+                    entry = await run_in_threadpool(self.responses.get, key, lambda: self.encode(payload()))
+            except ApiError as exc:
+                return Response(json.dumps({'error': str(exc)}), status_code=exc.status,
+                                media_type='application/json')
+            return self.respond(request, *entry)
+        return handle
+
+    # The gzipped body is another representation, so it gets its own strong
+    # ETag; a client holding either one has the current content
+
+    @staticmethod
+    def respond(request, etag, body, compressed):
+        gzip_etag = etag[:-1] + '-gzip"'
+        headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL, 'Vary': 'Accept-Encoding'}
+        if compressed is not None and 'gzip' in request.headers.get('accept-encoding', ''):
+            headers['ETag'] = gzip_etag
+            headers['Content-Encoding'] = 'gzip'
+            body = compressed
+        tags = [tag.strip().removeprefix('W/') for tag in request.headers.get('if-none-match', '').split(',')]
+        if etag in tags or gzip_etag in tags or '*' in tags:
+            return Response(status_code=304, headers={key: value for key, value in headers.items()
+                                                      if key != 'Content-Encoding'})
+        return Response(body, media_type='application/json', headers=headers)
+
+
+def create_app(data_path=DATA_PATH):
+    service = AnalyticsService(data_path)
+    app = Starlette(routes=[
+        Route('/v1/summary', service.endpoint(summary_request)),
+        Route('/v1/stats/{dimension}', service.endpoint(stats_request)),
+        Route('/v1/crosstab/{rows}/{columns}', service.endpoint(crosstab_request)),
+        Route('/v1/histogram', service.endpoint(histogram_request)),
+        Route('/v1/trendline', service.endpoint(trendline_request)),
+    ])
+    app.state.service = service
+    return app
+
+
+# Benchmark: a minimal keep-alive HTTP/1.1 client on asyncio streams, so no
+# client library is needed
+
+async def _get(reader, writer, path, extra_headers=''):
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept-Encoding: gzip\r\n{extra_headers}\r\n'.encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    etag = None
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'etag':
+            etag = value.strip()
+    if length:
+        await reader.readexactly(length)
+    return status, etag
+
+
+async def _run_load(port, paths, concurrency, headers=''):
+    async def client(worker):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for path in paths[worker::concurrency]:
+            status, _ = await _get(reader, writer, path, headers)
+            if status not in (200, 304):
+                raise RuntimeError(f'{path} returned {status}')
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(worker) for worker in range(concurrency)))
+    return len(paths) / (time.perf_counter() - started)
+
+
+def benchmark(data_path=DATA_PATH, requests=2000, concurrency=16, port=8799):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_app(data_path), host='127.0.0.1', port=port,
+                                           log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    async def scenarios():
+        warm = '/v1/stats/grade?stat=median&price=200000,800000'
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        _, etag = await _get(reader, writer, warm)
+        writer.close()
+        results = {}
+        results['cached'] = await _run_load(port, [warm] * requests, concurrency)
+        results['not_modified'] = await _run_load(port, [warm] * requests, concurrency,
+                                                  f'If-None-Match: {etag}\r\n')
+        # Every request a new filter state: filter, cube and encoding each time
+        cold = [f'/v1/stats/zipcode?price={75000 + i},{5000000 - i}' for i in range(requests // 10)]
+        results['uncached'] = await _run_load(port, cold, concurrency)
+        return results
+
+    try:
+        results = asyncio.run(scenarios())
+    finally:
+        server.should_exit = True
+        thread.join()
+    for name, rate in results.items():
+        print(f'{name:>14}: {rate:,.0f} requests/s')
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the Dashboard's aggregations over HTTP.")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--benchmark', action='store_true', help='measure requests per second and exit')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.data, args.requests, args.concurrency)
+    else:
+        import uvicorn
+
+        uvicorn.run(create_app(args.data), host=args.host, port=args.port)
@@ -0,0 +1,470 @@
+# Approximate answers for exploring big datasets interactively. A synopsis
+# of the dataset is built ahead of time, in one pass over it, and kept next
+# to it (in <name>.synopsis/):
+#     a stratified sample: up to ROWS_PER_STRATUM random sales of every
+#         zipcode and grade, so small zipcodes and rare grades are as well
+#         covered as big ones; each sampled sale stands for (sales of its
+#         stratum) / (sampled sales of its stratum)
+#     the whole dataset's aggregates (ingest.LiveAggregates): per category
+#         of every dimension the exact count, mean and spread and a quantile
+#         sketch of its prices (sketches.py), and the crosstab counts
+# The whole dataset (filters untouched, no chart selection) is answered from
+# the aggregates, any other filter state from the weighted sample. Means and
+# medians come with CONFIDENCE intervals: from the sketches, their accuracy
+# bound; from the sample, normal intervals over its effective size (medians
+# by Woodruff's method), with the finite population correction, so a
+# stratum sampled whole has no error.
+#
+# On the Dashboard, refined_cube() and refined_fit() return the exact answer
+# if it is ready within INSTANT_SECONDS, and the estimate otherwise while
+# the exact one is computed in a background thread; refinement_poller()
+# reruns the page once it is done.
+#
+# Build the synopsis ahead of time (e.g. at deploy) with:
+#     python approximate.py path/to/sales.csv [--rows-per-stratum 200]
+
+import argparse
+import concurrent.futures
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from aggregations import CROSSTABS, DIMENSIONS, HISTOGRAM_BINS, STAT_COLUMNS, PriceCube
+from analytics import TRENDLINE_COLUMNS, LRUCache, get_in_memory_analytics, without_selection
+from filters import CATEGORY_COLUMNS, RANGE_COLUMNS
+from housing_data import HOUSING_COLUMNS, HOUSING_DTYPES, atomic_path, check_columns, file_fingerprint, load_housing
+from ingest import LiveAggregates
+from outofcore import read_chunks
+from regression import fit_from_sums, line_sums
+from resources import dataset_resource
+from sketches import RELATIVE_ACCURACY
+
+STRATA = ('zipcode', 'grade')
+ROWS_PER_STRATUM = 200
+SYNOPSIS = 'synopsis.json'
+SAMPLE = 'sample.feather'
+SYNOPSIS_VERSION = 1
+
+# Two-sided normal intervals
+
+CONFIDENCE = 0.95
+Z = 1.959963984540054
+
+CONFIDENCE_COLUMNS = ('mean_low', 'mean_high', 'median_low', 'median_high')
+
+# Approximate first by default from this many rows (DASHBOARD_APPROXIMATE_ROWS)
+
+APPROXIMATE_ROWS = int(os.environ.get('DASHBOARD_APPROXIMATE_ROWS', 1_000_000))
+
+# An exact answer ready this soon is shown instead of the estimate
+
+INSTANT_SECONDS = 0.1
+POLL_SECONDS = 1.0
+PENDING_KEY = 'approximate_pending'
+
+
+def synopsis_dir(path):
+    return os.path.splitext(path)[0] + '.synopsis'
+
+
+def _typed_index(dim, values):
+    if dim == 'date':
+        return pd.DatetimeIndex(values, name=dim)
+    return pd.Index(values, name=dim).astype(HOUSING_DTYPES[dim])
+
+
+# Draws the stratified sample (the rows with the smallest random keys in
+# each stratum, kept across chunks) and folds every chunk into the
+# aggregates. Written to a temporary folder and renamed into place.
+
+def write_synopsis(path, out_dir=None, fingerprint=None, rows_per_stratum=ROWS_PER_STRATUM, seed=0, log=None):
+    import pyarrow as pa
+
+    out_dir = out_dir or synopsis_dir(path)
+    fingerprint = fingerprint or file_fingerprint(path)
+    rng = np.random.default_rng(seed)
+    aggregates = LiveAggregates()
+    sample = None
+    strata = None
+    bounds = {}
+    categories = {col: set() for col in CATEGORY_COLUMNS}
+    for chunk in read_chunks(path):
+        check_columns(chunk.columns)
+        chunk = chunk[HOUSING_COLUMNS].reset_index(drop=True)
+        rows = aggregates.n_rows + np.arange(len(chunk))
+        aggregates.update(chunk)
+        sizes = chunk.groupby(list(STRATA), observed=True).size()
+        strata = sizes if strata is None else strata.add(sizes, fill_value=0)
+        for col in RANGE_COLUMNS:
+            low, high = bounds.get(col, (np.inf, -np.inf))
+            bounds[col] = (min(low, chunk[col].min()), max(high, chunk[col].max()))
+        for col in CATEGORY_COLUMNS:
+            categories[col].update(chunk[col].unique().tolist())
+
+        picked = chunk.assign(_key=rng.random(len(chunk)), _row=rows)
+        sample = picked if sample is None else pd.concat([sample, picked], ignore_index=True)
+        sample = sample.sort_values('_key', kind='stable').groupby(list(STRATA), observed=True).head(rows_per_stratum)
+        if log is not None:
+            log(f'{aggregates.n_rows:,} rows summarized')
+
+    sample = sample.sort_values('_row').drop(columns=['_key', '_row']).astype(HOUSING_DTYPES)
+    table = pa.Table.from_pandas(sample.reset_index(drop=True), preserve_index=False)
+    with atomic_path(out_dir, directory=True) as tmp_dir:
+        with pa.OSFile(os.path.join(tmp_dir, SAMPLE), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with open(os.path.join(tmp_dir, SYNOPSIS), 'w', encoding='utf-8') as handle:
+            json.dump({
+                'version': SYNOPSIS_VERSION, 'fingerprint': fingerprint, 'source': path, 'rows': aggregates.n_rows,
+                'sample': SAMPLE, 'sample_rows': len(sample), 'rows_per_stratum': rows_per_stratum,
+                'strata': [[zipcode, int(grade), int(size)] for (zipcode, grade), size in strata.items()],
+                'bounds': {col: [float(low), float(high)] for col, (low, high) in bounds.items()},
+                'categories': {col: sorted(values) for col, values in categories.items()},
+                'aggregates': aggregates.to_dict(),
+            }, handle)
+    return out_dir
+
+
+def read_synopsis(out_dir):
+    try:
+        with open(os.path.join(out_dir, SYNOPSIS), encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+# Synopsis of the dataset at path, (re)built when missing or stale
+
+def ensure_synopsis(path, fingerprint=None, rows_per_stratum=ROWS_PER_STRATUM):
+    fingerprint = fingerprint or file_fingerprint(path)
+    out_dir = synopsis_dir(path)
+    synopsis = read_synopsis(out_dir)
+    if synopsis is None or synopsis.get('version') != SYNOPSIS_VERSION or synopsis['fingerprint'] != fingerprint:
+        write_synopsis(path, out_dir, fingerprint, rows_per_stratum)
+        synopsis = read_synopsis(out_dir)
+    return out_dir, synopsis
+
+
+# Statistics of a weighted sample per group, in aggregations.group_stats'
+# columns plus CONFIDENCE_COLUMNS. Counts are estimated totals. A sale of
+# weight w takes w ranks, so with every weight 1 quantiles interpolate
+# between ranks exactly like numpy's 'linear' method.
+
+def weighted_stats(prices, weights, codes, uniques):
+    order = np.lexsort((prices, codes))
+    prices, weights, codes = prices[order], weights[order], codes[order]
+    k = len(uniques)
+    counts = np.bincount(codes, minlength=k)
+    present = np.flatnonzero(counts)
+    n = counts[present]
+    starts = (np.cumsum(counts) - counts)[present]
+    ends = starts + n - 1
+
+    total = np.bincount(codes, weights=weights, minlength=k)[present]
+    mean = np.bincount(codes, weights=weights * prices, minlength=k)[present] / total
+    deviation = prices - np.repeat(mean, n)
+    variance = np.bincount(codes, weights=weights * deviation * deviation, minlength=k)[present] / total
+    # Kish's effective sample size, and the finite population correction
+    n_eff = total * total / np.bincount(codes, weights=weights * weights, minlength=k)[present]
+    fpc = np.clip(1 - n / total, 0, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(variance * n_eff / (n_eff - 1))
+    mean_error = Z * np.sqrt(variance / n_eff * fpc)
+
+    cumulative = np.cumsum(weights)
+    before = cumulative[starts] - weights[starts]
+
+    def quantile(q):
+        rank = np.clip(q, 0, 1) * (total - 1)
+        low = np.floor(rank)
+        below = prices[np.clip(np.searchsorted(cumulative, before + low, side='right'), starts, ends)]
+        above = prices[np.clip(np.searchsorted(cumulative, before + np.ceil(rank), side='right'), starts, ends)]
+        return below + (rank - low) * (above - below)
+
+    median_error = Z * np.sqrt(0.25 / n_eff * fpc)
+    stats = {'count': np.rint(total).astype(np.int64), 'mean': mean, 'std': std,
+             'min': prices[starts], 'q25': quantile(0.25), 'median': quantile(0.5), 'q75': quantile(0.75),
+             'max': prices[ends], 'mean_low': mean - mean_error, 'mean_high': mean + mean_error,
+             'median_low': quantile(0.5 - median_error), 'median_high': quantile(0.5 + median_error)}
+
+    iqr = stats['q75'] - stats['q25']
+    lower_limit = stats['q25'] - 1.5 * iqr
+    upper_limit = stats['q75'] + 1.5 * iqr
+    stats['lowerfence'] = np.empty(len(present))
+    stats['upperfence'] = np.empty(len(present))
+    for i, (start, end) in enumerate(zip(starts, ends + 1)):
+        group = prices[start:end]
+        stats['lowerfence'][i] = group[np.searchsorted(group, lower_limit[i], side='left')]
+        stats['upperfence'][i] = group[np.searchsorted(group, upper_limit[i], side='right') - 1]
+
+    return pd.DataFrame(stats, index=uniques[present], columns=list(STAT_COLUMNS + CONFIDENCE_COLUMNS))
+
+
+# PriceCube of estimates; basis says what they were estimated from
+
+class ApproximateCube(PriceCube):
+
+    approximate = True
+
+    def __init__(self, n_rows, stats, crosstabs, histogram, basis):
+        super().__init__(n_rows, stats, crosstabs, histogram)
+        self.basis = basis
+
+
+# Answers the Analytics calls the Dashboard's charts make, from a synopsis
+
+class ApproximateAnalytics:
+
+    def __init__(self, out_dir, synopsis, cache_size=64):
+        self.fingerprint = synopsis['fingerprint']
+        self.n_rows = synopsis['rows']
+        self.sample_path = os.path.join(out_dir, synopsis['sample'])
+        self.sample = get_in_memory_analytics(self.sample_path)
+        self._bounds = synopsis['bounds']
+        self._categories = synopsis['categories']
+
+        df = load_housing(self.sample_path, columns=list(dict.fromkeys(TRENDLINE_COLUMNS + DIMENSIONS)))
+        self.sample_rows = len(df)
+        self._prices = df['price'].to_numpy(dtype=np.float64)
+        self._columns = {col: df[col].to_numpy() for col in TRENDLINE_COLUMNS}
+        self._codes = {}
+        self._uniques = {}
+        for dim in DIMENSIONS:
+            codes, uniques = pd.factorize(df[dim], sort=True)
+            self._codes[dim] = codes
+            self._uniques[dim] = pd.Index(uniques, name=dim)
+        # Each sampled sale stands for (sales of its stratum) / (sampled sales of it)
+        strata = df[list(STRATA)].astype({'zipcode': str, 'grade': np.int64})
+        sizes = strata.merge(pd.DataFrame(synopsis['strata'], columns=list(STRATA) + ['size']), how='left',
+                             on=list(STRATA))['size'].to_numpy(dtype=np.float64)
+        self._weights = sizes / strata.groupby(list(STRATA))['grade'].transform('size').to_numpy()
+
+        self._whole = self._whole_cube(LiveAggregates.from_dict(synopsis['aggregates']))
+        self._cubes = LRUCache(cache_size)
+        self._fits = LRUCache(cache_size * 4)
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(*ensure_synopsis(path))
+
+    # Whole-dataset statistics from the aggregates: counts, means and spreads
+    # exact, quartiles within the sketches' relative accuracy
+
+    def _whole_cube(self, aggregates):
+        stats = {}
+        for dim in DIMENSIONS:
+            frame = aggregates.stats(dim)
+            frame.index = _typed_index(dim, frame.index)
+            iqr = frame['q75'] - frame['q25']
+            frame['lowerfence'] = np.maximum(frame['min'], frame['q25'] - 1.5 * iqr)
+            frame['upperfence'] = np.minimum(frame['max'], frame['q75'] + 1.5 * iqr)
+            frame['mean_low'] = frame['mean_high'] = frame['mean']
+            frame['median_low'] = np.maximum(frame['min'], frame['median'] / (1 + RELATIVE_ACCURACY))
+            frame['median_high'] = np.minimum(frame['max'], frame['median'] / (1 - RELATIVE_ACCURACY))
+            stats[dim] = frame[list(STAT_COLUMNS + CONFIDENCE_COLUMNS)]
+        crosstabs = {pair: aggregates.crosstab(*pair) for pair in CROSSTABS}
+        return ApproximateCube(self.n_rows, stats, crosstabs, self._histogram(np.ones(self.sample_rows, dtype=bool)),
+                               f'quantile sketches of all {self.n_rows:,} sales')
+
+    # Does the filter state keep every sale?
+
+    def _covers(self, state):
+        for col in RANGE_COLUMNS:
+            low, high = getattr(state, col)
+            if low > self._bounds[col][0] or high < self._bounds[col][1]:
+                return False
+        return all(set(self._categories[col]) <= set(getattr(state, col)) for col in CATEGORY_COLUMNS)
+
+    # The exact histogram's bins span the matching sales' prices, which the
+    # sample's extremes undercut. The dataset's price range, narrowed by the
+    # price filter and by the whole-dataset price range of every category the
+    # filters and selections keep, comes closer (and is exact for one filter).
+
+    def _price_range(self, state, selection):
+        low, high = self._bounds['price']
+        low, high = max(low, state.price[0]), min(high, state.price[1])
+        limits = [(col, getattr(state, col)) for col in CATEGORY_COLUMNS]
+        for key, values in selection:
+            if isinstance(key, tuple):
+                limits += [(key[0], [cell[0] for cell in values]), (key[1], [cell[1] for cell in values])]
+            else:
+                limits.append((key, values))
+        for dim, values in limits:
+            kept = self._whole.stats(dim).reindex(list(values)).dropna(subset=['min'])
+            if len(kept):
+                low, high = max(low, kept['min'].min()), min(high, kept['max'].max())
+        return low, high
+
+    def _histogram(self, mask, price_range=None):
+        prices = self._prices[mask]
+        if not len(prices):
+            return None
+        low, high = price_range or self._bounds['price']
+        edges = np.linspace(min(low, prices.min()), max(high, prices.max()), HISTOGRAM_BINS + 1)
+        counts = np.bincount(np.searchsorted(edges[1:-1], prices, side='right'), weights=self._weights[mask],
+                             minlength=HISTOGRAM_BINS)
+        return pd.DataFrame({'low': edges[:-1], 'high': edges[1:], 'count': np.rint(counts).astype(np.int64)})
+
+    def _crosstab(self, rows, columns, mask):
+        row_codes, column_codes = self._codes[rows][mask], self._codes[columns][mask]
+        n_columns = len(self._uniques[columns])
+        counts = np.bincount(row_codes * n_columns + column_codes, weights=self._weights[mask],
+                             minlength=len(self._uniques[rows]) * n_columns)
+        table = pd.DataFrame(np.rint(counts).astype(np.int64).reshape(-1, n_columns),
+                             index=self._uniques[rows], columns=self._uniques[columns])
+        return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+    def _estimate(self, state, selection):
+        stats = {}
+        for dim in DIMENSIONS:
+            mask = self.sample.mask(state, without_selection(selection, dim))
+            stats[dim] = weighted_stats(self._prices[mask], self._weights[mask], self._codes[dim][mask],
+                                        self._uniques[dim])
+        crosstabs = {pair: self._crosstab(*pair, self.sample.mask(state, without_selection(selection, pair)))
+                     for pair in CROSSTABS}
+        mask = self.sample.mask(state, selection)
+        return ApproximateCube(int(np.rint(self._weights[mask].sum())), stats, crosstabs,
+                               self._histogram(mask, self._price_range(state, selection)),
+                               f'a stratified sample of {self.sample_rows:,} sales')
+
+    # Like Analytics.cube; every chart's pieces at once, as the sample is small
+
+    def cube(self, state, selection=()):
+        if not selection and self._covers(state):
+            return self._whole
+        return self._cubes.get((state, selection), lambda: self._estimate(state, selection))
+
+    def count(self, state, selection=()):
+        return self.cube(state, selection).n_rows
+
+    # Weighted least squares over the sample
+
+    def trendline(self, x, y, state, selection=()):
+        for col in (x, y):
+            if col not in self._columns:
+                raise KeyError(f'Unknown column {col!r}')
+
+        def fit():
+            mask = self.sample.mask(state, selection)
+            fitted = fit_from_sums(line_sums(self._columns[x][mask], self._columns[y][mask], self._weights[mask]))
+            return fitted._replace(n=int(np.rint(fitted.n)))
+
+        return self._fits.get((x, y, state, selection), fit)
+
+
+@dataset_resource('approximate_analytics', spinner='Sampling the dataset...')
+def _approximate_analytics(path, fingerprint):
+    return ApproximateAnalytics(*ensure_synopsis(path, fingerprint))
+
+
+def get_approximate_analytics(path):
+    return _approximate_analytics(path, file_fingerprint(path))
+
+
+# Exact answers computed in the background, one at a time, kept by key
+
+class Refiner:
+
+    def __init__(self, workers=1, size=256):
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='refine')
+        self._futures = LRUCache(size)
+
+    # The value of compute() if it is ready within wait seconds (None waits
+    # for it); otherwise None, with compute() left running
+
+    def result(self, key, compute, wait=0):
+        future = self._futures.get(key, lambda: self._executor.submit(compute))
+        try:
+            return future.result(timeout=wait)
+        except concurrent.futures.TimeoutError:
+            return None
+
+    def ready(self, key):
+        future = self._futures.lookup(key)
+        return future is None or future.done()
+
+
+_refiner = Refiner()
+
+
+# An exact cube with every piece the charts read already computed
+
+def exact_cube(engine, state, selection=()):
+    cube = engine.cube(state, selection)
+    # Touch every piece, so the cube is fully computed here in the background
+    # (a cross-filtered cube computes its pieces on first access)
+    for dim in DIMENSIONS:
+        cube.stats(dim)
+    for pair in CROSSTABS:
+        cube.crosstab(*pair)
+    cube.histogram
+    cube.n_rows
+    return cube
+
+
+# The exact value when it is ready at once, else the estimate (and the
+# session waits for the exact one, see refinement_poller)
+
+def _refine(key, exact, estimate):
+    value = _refiner.result(key, exact, INSTANT_SECONDS)
+    if value is not None:
+        return value
+    st.session_state.setdefault(PENDING_KEY, set()).add(key)
+    return estimate()
+
+
+def refined_cube(engine, estimates, state, selection=()):
+    key = (engine.fingerprint, 'cube', state, selection)
+    cube = _refine(key, lambda: exact_cube(engine, state, selection), lambda: estimates.cube(state, selection))
+    if cube.approximate and not cube.n_rows:
+        # None of the sample's sales match, but a few of the others may
+        st.session_state[PENDING_KEY].discard(key)
+        return _refiner.result(key, lambda: exact_cube(engine, state, selection), wait=None)
+    return cube
+
+
+def refined_fit(engine, estimates, x, y, state, selection=()):
+    return _refine((engine.fingerprint, 'trendline', x, y, state, selection),
+                   lambda: engine.trendline(x, y, state, selection),
+                   lambda: estimates.trendline(x, y, state, selection))
+
+
+# Sidebar switch; on by default for datasets of APPROXIMATE_ROWS rows or more
+
+def approximate_toggle(engine):
+    st.session_state[PENDING_KEY] = set()
+    return st.sidebar.toggle('Approximate first', value=engine.n_rows >= APPROXIMATE_ROWS, key='approximate',
+                             help='Draw the charts from a sample at once, with confidence intervals, '
+                                  'and redraw them exactly when the full computation is done.')
+
+
+def approximate_caption(cube):
+    st.caption(f'Estimated from {cube.basis}, with {CONFIDENCE:.0%} confidence intervals; '
+               f'the exact figures replace these as soon as they are computed.')
+
+
+# Reruns the page once every exact answer this session is waiting for is ready
+
+@st.fragment(run_every=POLL_SECONDS)
+def refinement_poller():
+    pending = st.session_state.get(PENDING_KEY)
+    if pending and all(_refiner.ready(key) for key in pending):
+        pending.clear()
+        st.rerun()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the stratified sample and sketches for approximate answers.')
+    parser.add_argument('data', help='CSV or Feather file with the Housing.csv columns')
+    parser.add_argument('--rows-per-stratum', type=int, default=ROWS_PER_STRATUM)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    out_dir = write_synopsis(args.data, rows_per_stratum=args.rows_per_stratum, log=print)
+    synopsis = read_synopsis(out_dir)
+    print(f"Sampled {synopsis['sample_rows']:,} of {synopsis['rows']:,} rows from {len(synopsis['strata']):,} "
+          f'strata into {out_dir} in {time.perf_counter() - started:.1f}s')
@@ -0,0 +1,357 @@
+# Benchmark suite for the Dashboard.
+# For each dataset size it times, on a synthetic Housing-shaped CSV:
+#     load/*     parsing the CSV, writing and memory-mapping the Feather sidecar
+#     index/*    building the filter and price cube indexes
+#     filter/*   sidebar filter masks (full range, a price band, a narrow
+#                selection, and a repeated selection served from the memo)
+#     aggregate/*  the price cube, a pandas groupby baseline and the crosstabs
+#     figure/*   building each kind of px figure the page shows, and
+#     serialize/*  turning it into the JSON sent to the browser (with bytes)
+#     page/*     the Dashboard page run headlessly (streamlit.testing), cold
+#                and then tab by tab, up to --page-max-rows rows
+#     outofcore/*  the out-of-core backend (outofcore.py): splitting the CSV
+#                into Parquet partitions of --partition-rows rows, then the
+#                price cube, headline summary and trendline streamed over them
+#     approximate/*  building the stratified sample and sketches
+#                (approximate.py), and the estimated cubes and trendline
+#     memory/*   peak Python heap (tracemalloc, with peak_bytes) of answering
+#                one price band from the CSV in memory (frame, indexes, cube)
+#                and out of core (from the partitions)
+#
+# Synthetic datasets are generated from Housing.csv by synthetic.py and
+# kept under benchmarks/data, so later runs reuse them. Results are written
+# as JSON with the machine, library versions and commit they were measured
+# on. Given a baseline
+# report, every stage slower than the baseline by more than --tolerance is
+# listed and the exit status is 1, so a deploy script can stop on it.
+#
+# Run from this folder with:
+#     python benchmarks.py [--sizes 21613,100000,1000000,10000000] [--repeat 3]
+#                          [--partition-rows 1000000]
+#                          [--baseline benchmarks/baseline.json] [--save-baseline]
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.express as px
+import streamlit as st
+
+from aggregations import CROSSTABS, CubeIndex
+from approximate import ApproximateAnalytics, read_synopsis, synopsis_dir, write_synopsis
+from charts import box_figure, histogram_figure, scatter_figure, violin_figure
+from filters import FilterIndex, make_filter_state
+from housing_data import (DATA_PATH, convert_to_binary, file_fingerprint, read_housing_binary, read_housing_csv,
+                          write_atomic)
+from outofcore import PARTITION_ROWS, PartitionedAnalytics, partition_dir, read_manifest, write_partitions
+from regression import add_trendline, fit_line
+from resources import get_resource_cache
+from snapshot import LIVE_KEY
+from synthetic import write_synthetic
+
+BENCHMARK_DIR = 'benchmarks'
+DEFAULT_SIZES = (21_613, 100_000, 1_000_000, 10_000_000)
+PAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Pages', 'Dashboard.py')
+PAGE_SECTIONS = ('Size & Rooms', 'Price & Time', 'Floors & Quality', 'Location & Views', 'Summary', 'Data',
+                 'Compare Regions')
+
+# Stages faster than this are too noisy to compare against a baseline
+
+MIN_COMPARABLE_SECONDS = 0.005
+
+REPORT_VERSION = 1
+
+
+# Synthetic dataset of n_rows sales, generated on first use
+
+def synthetic_dataset(n_rows, out_dir=os.path.join(BENCHMARK_DIR, 'data'), source_path=DATA_PATH, seed=0):
+    path = os.path.join(out_dir, f'housing_{n_rows}_{seed}.csv')
+    if os.path.exists(path):
+        return path
+    return write_synthetic(path, n_rows, source_path=source_path, seed=seed)
+
+
+# Wall time of every call, and the last result
+
+def timed(build, repeat):
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = build()
+        seconds.append(time.perf_counter() - started)
+    return seconds, value
+
+
+class Recorder:
+
+    def __init__(self, n_rows, log=print):
+        self.n_rows = n_rows
+        self.results = []
+        self.log = log
+
+    def add(self, stage, seconds, **extra):
+        result = dict(rows=self.n_rows, stage=stage, min=min(seconds), median=statistics.median(seconds),
+                      runs=len(seconds), **extra)
+        self.results.append(result)
+        size = f"  {extra['bytes']:,} bytes" if 'bytes' in extra else ''
+        size += f"  peak {extra['peak_bytes'] / (1 << 20):,.1f} MB" if 'peak_bytes' in extra else ''
+        self.log(f'{self.n_rows:>12,}  {stage:<36} {result["median"] * 1000:>10.1f} ms{size}')
+
+    def time(self, stage, build, repeat, **extra):
+        seconds, value = timed(build, repeat)
+        self.add(stage, seconds, **extra)
+        return value
+
+
+# The page's figures, built from the filtered rows and their price cube
+
+def page_figures(filtered, cube, fit):
+    colors = px.colors.sequential.Plasma
+    return {
+        'scatter_sqft_living': lambda: add_trendline(scatter_figure(filtered, x='sqft_living', y='price'), fit),
+        'bar_bedrooms': lambda: px.bar(cube.stat('bedrooms', 'mean'), x='bedrooms', y='price', color='bedrooms'),
+        'histogram_price': lambda: histogram_figure(cube.histogram, title='Price Distribution',
+                                                    color_discrete_sequence=colors),
+        'bar_zipcode': lambda: px.bar(cube.stat('zipcode', 'median'), x='zipcode', y='price', color='zipcode'),
+        'imshow_grade_condition': lambda: px.imshow(cube.crosstab('grade', 'condition')),
+        'box_view': lambda: box_figure(cube.stats('view'), 'view', 'price', colors=colors),
+        'violin_waterfront': lambda: violin_figure(filtered, 'waterfront', 'price', colors=colors),
+    }
+
+
+# The lowest quarter of the price range
+
+def price_band(filter_index):
+    price_low, price_high = filter_index.bounds('price')
+    return filter_index.full_state()._replace(price=(price_low, price_low + (price_high - price_low) / 4))
+
+
+def benchmark_library(path, recorder, repeat):
+    fingerprint = file_fingerprint(path)
+    df = recorder.time('load/csv', lambda: read_housing_csv(path), repeat)
+    binary_path = recorder.time('load/write_feather', lambda: convert_to_binary(path, fingerprint), repeat)
+    recorder.time('load/read_feather', lambda: read_housing_binary(binary_path), repeat)
+
+    # Without a memo, so every filter/* stage evaluates its mask
+    filter_index = recorder.time('index/filters', lambda: FilterIndex(df, cache_size=0), repeat)
+    cube_index = recorder.time('index/cube', lambda: CubeIndex(df), repeat)
+
+    states = {
+        'full': filter_index.full_state(),
+        'price_band': price_band(filter_index),
+        'narrow': make_filter_state((200_000, 600_000), (1_000, 2_500), [1.0, 2.0], [0]),
+    }
+    masks = {}
+    for name, state in states.items():
+        masks[name] = recorder.time(f'filter/{name}', lambda: filter_index.mask(state), repeat)
+    memoized = FilterIndex(df)
+    memoized.mask(states['narrow'])
+    recorder.time('filter/memoized', lambda: memoized.mask(states['narrow']), repeat)
+
+    mask = masks['price_band']
+    filtered = recorder.time('filter/apply_rows', lambda: df[mask], repeat)
+    cube = recorder.time('aggregate/cube', lambda: cube_index.cube(mask), repeat)
+    recorder.time('aggregate/pandas_groupby', lambda: [
+        filtered.groupby(dimension, observed=True)['price'].describe() for dimension in
+        ('bedrooms', 'floors', 'waterfront', 'view', 'condition', 'grade', 'yr_built', 'zipcode')], repeat)
+    for rows, columns in CROSSTABS:
+        recorder.time(f'aggregate/crosstab_{rows}_{columns}',
+                      lambda: pd.crosstab(filtered[rows], filtered[columns]), repeat)
+    fit = recorder.time('aggregate/trendline', lambda: fit_line(filtered['sqft_living'].to_numpy(),
+                                                                filtered['price'].to_numpy()), repeat)
+
+    for name, build in page_figures(filtered, cube, fit).items():
+        fig = recorder.time(f'figure/{name}', build, repeat)
+        payload = recorder.time(f'serialize/{name}', fig.to_json, repeat)
+        recorder.results[-1]['bytes'] = len(payload)
+
+
+# Wall time and peak traced heap of one call
+
+def traced(build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        build()
+        return time.perf_counter() - started, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# The same questions answered from Parquet partitions, without a memo so
+# every stage scans them
+
+def benchmark_out_of_core(path, recorder, repeat, rows_per_partition=PARTITION_ROWS):
+    fingerprint = file_fingerprint(path)
+    out_dir = recorder.time('outofcore/partition', lambda: write_partitions(
+        path, partition_dir(path), fingerprint, rows_per_partition), repeat)
+    manifest = read_manifest(out_dir)
+    engine = PartitionedAnalytics(out_dir, manifest, cache_size=0)
+    states = {'full': engine.filters.full_state(), 'price_band': price_band(engine.filters)}
+    for name, state in states.items():
+        recorder.time(f'outofcore/cube_{name}', lambda: engine.cube(state), repeat,
+                      partitions=len(manifest['partitions']))
+    recorder.time('outofcore/summary', lambda: engine.price_summary(states['price_band']), repeat)
+    recorder.time('outofcore/trendline', lambda: engine.trendline('sqft_living', 'price', states['price_band']),
+                  repeat)
+
+    def in_memory():
+        df = read_housing_csv(path)
+        filter_index = FilterIndex(df, cache_size=0)
+        CubeIndex(df).cube(filter_index.mask(price_band(filter_index)))
+
+    for stage, build in (('memory/in_memory', in_memory),
+                         ('memory/out_of_core', lambda: engine.cube(states['price_band']))):
+        seconds, peak = traced(build)
+        recorder.add(stage, [seconds], peak_bytes=peak)
+
+
+# Estimates from the synopsis, without a memo. (The whole dataset is
+# answered from the sketches, which costs nothing to time.)
+
+def benchmark_approximate(path, recorder, repeat):
+    fingerprint = file_fingerprint(path)
+    out_dir = recorder.time('approximate/synopsis', lambda: write_synopsis(path, synopsis_dir(path), fingerprint),
+                            repeat)
+    synopsis = read_synopsis(out_dir)
+    estimates = ApproximateAnalytics(out_dir, synopsis, cache_size=0)
+    states = {'price_band': price_band(estimates.sample.filters),
+              'narrow': make_filter_state((200_000, 600_000), (1_000, 2_500), [1.0, 2.0], [0])}
+    for name, state in states.items():
+        recorder.time(f'approximate/cube_{name}', lambda: estimates.cube(state), repeat,
+                      sample_rows=synopsis['sample_rows'])
+    recorder.time('approximate/trendline',
+                  lambda: estimates.trendline('sqft_living', 'price', states['price_band']), repeat)
+
+
+# Headless runs of the Dashboard page on the dataset at path: a cold start
+# (empty Streamlit caches), then a first visit of every tab, then a rerun
+
+def benchmark_page(path, recorder, repeat, timeout=600):
+    from streamlit.testing.v1 import AppTest
+
+    runs = {}
+    for _ in range(repeat):
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        get_resource_cache().clear()
+        app = AppTest.from_file(PAGE_PATH, default_timeout=timeout)
+        app.session_state['dataset_path'] = path
+        # Time the live page, not a pre-rendered snapshot of it
+        app.session_state[LIVE_KEY] = True
+        stages = [('page/cold', None)] + [(f'page/tab/{section}', section) for section in PAGE_SECTIONS] \
+            + [('page/rerun', None)]
+        for stage, section in stages:
+            if section is not None:
+                app.session_state['dashboard_section'] = section
+            started = time.perf_counter()
+            app.run()
+            runs.setdefault(stage, []).append(time.perf_counter() - started)
+            if app.exception:
+                raise RuntimeError(f'{stage} raised: {app.exception[0].value}')
+    for stage, seconds in runs.items():
+        recorder.add(stage, seconds)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'python': platform.python_version(), 'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(), 'cpus': os.cpu_count(),
+        'numpy': np.__version__, 'pandas': pd.__version__, 'plotly': plotly.__version__,
+        'streamlit': st.__version__, 'commit': git_commit(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3, page_max_rows=1_000_000, source_path=DATA_PATH,
+                   rows_per_partition=PARTITION_ROWS, log=print):
+    results = []
+    for n_rows in sizes:
+        started = time.perf_counter()
+        path = synthetic_dataset(n_rows, source_path=source_path)
+        log(f'{n_rows:,} rows: dataset ready in {time.perf_counter() - started:.1f}s ({path})')
+        recorder = Recorder(n_rows, log)
+        benchmark_library(path, recorder, repeat)
+        benchmark_out_of_core(path, recorder, repeat, rows_per_partition)
+        benchmark_approximate(path, recorder, repeat)
+        if n_rows <= page_max_rows:
+            benchmark_page(path, recorder, repeat)
+        results.extend(recorder.results)
+    return {'version': REPORT_VERSION, 'environment': environment(), 'repeat': repeat, 'results': results}
+
+
+# Stages whose median is more than tolerance slower than in the baseline
+
+def compare(report, baseline, tolerance=0.25):
+    before = {(r['rows'], r['stage']): r['median'] for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = before.get((result['rows'], result['stage']))
+        if old is None or max(old, result['median']) < MIN_COMPARABLE_SECONDS:
+            continue
+        ratio = result['median'] / max(old, 1e-9)
+        result['baseline'] = old
+        result['ratio'] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def write_json(path, payload):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    write_atomic(path, json.dumps(payload, indent=1))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the Dashboard on synthetic datasets of several sizes.')
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help='comma-separated row counts')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage; the median is reported')
+    parser.add_argument('--page-max-rows', type=int, default=1_000_000,
+                        help='largest dataset the page itself is run on')
+    parser.add_argument('--partition-rows', type=int, default=PARTITION_ROWS,
+                        help='rows per Parquet partition of the out-of-core stages')
+    parser.add_argument('--data', default=DATA_PATH, help='dataset the synthetic rows are drawn from')
+    parser.add_argument('--out', default=os.path.join(BENCHMARK_DIR, 'results.json'))
+    parser.add_argument('--baseline', default=os.path.join(BENCHMARK_DIR, 'baseline.json'))
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown against the baseline (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='also store these results as the baseline')
+    args = parser.parse_args()
+
+    report = run_benchmarks([int(n) for n in args.sizes.split(',')], args.repeat, args.page_max_rows, args.data,
+                            args.partition_rows)
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare(report, baseline, args.tolerance)
+        report['baseline'] = {'path': args.baseline, 'environment': baseline.get('environment'),
+                              'tolerance': args.tolerance, 'regressions': len(regressions)}
+    write_json(args.out, report)
+    print('Wrote', args.out)
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print('Wrote', args.baseline)
+    for result in regressions:
+        print(f"Slower: {result['rows']:,} rows {result['stage']}: {result['median'] * 1000:.1f} ms, "
+              f"baseline {result['baseline'] * 1000:.1f} ms ({result['ratio']:.2f}x)")
+    sys.exit(1 if regressions else 0)
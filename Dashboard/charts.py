@@ -0,0 +1,226 @@
+# Figure builders that keep the browser payload small on large frames.
+# Scatter plots switch from SVG points to WebGL points, and then to a
+# server-side density raster, as the row count grows. Box and violin plots
+# are drawn from precomputed quantiles and KDE curves rather than raw rows.
+#
+# Compare the scatter modes with:
+#     python charts.py [rows ...]
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from profiling import record_figure
+
+SCATTER_MODES = ('auto', 'svg', 'webgl', 'density')
+
+# Row counts above which 'auto' moves to the next scatter mode
+
+WEBGL_THRESHOLD = 2_000
+DENSITY_THRESHOLD = 50_000
+
+# Raster size (bins per axis) for density mode
+
+DENSITY_BINS = 150
+
+# Grid points per KDE curve in the violin summaries
+
+KDE_POINTS = 256
+
+
+# Built figures, memoized per chart and key (dataset fingerprint, filter state
+# and any display options). Figures are shared between sessions, so they
+# must not be modified after they are returned.
+
+@st.cache_resource(show_spinner=False, max_entries=512)
+def _cached_figure(chart, key, _build):
+    return _build()
+
+
+def cached_figure(chart, key, _build):
+    fig = _cached_figure(chart, key, _build)
+    record_figure(fig)
+    return fig
+
+
+def resolve_scatter_mode(n_rows, mode='auto'):
+    if mode != 'auto':
+        return mode
+    if n_rows > DENSITY_THRESHOLD:
+        return 'density'
+    if n_rows > WEBGL_THRESHOLD:
+        return 'webgl'
+    return 'svg'
+
+
+# Datashader-style raster: count points per cell on the server and send only
+# the grid. Counts are log-scaled so sparse outliers stay visible.
+
+def density_figure(df, x, y, title=None, labels=None, bins=DENSITY_BINS):
+    labels = labels or {}
+    counts, x_edges, y_edges = np.histogram2d(df[x].to_numpy(dtype=float),
+                                              df[y].to_numpy(dtype=float), bins=bins)
+    counts = counts.T.astype(np.uint32)
+    z = np.log1p(counts).astype(np.float32)
+    z[counts == 0] = np.nan
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        customdata=counts,
+        hovertemplate='%{x:,.0f}, %{y:,.0f}<br>%{customdata:,.0f} properties<extra></extra>',
+        colorscale='Viridis',
+        colorbar=dict(title='log(1 + count)'),
+    ))
+    fig.update_layout(title=title, xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y))
+    return fig
+
+
+def scatter_figure(df, x, y, mode='auto', **kwargs):
+    mode = resolve_scatter_mode(len(df), mode)
+    if mode == 'density':
+        return density_figure(df, x, y, title=kwargs.get('title'), labels=kwargs.get('labels'))
+    return px.scatter(df, x=x, y=y, render_mode=mode, **kwargs)
+
+
+# Box plot drawn from summary statistics (no outlier points), laid out like
+# aggregations.PriceCube.stats(group)
+
+def box_figure(stats, group, value, title=None, labels=None, colors=None):
+    labels = labels or {}
+    colors = colors or px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for i, row in enumerate(stats.reset_index().itertuples(index=False)):
+        name = str(getattr(row, group))
+        fig.add_trace(go.Box(
+            name=name, x=[name], q1=[row.q25], median=[row.median], q3=[row.q75],
+            mean=[row.mean], lowerfence=[row.lowerfence], upperfence=[row.upperfence],
+            marker_color=colors[i % len(colors)], boxpoints=False,
+        ))
+    fig.update_layout(title=title, xaxis_title=labels.get(group, group),
+                      yaxis_title=labels.get(value, value), legend_title=labels.get(group, group))
+    return fig
+
+
+# Histogram from precomputed bins (see aggregations.PriceCube.histogram)
+
+def histogram_figure(histogram, title=None, labels=None, color_discrete_sequence=None):
+    labels = labels or {}
+    color = (color_discrete_sequence or px.colors.qualitative.Plotly)[0]
+    fig = go.Figure(go.Bar(
+        x=(histogram['low'] + histogram['high']) / 2, y=histogram['count'],
+        width=histogram['high'] - histogram['low'], marker_color=color,
+        customdata=histogram[['low', 'high']],
+        hovertemplate='%{customdata[0]:,.0f} – %{customdata[1]:,.0f}<br>count = %{y:,}<extra></extra>',
+    ))
+    fig.update_layout(title=title, xaxis_title=labels.get('price', 'price'),
+                      yaxis_title='count', bargap=0)
+    return fig
+
+
+# Error bars from the f'{stat}_low' and f'{stat}_high' columns of estimated
+# statistics (see approximate.py), matched to every trace's x values.
+# Figures of exact statistics are returned unchanged.
+
+def add_confidence_intervals(fig, stats, stat):
+    if f'{stat}_low' not in stats.columns:
+        return fig
+    for trace in fig.data:
+        rows = stats.loc[list(trace.x)]
+        y = np.asarray(trace.y, dtype=float)
+        trace.error_y = dict(type='data', symmetric=False, array=rows[f'{stat}_high'].to_numpy() - y,
+                             arrayminus=y - rows[f'{stat}_low'].to_numpy(), thickness=1)
+    return fig
+
+
+# Gaussian KDE via linear binning and a convolution, so the cost is
+# O(rows + grid) rather than O(rows * grid). Bandwidth follows Scott's rule.
+
+def binned_kde(values, points=KDE_POINTS):
+    values = np.asarray(values, dtype=float)
+    low, high = values.min(), values.max()
+    if len(values) < 2 or low == high:
+        return np.array([low]), np.array([1.0])
+    bandwidth = 1.06 * values.std() * len(values) ** -0.2
+    pad = 3 * bandwidth
+    grid = np.linspace(low - pad, high + pad, points)
+    step = grid[1] - grid[0]
+
+    position = (values - grid[0]) / step
+    left = np.floor(position).astype(int)
+    weight = position - left
+    counts = np.bincount(left, weights=1 - weight, minlength=points + 1)
+    counts += np.bincount(left + 1, weights=weight, minlength=points + 1)
+    counts = counts[:points]
+
+    radius = int(np.ceil(4 * bandwidth / step))
+    offsets = np.arange(-radius, radius + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(counts, kernel, mode='same')
+    density /= density.sum() * step
+    return grid, density
+
+
+def violin_summary(df, group, value):
+    curves = {}
+    for key, values in df.groupby(group, observed=True)[value]:
+        grid, density = binned_kde(values.to_numpy())
+        curves[key] = (grid, density, float(values.median()), len(values))
+    return curves
+
+
+# Violins drawn as mirrored KDE outlines; only the curves are sent
+
+def violin_figure(df, group, value, title=None, labels=None, colors=None):
+    labels = labels or {}
+    colors = colors or px.colors.qualitative.Plotly
+    curves = violin_summary(df, group, value)
+    fig = go.Figure()
+    for i, (key, (grid, density, median, count)) in enumerate(curves.items()):
+        half_width = 0.4 * density / density.max()
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([i - half_width, (i + half_width)[::-1]]),
+            y=np.concatenate([grid, grid[::-1]]),
+            fill='toself', mode='lines', line_color=color, name=str(key),
+            hoverinfo='name', legendgroup=str(key),
+        ))
+        fig.add_trace(go.Scatter(
+            x=[i - 0.1, i + 0.1], y=[median, median], mode='lines',
+            line=dict(color='white', width=3), legendgroup=str(key), showlegend=False,
+            hovertemplate=f'{key}: median %{{y:,.0f}} ({count:,} properties)<extra></extra>',
+        ))
+    fig.update_layout(
+        title=title, legend_title=labels.get(group, group),
+        xaxis=dict(title=labels.get(group, group), tickvals=list(range(len(curves))),
+                   ticktext=[str(key) for key in curves]),
+        yaxis_title=labels.get(value, value),
+    )
+    return fig
+
+
+# Build + serialize time and payload size for each scatter mode
+
+def benchmark_scatter_modes(df, x='sqft_living', y='price', sizes=(1_000, 20_000, 200_000)):
+    results = []
+    for n_rows in sizes:
+        sample = df.sample(n_rows, replace=n_rows > len(df), random_state=0)
+        for mode in SCATTER_MODES[1:]:
+            start = time.perf_counter()
+            payload = scatter_figure(sample, x, y, mode=mode).to_json()
+            results.append(dict(rows=n_rows, mode=mode,
+                                seconds=round(time.perf_counter() - start, 4),
+                                payload_bytes=len(payload)))
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    from housing_data import read_housing_csv
+
+    sizes = tuple(int(arg) for arg in sys.argv[1:]) or (1_000, 20_000, 200_000)
+    print(benchmark_scatter_modes(read_housing_csv(), sizes=sizes).to_string(index=False))
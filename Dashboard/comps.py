@@ -0,0 +1,206 @@
+# Comparable sales ("comps"): the k sold homes most similar to a subject
+# property. Similarity is the weighted Euclidean distance over standardized
+# features: location (lat/long converted to km, so both axes share one
+# scale), living area, bedrooms, bathrooms, grade and year built.
+# The feature matrix is built once per dataset version and indexed with a
+# KD-tree when scipy is available; otherwise queries use vectorized brute
+# force in blocks. Both answer a batch of subjects in one call.
+
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from housing_data import DATA_PATH, file_fingerprint, load_housing
+from resources import dataset_resource
+
+COMP_FEATURES = ('lat', 'long', 'sqft_living', 'bedrooms', 'bathrooms', 'grade', 'yr_built')
+
+# Relative importance of each part of the distance; lat and long together
+# count as 'location'
+
+FEATURE_WEIGHTS = {'location': 2.0, 'sqft_living': 1.5, 'bedrooms': 0.5, 'bathrooms': 0.5,
+                   'grade': 1.0, 'yr_built': 0.5}
+
+DEFAULT_K = 20
+
+# Brute force distances are computed for at most this many (query, sale)
+# pairs at a time
+
+BLOCK_PAIRS = 1 << 24
+
+KM_PER_DEGREE = 111.195
+
+
+class CompsIndex:
+
+    def __init__(self, df, weights=None):
+        weights = dict(FEATURE_WEIGHTS, **(weights or {}))
+        features = df[list(COMP_FEATURES)].to_numpy(dtype=np.float64)
+        self.n_rows = len(features)
+
+        # Affine map from raw features to the search space
+        self._center = np.nanmean(features, axis=0)
+        self._scale = np.ones(len(COMP_FEATURES))
+        km_per_long = KM_PER_DEGREE * math.cos(math.radians(self._center[0]))
+        location_km = np.array([KM_PER_DEGREE, km_per_long])
+        location_std = max(np.nanstd(features[:, :2] * location_km, axis=0).max(), 1e-9)
+        self._scale[:2] = location_km / location_std * weights['location']
+        for i, col in enumerate(COMP_FEATURES[2:], start=2):
+            self._scale[i] = weights[col] / max(np.nanstd(features[:, i]), 1e-9)
+
+        self._matrix = self._transform(features)
+        self._norms = np.einsum('ij,ij->i', self._matrix, self._matrix)
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            self._tree = None
+        else:
+            self._tree = cKDTree(self._matrix)
+
+    def _transform(self, features):
+        return np.nan_to_num((np.asarray(features, dtype=np.float64) - self._center) * self._scale)
+
+    def _brute_force(self, queries, k):
+        distances = np.empty((len(queries), k))
+        rows = np.empty((len(queries), k), dtype=np.intp)
+        block = max(1, BLOCK_PAIRS // max(self.n_rows, 1))
+        for start in range(0, len(queries), block):
+            q = queries[start:start + block]
+            squared = (np.einsum('ij,ij->i', q, q)[:, None] - 2 * q @ self._matrix.T + self._norms)
+            nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(squared, nearest, axis=1), axis=1)
+            nearest = np.take_along_axis(nearest, order, axis=1)
+            rows[start:start + block] = nearest
+            distances[start:start + block] = np.sqrt(np.maximum(
+                np.take_along_axis(squared, nearest, axis=1), 0))
+        return distances, rows
+
+    # Distances and row numbers (nearest first) of the k comps of every
+    # subject. subjects is a frame with the COMP_FEATURES columns; rows listed
+    # in exclude (e.g. the subjects' own sales) are never returned.
+
+    def query(self, subjects, k=DEFAULT_K, exclude=None):
+        queries = self._transform(subjects[list(COMP_FEATURES)].to_numpy(dtype=np.float64))
+        k = min(k, self.n_rows)
+        extra = 0 if exclude is None else 1
+        search_k = min(k + extra, self.n_rows)
+        if self._tree is not None:
+            distances, rows = self._tree.query(queries, k=search_k, workers=-1)
+            distances, rows = distances.reshape(len(queries), -1), rows.reshape(len(queries), -1)
+        else:
+            distances, rows = self._brute_force(queries, search_k)
+        if exclude is None:
+            return distances[:, :k], rows[:, :k]
+
+        # Drop each subject's own row, or else the farthest extra neighbour
+        keep = rows != np.asarray(exclude)[:, None]
+        keep[keep.sum(axis=1) > k, -1] = False
+        return (distances[keep].reshape(len(queries), -1)[:, :k],
+                rows[keep].reshape(len(queries), -1)[:, :k])
+
+    # The comps of a single subject as rows of df, with their distance
+
+    def comps(self, df, subject, k=DEFAULT_K, exclude_row=None):
+        exclude = None if exclude_row is None else [exclude_row]
+        distances, rows = self.query(pd.DataFrame([subject]), k, exclude)
+        result = df.iloc[rows[0]].copy()
+        result.insert(0, 'distance', distances[0].round(3))
+        return result
+
+
+# Median comp price and price per sqft for many subjects at once
+
+def batch_comps(index, df, subjects, k=DEFAULT_K):
+    distances, rows = index.query(subjects, k)
+    prices = df['price'].to_numpy(dtype=np.float64)[rows]
+    per_sqft = prices / df['sqft_living'].to_numpy(dtype=np.float64)[rows]
+    result = subjects.copy()
+    result['comp_median_price'] = np.median(prices, axis=1)
+    result['comp_median_price_per_sqft'] = np.median(per_sqft, axis=1)
+    result['estimated_price'] = result['comp_median_price_per_sqft'] * subjects['sqft_living']
+    result['mean_comp_distance'] = distances.mean(axis=1)
+    return result
+
+
+# Shared by every session; rebuilt when the dataset fingerprint changes
+
+@dataset_resource('comps_index')
+def _comps_index(path, fingerprint):
+    return CompsIndex(load_housing(path, columns=list(COMP_FEATURES)))
+
+
+def get_comps_index(path=DATA_PATH):
+    return _comps_index(path, file_fingerprint(path))
+
+
+# Comps search widgets: a subject from the dataset (by id) or described by
+# hand, plus a CSV of subjects for batch appraisal
+
+def comps_section(df, index, key='comps'):
+    st.markdown("<h1 style='font-size:40px; text-align: center'>Comparable Sales</h1>", unsafe_allow_html=True)
+
+    source = st.radio('Subject property', ['A sale in the dataset', 'Describe a property'],
+                      horizontal=True, key=f'{key}_source')
+    k = st.slider('Number of comps', min_value=5, max_value=50, value=DEFAULT_K, key=f'{key}_k')
+
+    exclude_row = None
+    if source == 'A sale in the dataset':
+        sale_id = st.number_input('Sale id', value=int(df['id'].iloc[0]), step=1, key=f'{key}_id')
+        matches = np.flatnonzero(df['id'].to_numpy() == sale_id)
+        if not len(matches):
+            st.warning(f'No sale with id {sale_id}.')
+            return
+        exclude_row = int(matches[0])
+        subject = df.iloc[exclude_row][list(COMP_FEATURES)].astype(float).to_dict()
+    else:
+        medians = df[list(COMP_FEATURES)].median()
+        left, middle, right = st.columns(3)
+        subject = {
+            'lat': left.number_input('Latitude', value=float(medians['lat']), format='%.4f', key=f'{key}_lat'),
+            'long': left.number_input('Longitude', value=float(medians['long']), format='%.4f', key=f'{key}_long'),
+            'sqft_living': middle.number_input('Sqft living', value=int(medians['sqft_living']), step=50, key=f'{key}_sqft'),
+            'bedrooms': middle.number_input('Bedrooms', value=int(medians['bedrooms']), step=1, key=f'{key}_bedrooms'),
+            'bathrooms': middle.number_input('Bathrooms', value=float(medians['bathrooms']), step=0.25, key=f'{key}_bathrooms'),
+            'grade': right.number_input('Grade', value=int(medians['grade']), step=1, key=f'{key}_grade'),
+            'yr_built': right.number_input('Year built', value=int(medians['yr_built']), step=1, key=f'{key}_yr_built'),
+        }
+
+    comps = index.comps(df, subject, k, exclude_row)
+    median_price = comps['price'].median()
+    per_sqft = (comps['price'] / comps['sqft_living']).median()
+    price, sqft_price, estimate = st.columns(3)
+    price.metric('Median Comp Price', f'{median_price:,.0f}')
+    sqft_price.metric('Median Price per Sqft', f'{per_sqft:,.0f}')
+    estimate.metric('Estimate for Subject', f"{per_sqft * subject['sqft_living']:,.0f}")
+    st.dataframe(comps)
+
+    with st.expander('Appraise many properties at once'):
+        st.markdown(f"Upload a CSV with the columns {', '.join(COMP_FEATURES)}; each row gets the median price of its {k} comps.")
+        uploaded = st.file_uploader('Subject properties', type=['csv'], key=f'{key}_batch')
+        if uploaded is not None:
+            try:
+                subjects = pd.read_csv(uploaded)
+            except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as exc:
+                st.error(f'Could not read {uploaded.name}: {exc}')
+                return
+            missing = [col for col in COMP_FEATURES if col not in subjects.columns]
+            if missing:
+                st.error(f"Missing columns: {', '.join(missing)}")
+                return
+            # Blank or non-numeric features can't be standardized or searched;
+            # those rows are reported and left out
+            for col in COMP_FEATURES:
+                subjects[col] = pd.to_numeric(subjects[col], errors='coerce')
+            valid = np.isfinite(subjects[list(COMP_FEATURES)].to_numpy(dtype=np.float64)).all(axis=1)
+            if not valid.all():
+                rows = ', '.join(str(row + 2) for row in np.flatnonzero(~valid)[:10])
+                st.error(f'{np.count_nonzero(~valid):,} rows have a blank or non-numeric '
+                         f"{', '.join(COMP_FEATURES)} value and were skipped (CSV lines {rows}"
+                         f"{', ...' if np.count_nonzero(~valid) > 10 else ''}).")
+            if valid.any():
+                result = batch_comps(index, df, subjects.loc[valid].reset_index(drop=True), k)
+                st.dataframe(result)
+                st.download_button('Download results', result.to_csv(index=False), 'comps.csv', 'text/csv',
+                                   key=f'{key}_download')
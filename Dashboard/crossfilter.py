@@ -0,0 +1,126 @@
+# Cross-filtering between the Dashboard's charts: clicking (or box-selecting)
+# bars of a selectable chart, or cells of a crosstab heatmap, filters every
+# other chart on the page. A chart never filters itself, so its other bars stay
+# visible and can be added to the selection.
+#
+# Selections live in st.session_state[SELECTIONS_KEY] as {key: values}, where
+# key is a dimension or a crosstab pair (see analytics.make_selection). They
+# are updated by the charts' on_select callbacks rather than read back from
+# the chart widgets: Streamlit gives a chart a new widget (and drops its
+# selection) whenever the figure changes, which happens to every chart when
+# another chart's selection narrows its rows. The selected bars or cells are
+# drawn from the stored selection instead.
+
+import functools
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from analytics import LRUCache, make_selection
+
+SELECTIONS_KEY = 'crossfilter_selections'
+
+SELECTION_MODE = ('points', 'box')
+
+# Highlighted copies of cached figures, keyed by the figure's id and the
+# selected values (copying a figure with many traces takes tens of ms)
+
+_highlighted = LRUCache(64)
+
+
+def current_selection():
+    return make_selection(st.session_state.get(SELECTIONS_KEY, {}))
+
+
+def clear_selections():
+    st.session_state[SELECTIONS_KEY] = {}
+
+
+# Selected values of the points in a chart selection event. Selectable charts
+# carry the dimension value (or the crosstab cell) in customdata.
+
+def selected_values(points, owner):
+    values = []
+    for point in points:
+        data = point.get('customdata')
+        if data is None:
+            continue
+        values.append(tuple(data[:2]) if isinstance(owner, tuple) else data[0])
+    return values
+
+
+def _on_select(owner, widget_key):
+    event = st.session_state.get(widget_key) or {}
+    points = (event.get('selection') or {}).get('points', [])
+    selected = dict(st.session_state.get(SELECTIONS_KEY, {}))
+    values = selected_values(points, owner)
+    if values:
+        selected[owner] = values
+    else:
+        selected.pop(owner, None)
+    st.session_state[SELECTIONS_KEY] = selected
+
+
+# A copy of fig with the selected points marked, leaving the cached figure as is
+
+def highlight(fig, owner, values):
+    source, copy = _highlighted.get((id(fig), owner, values), lambda: (fig, _highlight(fig, owner, values)))
+    return copy if source is fig else _highlight(fig, owner, values)
+
+
+def _highlight(fig, owner, values):
+    fig = go.Figure(fig)
+    for trace in fig.data:
+        if trace.customdata is None:
+            continue
+        keys = (tuple(row[:2]) if isinstance(owner, tuple) else row[0] for row in trace.customdata)
+        trace.selectedpoints = [i for i, key in enumerate(keys) if key in values]
+    return fig
+
+
+# Draws a chart whose clicks and box selections select owner's values
+
+def selectable_chart(fig, owner, key):
+    values = dict(current_selection()).get(owner)
+    st.plotly_chart(highlight(fig, owner, values) if values else fig, key=key,
+                    on_select=functools.partial(_on_select, owner, key), selection_mode=SELECTION_MODE)
+
+
+# Invisible markers over a crosstab heatmap's cells, so cells can be clicked
+# and box-selected (heatmap traces cannot be selected themselves); they also
+# carry the cells' hover labels, and selected cells are outlined
+
+def add_cell_overlay(fig, table):
+    cells = [(row, column) for row in table.index for column in table.columns]
+    fig.add_trace(go.Scatter(
+        x=[column for _, column in cells], y=[row for row, _ in cells],
+        customdata=[[row, column, table.loc[row, column]] for row, column in cells],
+        hovertemplate=f'{table.index.name} %{{y}}, {table.columns.name} %{{x}}<br>count %{{customdata[2]:,}}<extra></extra>',
+        mode='markers', showlegend=False,
+        marker=dict(symbol='square-open', size=18, color='white', line_width=2, opacity=0),
+        selected=dict(marker=dict(opacity=1)), unselected=dict(marker=dict(opacity=0)),
+    ))
+    return fig
+
+
+def describe_selection(selection):
+    parts = []
+    for key, values in selection:
+        name = ' × '.join(key) if isinstance(key, tuple) else key
+        shown = ', '.join(str(value) for value in values[:6]) + (', …' if len(values) > 6 else '')
+        parts.append(f'{name}: {shown}')
+    return '; '.join(parts)
+
+
+# Active selections and a button clearing them. Returns False (after saying
+# so) when the selections leave no rows, so the caller can skip its charts.
+
+def selection_bar(selection, n_rows, key):
+    if not selection:
+        return True
+    caption_col, button_col = st.columns([4, 1])
+    caption_col.caption(f'Chart selections ({n_rows:,} properties): {describe_selection(selection)}')
+    button_col.button('Clear selections', key=f'{key}_clear_selections', on_click=clear_selections)
+    if not n_rows:
+        st.warning('No properties match the chart selections.')
+    return n_rows > 0
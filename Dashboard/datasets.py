@@ -0,0 +1,201 @@
+# Registry of the regional datasets the pages can switch between and
+# compare. Every region is a file with the Housing.csv schema (CSV, or a
+# Feather file as written by uploads.py):
+#     King County        the bundled Housing.csv
+#     datasets/*.csv     one region per file, named after it
+#                        (datasets/pierce_county.csv is "Pierce County"),
+#                        or *.feather files that are not a CSV's sidecar
+#     datasets.json      {"Region name": "path/to/extract.csv", ...}, paths
+#                        relative to the JSON file; DASHBOARD_DATASETS points
+#                        at another registry file
+# Regions are loaded lazily: a region's frame and indexes are only built when
+# a page first uses it, and they live in the shared resource cache, whose
+# memory budget evicts the least recently used ones (see resources.py).
+#
+# Register an extract from the command line with:
+#     python datasets.py "Pierce County" regions/pierce.csv
+
+import json
+import os
+import sys
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from analytics import get_analytics
+from charts import cached_figure
+from crossfilter import clear_selections
+from filters import apply_filters
+from housing_data import DATA_PATH, file_fingerprint, sidecar_path, write_atomic
+from uploads import active_dataset_path, use_dataset
+
+REGISTRY_PATH = os.environ.get('DASHBOARD_DATASETS', 'datasets.json')
+DATASET_DIR = 'datasets'
+DATASET_SUFFIXES = ('.csv', '.feather')
+DEFAULT_REGION = 'King County'
+
+# Regions compared side by side at most
+
+MAX_COMPARED = 4
+
+
+def _region_name(filename):
+    return os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ').title()
+
+
+# A registry that can't be read is skipped with a warning, so one bad file
+# doesn't take down every page that lists regions
+
+def _read_registry(registry_path):
+    if not os.path.exists(registry_path):
+        return {}
+    try:
+        with open(registry_path, encoding='utf-8') as handle:
+            entries = json.load(handle)
+        if not isinstance(entries, dict):
+            raise ValueError('expected {"Region name": "path", ...}')
+        base = os.path.dirname(registry_path)
+        return {name: os.path.normpath(os.path.join(base, path)) for name, path in entries.items()}
+    except (OSError, ValueError, TypeError) as exc:
+        st.warning(f'Ignoring the region registry {registry_path}: {exc}')
+        return {}
+
+
+# {region name: path} of every region whose file exists, the bundled
+# dataset first
+
+def registered_datasets(registry_path=REGISTRY_PATH, dataset_dir=DATASET_DIR):
+    datasets = {DEFAULT_REGION: DATA_PATH}
+    if os.path.isdir(dataset_dir):
+        paths = [os.path.join(dataset_dir, filename) for filename in sorted(os.listdir(dataset_dir))
+                 if filename.lower().endswith(DATASET_SUFFIXES)]
+        # A CSV's Feather sidecar is the same region
+        sidecars = {sidecar_path(path) for path in paths if path.lower().endswith('.csv')}
+        for path in paths:
+            if path not in sidecars:
+                datasets[_region_name(os.path.basename(path))] = path
+    datasets.update(_read_registry(registry_path))
+    return {name: path for name, path in datasets.items() if os.path.exists(path)}
+
+
+def register_dataset(name, path, registry_path=REGISTRY_PATH):
+    if not path.lower().endswith(DATASET_SUFFIXES):
+        raise ValueError(f'{path} is not a CSV or Feather file')
+    entries = {}
+    if os.path.exists(registry_path):
+        with open(registry_path, encoding='utf-8') as handle:
+            entries = json.load(handle)
+    entries[name] = os.path.relpath(path, os.path.dirname(os.path.abspath(registry_path)))
+    write_atomic(registry_path, json.dumps(entries, indent=1))
+    return entries
+
+
+def region_of(path, datasets):
+    for name, region_path in datasets.items():
+        if os.path.normpath(region_path) == os.path.normpath(path):
+            return name
+    return 'Uploaded dataset'
+
+
+# Sidebar picker switching every page to another region; returns the path
+# of the dataset in use. The widget follows the session's dataset, so an
+# upload made on the Home page shows up here as well.
+
+def region_picker(datasets=None):
+    datasets = registered_datasets() if datasets is None else datasets
+    current = active_dataset_path()
+    current_name = region_of(current, datasets)
+    options = list(datasets) + ([current_name] if current_name not in datasets else [])
+    if len(options) < 2:
+        return current
+
+    # Chart selections name the old region's zipcodes and grades, so they go too
+    def switch():
+        if st.session_state['region'] in datasets:
+            use_dataset(datasets[st.session_state['region']])
+            clear_selections()
+
+    st.session_state['region'] = current_name
+    st.sidebar.selectbox('Region', options, key='region', on_change=switch)
+    return current
+
+
+# Headline numbers of one region under the sidebar filters
+
+def region_summary(name, engine, state):
+    summary = engine.price_summary(state)
+    return {'Region': name, 'Properties': summary['count'], 'Of': engine.n_rows,
+            'Median price': summary['median'], 'Mean price': summary['mean'],
+            'Median price per sqft': summary['median_price_per_sqft']}
+
+
+# Several regions side by side. With a filter state, the sidebar filters
+# apply to every region; without one, each region is shown whole.
+
+def comparison_section(narrowed=None, key='compare'):
+    datasets = registered_datasets()
+    st.markdown("<h1 style='font-size:40px; text-align: center'>Compare Regions</h1>", unsafe_allow_html=True)
+    if len(datasets) < 2:
+        st.info(f'Only {DEFAULT_REGION} is registered. Put more regional extracts with the same columns in '
+                f'{DATASET_DIR}/, or list them in {REGISTRY_PATH}, to compare them here.')
+        return
+    current = region_of(active_dataset_path(), datasets)
+    default = ([current] if current in datasets else []) + [name for name in datasets if name != current]
+    regions = st.multiselect('Regions', list(datasets), default=default[:2], max_selections=MAX_COMPARED,
+                             key=f'{key}_regions')
+    if not regions:
+        return
+    st.caption('The sidebar filters you changed apply to every region; the others cover each region\'s full '
+               'range.' if narrowed else 'Every property of each region; set the sidebar filters to compare a segment.')
+
+    engines = {name: get_analytics(datasets[name]) for name in regions}
+    states = {name: apply_filters(engine.filters.full_state(), narrowed or {}) for name, engine in engines.items()}
+    figure_key = tuple((name, engine.fingerprint, states[name]) for name, engine in engines.items())
+
+    summaries = [region_summary(name, engine, states[name]) for name, engine in engines.items()]
+    for column, summary in zip(st.columns(len(regions)), summaries):
+        column.metric(summary['Region'], f"${summary['Median price']:,.0f}" if summary['Properties'] else '–',
+                      help=f"Median price of {summary['Properties']:,} of {summary['Of']:,} properties")
+    st.dataframe(pd.DataFrame(summaries), hide_index=True, column_config={
+        'Median price': st.column_config.NumberColumn(format='$%.0f'),
+        'Mean price': st.column_config.NumberColumn(format='$%.0f'),
+        'Median price per sqft': st.column_config.NumberColumn(format='$%.0f'),
+    })
+
+    by_grade = pd.concat([engine.stats('grade', states[name], 'median').assign(region=name)
+                          for name, engine in engines.items()])
+    fig = cached_figure('compare_grade', figure_key, lambda: px.bar(
+        by_grade, x='grade', y='price', color='region', barmode='group', title='Median Price by Grade',
+        labels={'grade': 'Grade', 'price': 'Median Price', 'region': 'Region'}))
+    st.plotly_chart(fig)
+
+    histograms = []
+    for name, engine in engines.items():
+        histogram = engine.histogram(states[name])
+        if histogram is not None:
+            histograms.append(histogram.assign(region=name, price=(histogram['low'] + histogram['high']) / 2,
+                                               share=histogram['count'] / histogram['count'].sum()))
+    if histograms:
+        fig = cached_figure('compare_histogram', figure_key, lambda: px.line(
+            pd.concat(histograms), x='price', y='share', color='region', line_shape='hvh',
+            title='Price Distribution', labels={'price': 'Price', 'share': 'Share of Properties',
+                                                'region': 'Region'}))
+        st.plotly_chart(fig)
+
+    by_bedrooms = pd.concat([engine.stats('bedrooms', states[name], 'median').assign(region=name)
+                             for name, engine in engines.items()])
+    fig = cached_figure('compare_bedrooms', figure_key, lambda: px.line(
+        by_bedrooms, x='bedrooms', y='price', color='region', markers=True, title='Median Price by Bedrooms',
+        labels={'bedrooms': 'Bedrooms', 'price': 'Median Price', 'region': 'Region'}))
+    st.plotly_chart(fig)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python datasets.py "Region name" path/to/extract.csv')
+    name, path = sys.argv[1], sys.argv[2]
+    if not os.path.exists(path):
+        sys.exit(f'{path} does not exist')
+    register_dataset(name, path)
+    print(f'Registered {name}: {path} ({file_fingerprint(path)[:12]})')
@@ -0,0 +1,196 @@
+# Filter engine for the sidebar filters on the Dashboard page.
+# A FilterIndex is built once per dataset version: the range columns are
+# pre-sorted (so a slider range becomes two binary searches and a slice of
+# row ids) and every value of a categorical column gets its own boolean
+# bitmap. The resulting row mask
+# is memoized per filter state, so reruns that don't touch the sidebar (or
+# that come back to an earlier selection) reuse it.
+
+import collections
+import threading
+
+import numpy as np
+import pandas as pd
+
+from housing_data import DATA_PATH, file_fingerprint, load_housing
+from resources import dataset_resource
+
+RANGE_COLUMNS = ('price', 'sqft_living')
+CATEGORY_COLUMNS = ('floors', 'waterfront')
+
+# When the narrowest range keeps at most 1/SCATTER_FRACTION of the rows, the
+# filter works on those rows only instead of scanning whole columns
+
+SCATTER_FRACTION = 16
+
+# One hashable value per combination of sidebar widgets
+
+FilterState = collections.namedtuple('FilterState', RANGE_COLUMNS + CATEGORY_COLUMNS)
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def make_filter_state(price, sqft_living, floors, waterfront):
+    return FilterState(
+        price=tuple(price),
+        sqft_living=tuple(sqft_living),
+        floors=tuple(sorted(_scalar(v) for v in floors)),
+        waterfront=tuple(sorted(_scalar(v) for v in waterfront)),
+    )
+
+
+# What a state narrows relative to its dataset's full state: the range
+# bounds moved off the dataset's limits (None where left alone) and the
+# category values unticked. apply_filters() narrows another dataset's full
+# state the same way, so its untouched filters keep its own ranges.
+
+def narrowed_filters(state, full):
+    narrowed = {}
+    for col in RANGE_COLUMNS:
+        bounds = tuple(None if value == limit else value for value, limit in zip(getattr(state, col), getattr(full, col)))
+        if bounds != (None, None):
+            narrowed[col] = bounds
+    for col in CATEGORY_COLUMNS:
+        excluded = tuple(value for value in getattr(full, col) if value not in getattr(state, col))
+        if excluded:
+            narrowed[col] = excluded
+    return narrowed
+
+
+def apply_filters(full, narrowed):
+    values = full._asdict()
+    for col, change in narrowed.items():
+        if col in RANGE_COLUMNS:
+            values[col] = tuple(limit if bound is None else bound for bound, limit in zip(change, values[col]))
+        else:
+            values[col] = [value for value in values[col] if value not in change]
+    return make_filter_state(**values)
+
+
+class FilterIndex:
+
+    def __init__(self, df, cache_size=64):
+        self.n_rows = len(df)
+
+        # Sorted values plus the row order that produced them, per range column
+        self._values = {}
+        self._sorted = {}
+        for col in RANGE_COLUMNS:
+            values = df[col].to_numpy()
+            order = np.argsort(values, kind='stable')
+            self._values[col] = values
+            self._sorted[col] = (values[order], order)
+
+        # One bitmap per distinct value, per categorical column
+        self._bitmaps = {}
+        for col in CATEGORY_COLUMNS:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            self._bitmaps[col] = {
+                _scalar(value): codes == code for code, value in enumerate(uniques.tolist())}
+
+        self._cache = collections.OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def bounds(self, col):
+        values = self._sorted[col][0]
+        return values[0], values[-1]
+
+    def categories(self, col):
+        return list(self._bitmaps[col])
+
+    def full_state(self):
+        return make_filter_state(
+            price=self.bounds('price'),
+            sqft_living=self.bounds('sqft_living'),
+            floors=self.categories('floors'),
+            waterfront=self.categories('waterfront'),
+        )
+
+    def _range_slice(self, col, low, high):
+        values = self._sorted[col][0]
+        # Search with keys of the column's own dtype; a Python int or float
+        # key would make numpy cast the whole sorted column first.
+        if np.issubdtype(values.dtype, np.integer):
+            info = np.iinfo(values.dtype)
+            low = np.clip(np.ceil(low), info.min, info.max)
+            high = np.clip(np.floor(high), info.min, info.max)
+        low, high = values.dtype.type(low), values.dtype.type(high)
+        return (np.searchsorted(values, low, side='left'),
+                np.searchsorted(values, high, side='right'))
+
+    def _category_keep(self, col, selected, rows=None):
+        bitmaps = self._bitmaps[col]
+        if set(bitmaps) <= set(selected):
+            return None
+        size = self.n_rows if rows is None else len(rows)
+        keep = np.zeros(size, dtype=bool)
+        for value in selected:
+            if value in bitmaps:
+                keep |= bitmaps[value] if rows is None else bitmaps[value][rows]
+        return keep
+
+    def _evaluate(self, state):
+        slices = {col: self._range_slice(col, *getattr(state, col)) for col in RANGE_COLUMNS}
+        narrowest = min(slices, key=lambda col: slices[col][1] - slices[col][0])
+        start, stop = slices[narrowest]
+
+        if stop - start <= self.n_rows // SCATTER_FRACTION:
+            # Selective: take the candidate rows from the narrowest sorted
+            # range and check the remaining predicates on those rows only.
+            rows = self._sorted[narrowest][1][start:stop]
+            keep = np.ones(len(rows), dtype=bool)
+            for col in RANGE_COLUMNS:
+                if col != narrowest:
+                    low, high = getattr(state, col)
+                    values = self._values[col][rows]
+                    keep &= (values >= low) & (values <= high)
+            for col in CATEGORY_COLUMNS:
+                part = self._category_keep(col, getattr(state, col), rows)
+                if part is not None:
+                    keep &= part
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[rows[keep]] = True
+        else:
+            # Broad: one sequential pass per predicate that excludes anything
+            mask = np.ones(self.n_rows, dtype=bool)
+            for col in RANGE_COLUMNS:
+                start, stop = slices[col]
+                if start > 0 or stop < self.n_rows:
+                    low, high = getattr(state, col)
+                    values = self._values[col]
+                    mask &= (values >= low) & (values <= high)
+            for col in CATEGORY_COLUMNS:
+                part = self._category_keep(col, getattr(state, col))
+                if part is not None:
+                    mask &= part
+
+        mask.flags.writeable = False
+        return mask
+
+    # Boolean row mask for a FilterState, memoized (LRU) by the state itself
+
+    def mask(self, state):
+        with self._lock:
+            if state in self._cache:
+                self._cache.move_to_end(state)
+                return self._cache[state]
+        mask = self._evaluate(state)
+        with self._lock:
+            self._cache[state] = mask
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return mask
+
+
+# Shared by every session; rebuilt when the dataset fingerprint changes
+
+@dataset_resource('filter_index')
+def _filter_index(path, fingerprint):
+    return FilterIndex(load_housing(path))
+
+
+def get_filter_index(path=DATA_PATH):
+    return _filter_index(path, file_fingerprint(path))
@@ -0,0 +1,313 @@
+# Shared loader for the housing dataset.
+# Home.py and every page under Pages/ import load_housing() from here, so the
+# CSV is parsed once per process (not once per rerun) and re-read only when
+# the file on disk changes. All sessions share that one compact frame
+# (categorical zipcode, int8/int16 ratings and years, float32 coordinates).
+#
+# The first load also writes an uncompressed Arrow/Feather copy next to the
+# CSV (Housing.feather), tagged with the CSV's fingerprint. Later cold starts
+# memory-map that file instead of parsing text, and several worker processes
+# mapping the same file share one copy of the pages in the OS cache.
+#
+# Convert ahead of time (e.g. at deploy) with:
+#     python housing_data.py [Housing.csv]
+
+import contextlib
+import functools
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from resources import dataset_resource
+
+DATA_PATH = 'Housing.csv'
+
+# Column types, declared up front so pandas never has to infer them
+
+HOUSING_DTYPES = {
+    'id': 'int64',
+    'price': 'float64',
+    'bedrooms': 'int16',
+    'bathrooms': 'float32',
+    'sqft_living': 'int32',
+    'sqft_lot': 'int32',
+    'floors': 'float32',
+    'waterfront': 'int8',
+    'view': 'int8',
+    'condition': 'int8',
+    'grade': 'int8',
+    'sqft_above': 'int32',
+    'sqft_basement': 'int32',
+    'yr_built': 'int16',
+    'yr_renovated': 'int16',
+    'zipcode': 'category',
+    'lat': 'float32',
+    'long': 'float32',
+    'sqft_living15': 'int32',
+    'sqft_lot15': 'int32',
+}
+
+HOUSING_COLUMNS = ['id', 'date'] + [col for col in HOUSING_DTYPES if col != 'id']
+
+# Sale dates look like 20141013T000000
+
+DATE_FORMAT = '%Y%m%dT%H%M%S'
+
+# Key under which the source CSV's fingerprint is stored in the sidecar
+
+FINGERPRINT_KEY = b'source_fingerprint'
+
+
+# Content hash of a file, recomputed only when its mtime or size changes
+
+@functools.lru_cache(maxsize=32)
+def _content_hash(path, mtime_ns, size):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path=DATA_PATH):
+    stat = os.stat(path)
+    return _content_hash(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def read_housing_csv(path=DATA_PATH, columns=None):
+    usecols = None if columns is None else list(dict.fromkeys(columns))
+    dtypes = HOUSING_DTYPES if usecols is None else {
+        col: dtype for col, dtype in HOUSING_DTYPES.items() if col in usecols}
+    df = pd.read_csv(path, dtype=dtypes, usecols=usecols)
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], format=DATE_FORMAT)
+    return df
+
+
+# Schema validation for rows that don't come from the bundled CSV (live
+# feed, uploads). Returns the rows that fit the Housing schema, typed like
+# load_housing(), and the rejected rows with a 'reason' column.
+
+VALUE_RANGES = {
+    'price': (1, None),
+    'bedrooms': (0, None),
+    'bathrooms': (0, None),
+    'sqft_living': (1, None),
+    'sqft_lot': (1, None),
+    'floors': (0, None),
+    'waterfront': (0, 1),
+    'view': (0, 4),
+    'condition': (1, 5),
+    'grade': (1, 13),
+    'sqft_above': (0, None),
+    'sqft_basement': (0, None),
+    'yr_built': (1800, 2100),
+    'yr_renovated': (0, 2100),
+    'lat': (-90, 90),
+    'long': (-180, 180),
+    'sqft_living15': (0, None),
+    'sqft_lot15': (0, None),
+}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def check_columns(columns):
+    missing = [col for col in HOUSING_COLUMNS if col not in columns]
+    if missing:
+        raise SchemaError('Missing columns: ' + ', '.join(missing))
+
+
+def validate_housing_frame(raw):
+    check_columns(raw.columns)
+    raw = raw[HOUSING_COLUMNS].reset_index(drop=True)
+    reasons = pd.Series('', index=raw.index)
+
+    def reject(bad, reason):
+        reasons[bad & (reasons == '')] = reason
+
+    date = raw['date']
+    if not pd.api.types.is_datetime64_any_dtype(date):
+        date = pd.to_datetime(date.astype(str), format=DATE_FORMAT, errors='coerce')
+    reject(date.isna(), 'bad date')
+
+    zipcode = raw['zipcode'].astype(str).str.strip()
+    reject(~zipcode.str.fullmatch(r'\d{5}'), 'bad zipcode')
+
+    # Values must also fit their column's type exactly: the cast below would
+    # wrap integers around, truncate fractions and keep infinities
+    def check_type(col, values):
+        reject(values.isna(), f'non-numeric {col}')
+        reject(~np.isfinite(values.astype(float)), f'non-finite {col}')
+        dtype = np.dtype(HOUSING_DTYPES[col])
+        if np.issubdtype(dtype, np.integer):
+            reject(values % 1 != 0, f'non-integral {col}')
+            limits = np.iinfo(dtype)
+        else:
+            limits = np.finfo(dtype)
+        reject((values < limits.min) | (values > limits.max), f'{col} out of range')
+
+    numeric = {}
+    for col, (low, high) in VALUE_RANGES.items():
+        values = pd.to_numeric(raw[col], errors='coerce')
+        check_type(col, values)
+        if low is not None:
+            reject(values < low, f'{col} out of range')
+        if high is not None:
+            reject(values > high, f'{col} out of range')
+        numeric[col] = values
+    ids = pd.to_numeric(raw['id'], errors='coerce')
+    check_type('id', ids)
+
+    ok = (reasons == '').to_numpy()
+    valid = pd.DataFrame({'id': ids[ok], 'date': date[ok]})
+    for col in HOUSING_DTYPES:
+        if col == 'zipcode':
+            valid[col] = zipcode[ok]
+        elif col != 'id':
+            valid[col] = numeric[col][ok]
+    valid = valid[HOUSING_COLUMNS].astype(HOUSING_DTYPES).reset_index(drop=True)
+    rejected = raw.loc[~ok].assign(reason=reasons[~ok])
+    return valid, rejected
+
+
+# Writes readers never see half done. The block writes to a temporary file
+# (or folder) next to path, unique per call so concurrent writers don't
+# collide, which replaces path only if the block succeeds.
+
+@contextlib.contextmanager
+def atomic_path(path, suffix='.tmp', directory=False):
+    parent = os.path.dirname(path) or '.'
+    prefix = os.path.basename(path) + '.'
+    if directory:
+        tmp_path = tempfile.mkdtemp(suffix, prefix, parent)
+        os.chmod(tmp_path, 0o755)
+    else:
+        fd, tmp_path = tempfile.mkstemp(suffix, prefix, parent)
+        os.close(fd)
+        os.chmod(tmp_path, 0o644)
+    try:
+        yield tmp_path
+        if directory:
+            shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+    finally:
+        if directory:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_atomic(path, text):
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            handle.write(text)
+
+
+# Binary sidecar
+
+def sidecar_path(path=DATA_PATH):
+    return os.path.splitext(path)[0] + '.feather'
+
+
+def _sidecar_fingerprint(binary_path):
+    import pyarrow as pa
+
+    with pa.memory_map(binary_path) as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    return metadata.get(FINGERPRINT_KEY, b'').decode()
+
+
+def convert_to_binary(path=DATA_PATH, fingerprint=None):
+    import pyarrow as pa
+
+    fingerprint = fingerprint or file_fingerprint(path)
+    table = pa.Table.from_pandas(read_housing_csv(path), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[FINGERPRINT_KEY] = fingerprint.encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Written aside and swapped in, so concurrent readers never see a
+    # half-written file. No compression, so the file can be mapped.
+    binary_path = sidecar_path(path)
+    with atomic_path(binary_path) as tmp_path:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    return binary_path
+
+
+def read_housing_binary(binary_path, columns=None):
+    import pyarrow as pa
+
+    with pa.memory_map(binary_path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(list(dict.fromkeys(columns)))
+    df = table.to_pandas(split_blocks=True)
+    # Files written chunk by chunk store zipcode as plain strings
+    if 'zipcode' in df.columns and not isinstance(df['zipcode'].dtype, pd.CategoricalDtype):
+        df['zipcode'] = df['zipcode'].astype('category')
+    return df
+
+
+# Path of an up-to-date binary copy of the dataset, (re)building the sidecar
+# when missing or stale. A .feather path (e.g. a parsed upload) is used as is.
+
+def ensure_binary(path=DATA_PATH, fingerprint=None):
+    if path.endswith('.feather'):
+        return path
+    binary_path = sidecar_path(path)
+    fingerprint = fingerprint or file_fingerprint(path)
+    if (not os.path.exists(binary_path)
+            or _sidecar_fingerprint(binary_path) != fingerprint):
+        convert_to_binary(path, fingerprint)
+    return binary_path
+
+
+# Prefer the sidecar; fall back to parsing the CSV if pyarrow is unavailable
+# or the folder is read-only.
+
+def _read_fresh(path, fingerprint, columns=None):
+    if path.endswith('.feather'):
+        return read_housing_binary(path, columns)
+    try:
+        return read_housing_binary(ensure_binary(path, fingerprint), columns)
+    except (ImportError, OSError, ValueError):
+        return read_housing_csv(path, columns)
+
+
+# One frame per dataset version, shared by every session: the resource
+# cache hands out the cached object itself, where st.cache_data would
+# unpickle a copy for every caller on every rerun. The fingerprint is part of
+# the cache key, so editing or replacing the CSV invalidates it for every
+# session at once.
+
+@dataset_resource('housing')
+def _shared_housing(path, fingerprint):
+    return _read_fresh(path, fingerprint)
+
+
+# Callers get a shallow copy (or a column subset) of the shared frame. Both
+# share its column arrays, and pandas' copy-on-write copies a column only
+# when a caller writes to it, so no session can change what the others see.
+# Pages that only need a few columns should still pass them, e.g.
+# load_housing(columns=['price', 'zipcode']).
+
+def load_housing(path=DATA_PATH, columns=None):
+    df = _shared_housing(path, file_fingerprint(path))
+    if columns is None:
+        return df.copy(deep=False)
+    return df[list(dict.fromkeys(columns))]
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    print('Wrote', convert_to_binary(source))
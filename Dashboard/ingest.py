@@ -0,0 +1,303 @@
+# Live ingestion of new sales records.
+# CSV files dropped into incoming/ (next to Housing.csv) are read in chunks,
+# validated against the Housing schema and folded into running aggregates:
+# per-group count/mean/M2 (merged with Chan's parallel formulas), a mergeable
+# quantile sketch per group for medians and quartiles, and crosstab counts.
+# Nothing already ingested is re-read or re-aggregated.
+#
+# The live aggregates are the Live Sales page's own: the Dashboard page, the
+# /v1 API (api.py) and the reports (reports.py) aggregate the dataset file
+# and don't include ingested sales until they are appended to it.
+#
+# Each file is aggregated on its own and merged in only once all of it has
+# been read, so a file that fails halfway leaves the aggregates untouched.
+# Ingested files are moved to incoming/processed/ and replayed after a
+# restart; rejected rows go to incoming/rejected/<name>.rejected.csv with a
+# 'reason' column, and files that can't be read at all to incoming/rejected/.
+# A name already taken in either folder gets a numeric suffix.
+# Write files elsewhere and move them into incoming/ when complete (files
+# modified in the last SETTLE_SECONDS are left for the next poll).
+
+import collections
+import glob
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from aggregations import CROSSTABS, DIMENSIONS
+from housing_data import (DATA_PATH, SchemaError, check_columns, file_fingerprint,
+                          load_housing, validate_housing_frame)
+from sketches import QuantileSketch
+
+INCOMING_DIR = 'incoming'
+CHUNK_SIZE = 50_000
+SETTLE_SECONDS = 2
+
+
+class GroupStats:
+
+    __slots__ = ('count', 'mean', 'm2', 'sketch')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sketch = QuantileSketch()
+
+    def merge(self, count, mean, m2, values):
+        self._merge_moments(count, mean, m2)
+        self.sketch.add(values)
+
+    def merge_group(self, other):
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.sketch.merge(other.sketch)
+
+    def _merge_moments(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+
+# Readers (page fragments of any session) and the ingesting thread share
+# one LiveAggregates; every method holds its lock, so a reader never sees a
+# group or crosstab half merged
+
+class LiveAggregates:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.n_rows = 0
+        self._groups = {dim: {} for dim in DIMENSIONS}
+        self._crosstabs = {pair: collections.Counter() for pair in CROSSTABS}
+        # Bumped whenever a dimension's (or crosstab's) numbers change, so
+        # figures cached on the version are rebuilt only when needed
+        self.versions = dict.fromkeys(list(DIMENSIONS) + list(CROSSTABS), 0)
+
+    # Fold a validated chunk in; returns the number of groups touched per dimension
+
+    def update(self, chunk):
+        if chunk.empty:
+            return {}
+        with self._lock:
+            return self._update(chunk)
+
+    def _update(self, chunk):
+        touched = {}
+        prices = chunk['price'].astype(float)
+        for dim in DIMENSIONS:
+            grouped = prices.groupby(chunk[dim], observed=True, sort=False)
+            summary = grouped.agg(['count', 'mean', 'var'])
+            summary['m2'] = summary['var'].fillna(0) * (summary['count'] - 1)
+            groups = self._groups[dim]
+            for key, values in grouped:
+                row = summary.loc[key]
+                groups.setdefault(key, GroupStats()).merge(
+                    int(row['count']), row['mean'], row['m2'], values.to_numpy())
+            touched[dim] = len(summary)
+            self.versions[dim] += 1
+        for pair in CROSSTABS:
+            self._crosstabs[pair].update(chunk.groupby(list(pair), observed=True).size().to_dict())
+            self.versions[pair] += 1
+        self.n_rows += len(chunk)
+        return touched
+
+    # Fold another set of aggregates in (one file's, see LiveStore)
+
+    def merge(self, other):
+        if not other.n_rows:
+            return self
+        with self._lock:
+            self._merge(other)
+        return self
+
+    def _merge(self, other):
+        for dim, groups in other._groups.items():
+            for key, group in groups.items():
+                self._groups[dim].setdefault(key, GroupStats()).merge_group(group)
+            self.versions[dim] += 1
+        for pair, counts in other._crosstabs.items():
+            self._crosstabs[pair].update(counts)
+            self.versions[pair] += 1
+        self.n_rows += other.n_rows
+
+    # Same columns as aggregations.PriceCube.stats, quartiles from the sketches
+
+    def stats(self, dim):
+        rows = []
+        with self._lock:
+            groups = self._groups[dim]
+            keys = sorted(groups)
+            for key in keys:
+                group = groups[key]
+                q25, median, q75 = group.sketch.quantiles([0.25, 0.5, 0.75])
+                std = np.sqrt(group.m2 / (group.count - 1)) if group.count > 1 else np.nan
+                rows.append((group.count, group.mean, std, group.sketch.min, q25, median, q75,
+                             group.sketch.max))
+        return pd.DataFrame(rows, index=pd.Index(keys, name=dim),
+                            columns=['count', 'mean', 'std', 'min', 'q25', 'median', 'q75', 'max'])
+
+    def stat(self, dim, stat, name='price'):
+        return self.stats(dim)[stat].rename(name).reset_index()
+
+    def crosstab(self, rows, columns):
+        with self._lock:
+            counts = pd.Series(dict(self._crosstabs[(rows, columns)]), dtype='int64')
+        if counts.empty:
+            return pd.DataFrame()
+        counts.index.names = [rows, columns]
+        return counts.unstack(fill_value=0).sort_index().sort_index(axis=1)
+
+    # Plain JSON-able form (dates as ISO strings), and back; approximate.py
+    # keeps a whole dataset's aggregates this way
+
+    def to_dict(self):
+        with self._lock:
+            return self._to_dict()
+
+    def _to_dict(self):
+        return {
+            'n_rows': self.n_rows,
+            'groups': {dim: [[_json_key(key), group.count, group.mean, group.m2, group.sketch.to_dict()]
+                             for key, group in groups.items()] for dim, groups in self._groups.items()},
+            'crosstabs': {'|'.join(pair): [[_json_key(row), _json_key(column), count]
+                                           for (row, column), count in counts.items()]
+                          for pair, counts in self._crosstabs.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregates = cls()
+        aggregates.n_rows = data['n_rows']
+        for dim, rows in data['groups'].items():
+            for key, count, mean, m2, sketch in rows:
+                group = aggregates._groups[dim].setdefault(_from_json_key(dim, key), GroupStats())
+                group.count, group.mean, group.m2 = count, mean, m2
+                group.sketch = QuantileSketch.from_dict(sketch)
+        for name, cells in data['crosstabs'].items():
+            pair = tuple(name.split('|'))
+            aggregates._crosstabs[pair].update({(_from_json_key(pair[0], row), _from_json_key(pair[1], column)): count
+                                                for row, column, count in cells})
+        return aggregates
+
+
+def _json_key(key):
+    if isinstance(key, pd.Timestamp):
+        return key.isoformat()
+    return key.item() if isinstance(key, np.generic) else key
+
+
+def _from_json_key(dim, key):
+    return pd.Timestamp(key) if dim == 'date' else key
+
+
+class LiveStore:
+
+    def __init__(self, base_df, incoming_dir=INCOMING_DIR, path=DATA_PATH, fingerprint=''):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.incoming_dir = incoming_dir
+        self.processed_dir = os.path.join(incoming_dir, 'processed')
+        self.rejected_dir = os.path.join(incoming_dir, 'rejected')
+        self.base_rows = len(base_df)
+        self.aggregates = LiveAggregates()
+        self.aggregates.update(base_df)
+        self.history = collections.deque(maxlen=50)
+        # Files taken from the drop folder by this process (not replays)
+        self.files_processed = 0
+        self._lock = threading.Lock()
+
+        # Files ingested before a restart
+        for path in sorted(glob.glob(os.path.join(self.processed_dir, '*.csv'))):
+            self._ingest_file(path, move=False)
+
+    def _ingest_file(self, path, move=True):
+        name = os.path.basename(path)
+        accepted = rejected = 0
+        touched = {}
+        bad_rows = []
+        started = time.perf_counter()
+        scratch = LiveAggregates()
+        try:
+            for raw in pd.read_csv(path, dtype=str, chunksize=CHUNK_SIZE):
+                check_columns(raw.columns)
+                valid, bad = validate_housing_frame(raw)
+                for dim, groups in scratch.update(valid).items():
+                    touched[dim] = touched.get(dim, 0) + groups
+                accepted += len(valid)
+                rejected += len(bad)
+                if len(bad):
+                    bad_rows.append(bad)
+            error = None
+        except (SchemaError, pd.errors.ParserError, UnicodeDecodeError) as exc:
+            # Nothing of the file is kept
+            error = str(exc)
+            accepted = rejected = 0
+            touched = {}
+
+        if error is None:
+            self.aggregates.merge(scratch)
+        if not move:
+            return None
+        if error is None:
+            if bad_rows:
+                stem = os.path.splitext(name)[0]
+                pd.concat(bad_rows).to_csv(self._free_path(self.rejected_dir, stem + '.rejected.csv'), index=False)
+            target = self._free_path(self.processed_dir, name)
+        else:
+            target = self._free_path(self.rejected_dir, name)
+        os.replace(path, target)
+        self.files_processed += 1
+        result = dict(file=name, accepted=accepted, rejected=rejected, error=error,
+                      stored_as=os.path.relpath(target, self.incoming_dir), groups_touched=touched,
+                      seconds=round(time.perf_counter() - started, 3))
+        self.history.appendleft(result)
+        return result
+
+    # name in directory, or name-1, name-2... if that is taken
+
+    @staticmethod
+    def _free_path(directory, name):
+        os.makedirs(directory, exist_ok=True)
+        stem, ext = os.path.splitext(name)
+        path = os.path.join(directory, name)
+        suffix = 0
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(directory, f'{stem}-{suffix}{ext}')
+        return path
+
+    # Ingest every settled CSV in the drop folder; returns one result per file
+
+    def poll(self):
+        if not self._lock.acquire(blocking=False):
+            return []
+        try:
+            results = []
+            now = time.time()
+            for path in sorted(glob.glob(os.path.join(self.incoming_dir, '*.csv'))):
+                if now - os.path.getmtime(path) >= SETTLE_SECONDS:
+                    results.append(self._ingest_file(path))
+            return results
+        finally:
+            self._lock.release()
+
+    @property
+    def ingested_rows(self):
+        return self.aggregates.n_rows - self.base_rows
+
+
+# One store per process, seeded from the current Housing.csv
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _live_store(path, fingerprint, incoming_dir):
+    return LiveStore(load_housing(path), incoming_dir, path, fingerprint)
+
+
+def get_live_store(path=DATA_PATH, incoming_dir=INCOMING_DIR):
+    return _live_store(path, file_fingerprint(path), incoming_dir)
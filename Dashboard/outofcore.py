@@ -0,0 +1,548 @@
+# Out-of-core backend for the Dashboard's aggregations, for datasets too big
+# to hold in memory. The dataset is split once into Parquet partitions of
+# PARTITION_ROWS rows (next to it, in <name>.parts/), and every query streams
+# over them one partition at a time, folding each into mergeable partial
+# aggregates: per-group counts, means and sums of squared deviations (merged
+# with Chan's formulas), crosstab and histogram counts, and OLS sums. Memory
+# depends on the partition size and the number of groups, not on the rows.
+#
+# Medians, quartiles and box-plot fences are exact, in two passes. The first
+# counts every group's prices on a fixed grid of log-spaced buckets, which
+# tells which bucket holds each wanted rank (and which few buckets can hold
+# a Tukey fence); the second keeps only the prices in those buckets.
+#
+# PartitionedAnalytics answers the same calls as analytics.Analytics, and
+# get_analytics() picks it for datasets over DASHBOARD_OUT_OF_CORE_MB on
+# disk. Row-level views (scatter plots, tables, the time series) can't be
+# streamed, so they get a uniform sample of SAMPLE_ROWS rows, kept as a
+# Feather file with the Housing schema next to the partitions (rows_path);
+# the masks from mask() are over the sample's rows.
+#
+# Partition a dataset ahead of time (e.g. at deploy) with:
+#     python outofcore.py path/to/sales.csv [--rows-per-partition 1000000]
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregations import CROSSTABS, DIMENSIONS, HISTOGRAM_BINS, QUANTILES, STAT_COLUMNS, PriceCube
+from analytics import Analytics, CrossFilteredCube, LRUCache, get_in_memory_analytics
+from filters import CATEGORY_COLUMNS, RANGE_COLUMNS, make_filter_state
+from housing_data import DATE_FORMAT, HOUSING_COLUMNS, HOUSING_DTYPES, atomic_path, check_columns, file_fingerprint
+from regression import EMPTY_SUMS, fit_from_sums, line_sums, merge_line_sums
+from resources import dataset_resource
+
+PARTITION_ROWS = 1_000_000
+SAMPLE_ROWS = 200_000
+MANIFEST = 'manifest.json'
+SAMPLE = 'sample.feather'
+PARTITIONS_VERSION = 1
+
+# Log-spaced buckets between the smallest and largest value; with prices
+# spanning 100x, each covers about 0.5% of its value
+
+BUCKETS = 1024
+
+# Columns a partition scan reads: the sidebar filters, plus the dimensions
+# for cubes
+
+FILTER_COLUMNS = tuple(dict.fromkeys(('price',) + RANGE_COLUMNS + CATEGORY_COLUMNS))
+SCAN_COLUMNS = FILTER_COLUMNS + tuple(dim for dim in DIMENSIONS if dim not in FILTER_COLUMNS)
+
+
+def partition_dir(path):
+    return os.path.splitext(path)[0] + '.parts'
+
+
+# The dataset in frames of at most rows rows, typed like load_housing()
+
+def read_chunks(path, rows=PARTITION_ROWS):
+    if path.endswith('.feather'):
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            for start in range(0, table.num_rows, rows):
+                yield table.slice(start, rows).to_pandas()
+        return
+    for chunk in pd.read_csv(path, dtype=HOUSING_DTYPES, chunksize=rows):
+        chunk['date'] = pd.to_datetime(chunk['date'], format=DATE_FORMAT)
+        yield chunk
+
+
+def _json_value(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# Splits the dataset at path into Parquet partitions, and draws the uniform
+# sample (the rows with the smallest random keys, kept across chunks). The
+# manifest lists the partitions and keeps the full dataset's filter bounds
+# and every dimension's values. Written to a temporary folder first and
+# renamed into place, so readers never see a partial set.
+
+def write_partitions(path, out_dir=None, fingerprint=None, rows_per_partition=PARTITION_ROWS,
+                     sample_rows=SAMPLE_ROWS, seed=0, log=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    out_dir = out_dir or partition_dir(path)
+    fingerprint = fingerprint or file_fingerprint(path)
+    with atomic_path(out_dir, directory=True) as tmp_dir:
+        rng = np.random.default_rng(seed)
+        partitions = []
+        uniques = {dim: set() for dim in DIMENSIONS}
+        bounds = {}
+        sample = None
+        n_rows = 0
+        for number, chunk in enumerate(read_chunks(path, rows_per_partition)):
+            check_columns(chunk.columns)
+            chunk = chunk[HOUSING_COLUMNS].reset_index(drop=True)
+            name = f'part-{number:05d}.parquet'
+            pq.write_table(pa.Table.from_pandas(chunk, preserve_index=False), os.path.join(tmp_dir, name))
+            partitions.append(name)
+
+            for dim in DIMENSIONS:
+                uniques[dim].update(chunk[dim].unique().tolist())
+            for col, values in (('price', chunk['price']), ('sqft_living', chunk['sqft_living']),
+                                ('price_per_sqft', chunk['price'] / chunk['sqft_living'])):
+                low, high = bounds.get(col, (np.inf, -np.inf))
+                bounds[col] = (min(low, values.min()), max(high, values.max()))
+
+            keys = rng.random(len(chunk))
+            threshold = np.inf if sample is None or len(sample) < sample_rows else sample['_key'].iloc[-1]
+            rows = np.flatnonzero(keys < threshold)
+            picked = chunk.iloc[rows].assign(_key=keys[rows], _row=n_rows + rows)
+            sample = picked if sample is None else pd.concat([sample, picked], ignore_index=True)
+            sample = sample.sort_values('_key', kind='stable').head(sample_rows)
+            n_rows += len(chunk)
+            if log is not None:
+                log(f'{n_rows:,} rows partitioned')
+
+        sample = sample.sort_values('_row').drop(columns=['_key', '_row']).astype(HOUSING_DTYPES)
+        table = pa.Table.from_pandas(sample.reset_index(drop=True), preserve_index=False)
+        with pa.OSFile(os.path.join(tmp_dir, SAMPLE), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with open(os.path.join(tmp_dir, MANIFEST), 'w', encoding='utf-8') as handle:
+            json.dump({
+                'version': PARTITIONS_VERSION, 'fingerprint': fingerprint, 'source': path, 'rows': n_rows,
+                'partitions': partitions, 'sample': SAMPLE, 'sample_rows': len(sample),
+                'bounds': {col: [_json_value(low), _json_value(high)] for col, (low, high) in bounds.items()},
+                'uniques': {dim: [_json_value(value) for value in sorted(values)] for dim, values in uniques.items()},
+            }, handle, indent=1)
+    return out_dir
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+# Partitions of the dataset at path, (re)built when missing or stale
+
+def ensure_partitions(path, fingerprint=None, rows_per_partition=PARTITION_ROWS):
+    fingerprint = fingerprint or file_fingerprint(path)
+    out_dir = partition_dir(path)
+    manifest = read_manifest(out_dir)
+    if manifest is None or manifest.get('version') != PARTITIONS_VERSION or manifest['fingerprint'] != fingerprint:
+        write_partitions(path, out_dir, fingerprint, rows_per_partition)
+        manifest = read_manifest(out_dir)
+    return out_dir, manifest
+
+
+def log_edges(low, high, n_buckets=BUCKETS):
+    return np.geomspace(max(low, 1e-9), max(high, low, 1e-9), n_buckets + 1)
+
+
+def bucket_of(edges, values):
+    return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+
+
+# Exact per-group statistics of values seen chunk by chunk, in two passes:
+# add() every chunk, then plan(), then collect() every chunk again, then
+# stats(). Groups are integer codes below n_groups.
+
+class GroupedQuantiles:
+
+    def __init__(self, n_groups, edges):
+        self.edges = edges
+        self.n_groups = n_groups
+        self.n_buckets = len(edges) - 1
+        self.counts = np.zeros((n_groups, self.n_buckets), dtype=np.int64)
+        self.n = np.zeros(n_groups, dtype=np.int64)
+        self.mean = np.zeros(n_groups)
+        self.m2 = np.zeros(n_groups)
+        self._kept = []
+
+    def add(self, codes, values, buckets):
+        codes = codes.astype(np.intp)
+        cells = codes * self.n_buckets + buckets
+        self.counts += np.bincount(cells, minlength=self.counts.size).reshape(self.counts.shape)
+        n = np.bincount(codes, minlength=self.n_groups)
+        chunk_mean = np.bincount(codes, weights=values, minlength=self.n_groups) / np.maximum(n, 1)
+        deviation = values - chunk_mean[codes]
+        chunk_m2 = np.bincount(codes, weights=deviation * deviation, minlength=self.n_groups)
+        total = self.n + n
+        delta = chunk_mean - self.mean
+        self.mean = self.mean + delta * n / np.maximum(total, 1)
+        self.m2 = self.m2 + chunk_m2 + delta * delta * self.n * n / np.maximum(total, 1)
+        self.n = total
+
+    # Buckets whose values the second pass keeps: those holding the minimum,
+    # the maximum and both ranks around each quantile, and those that can
+    # hold a fence (its limit lies between bounds known from the quartiles'
+    # buckets), plus the nearest non-empty bucket beyond them
+    def plan(self):
+        self.present = np.flatnonzero(self.n)
+        n = self.n[self.present]
+        cumulative = np.cumsum(self.counts[self.present], axis=1)
+        self._need = np.zeros_like(self.counts, dtype=bool)
+        self._ranks = {'min': np.zeros(len(n)), 'max': n - 1.0}
+        for name, q in QUANTILES.items():
+            self._ranks[name] = q * (n - 1)
+        self._buckets = {}
+        for name, ranks in self._ranks.items():
+            low = np.floor(ranks)
+            for side, rank in (('low', low), ('high', np.minimum(low + 1, n - 1))):
+                buckets = np.argmax(cumulative > rank[:, None], axis=1)
+                self._buckets[name, side] = buckets
+                self._need[self.present, buckets] = True
+
+        q25_low = self.edges[self._buckets['q25', 'low']]
+        q25_high = self.edges[self._buckets['q25', 'high'] + 1]
+        q75_low = self.edges[self._buckets['q75', 'low']]
+        q75_high = self.edges[self._buckets['q75', 'high'] + 1]
+        limits = {
+            'lower': (q25_low - 1.5 * (q75_high - q25_low), q25_high - 1.5 * (q75_low - q25_high)),
+            'upper': (q75_low + 1.5 * (q75_low - q25_high), q75_high + 1.5 * (q75_high - q25_low)),
+        }
+        for side, (low, high) in limits.items():
+            first, last = bucket_of(self.edges, low), bucket_of(self.edges, high)
+            for group, start, stop in zip(self.present, first, last):
+                self._need[group, start:stop + 1] = True
+                nonempty = np.flatnonzero(self.counts[group])
+                beyond = nonempty[nonempty > stop] if side == 'lower' else nonempty[nonempty < start]
+                if len(beyond):
+                    self._need[group, beyond[0] if side == 'lower' else beyond[-1]] = True
+
+    def collect(self, codes, values, buckets):
+        codes = codes.astype(np.intp)
+        keep = self._need[codes, buckets]
+        self._kept.append((codes[keep], buckets[keep], values[keep]))
+
+    # Statistics per present group, like aggregations.group_stats
+    def stats(self, uniques):
+        codes, buckets, values = (np.concatenate(parts) for parts in zip(*self._kept)) if self._kept else \
+            (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0))
+        order = np.lexsort((values, buckets, codes))
+        cells = (codes * self.n_buckets + buckets)[order]
+        values = values[order]
+        before = np.cumsum(self.counts, axis=1) - self.counts
+
+        def value_at(rank, buckets):
+            groups = self.present
+            start = np.searchsorted(cells, groups * self.n_buckets + buckets, side='left')
+            return values[start + rank.astype(np.int64) - before[groups, buckets]]
+
+        n = self.n[self.present]
+        exact = {}
+        for name, ranks in self._ranks.items():
+            low = np.floor(ranks)
+            high = np.minimum(low + 1, n - 1)
+            low_value = value_at(low, self._buckets[name, 'low'])
+            high_value = value_at(high, self._buckets[name, 'high'])
+            exact[name] = low_value + (ranks - low) * (high_value - low_value)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(self.m2[self.present] / (n - 1))
+        stats = {'count': n, 'mean': self.mean[self.present], 'std': std, 'min': exact['min'],
+                 'max': exact['max'], **{name: exact[name] for name in QUANTILES}}
+
+        # Tukey fences: most extreme values within 1.5 IQR of the quartiles
+        iqr = stats['q75'] - stats['q25']
+        position = np.full(self.n_groups, -1)
+        position[self.present] = np.arange(len(self.present))
+        kept_groups = position[codes[order]]
+        lower_limit = (stats['q25'] - 1.5 * iqr)[kept_groups]
+        upper_limit = (stats['q75'] + 1.5 * iqr)[kept_groups]
+        lowerfence = np.full(len(n), np.inf)
+        upperfence = np.full(len(n), -np.inf)
+        above = values >= lower_limit
+        below = values <= upper_limit
+        np.minimum.at(lowerfence, kept_groups[above], values[above])
+        np.maximum.at(upperfence, kept_groups[below], values[below])
+        stats['lowerfence'] = lowerfence
+        stats['upperfence'] = upperfence
+
+        return pd.DataFrame(stats, index=uniques[self.present], columns=list(STAT_COLUMNS))
+
+
+def _crosstab_table(counts, row_uniques, column_uniques):
+    table = pd.DataFrame(counts.reshape(len(row_uniques), len(column_uniques)),
+                         index=row_uniques, columns=column_uniques)
+    # Like pd.crosstab, only keep values that occur
+    return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+
+def _uniques_index(dim, values):
+    if dim == 'date':
+        return pd.DatetimeIndex(pd.to_datetime(values, format='ISO8601'), name=dim)
+    # Typed like the columns of load_housing(), as CubeIndex's values are
+    return pd.Index(values, name=dim).astype(HOUSING_DTYPES[dim])
+
+
+# Stand-in for filters.FilterIndex: bounds and options of the whole dataset,
+# masks over the sample's rows
+
+class PartitionedFilters:
+
+    def __init__(self, bounds, uniques, sample_filters):
+        self._bounds = bounds
+        self._uniques = uniques
+        self._sample_filters = sample_filters
+
+    def bounds(self, col):
+        return tuple(self._bounds[col])
+
+    def categories(self, col):
+        return self._uniques[col].tolist()
+
+    def full_state(self):
+        return make_filter_state(self.bounds('price'), self.bounds('sqft_living'),
+                                 self.categories('floors'), self.categories('waterfront'))
+
+    def mask(self, state):
+        return self._sample_filters.mask(state)
+
+
+class PartitionedAnalytics(Analytics):
+
+    out_of_core = True
+
+    def __init__(self, parts_dir, manifest, cache_size=16):
+        self.fingerprint = manifest['fingerprint']
+        self.n_rows = manifest['rows']
+        self.rows_path = os.path.join(parts_dir, manifest['sample'])
+        self._paths = [os.path.join(parts_dir, name) for name in manifest['partitions']]
+        self._bounds = manifest['bounds']
+        self._uniques = {dim: _uniques_index(dim, values) for dim, values in manifest['uniques'].items()}
+        # Lookup tables from integer values (dates by day) to codes
+        self._lookups = {}
+        for dim, uniques in self._uniques.items():
+            values = uniques.to_numpy()
+            if dim == 'date':
+                values = values.astype('datetime64[D]').astype(np.int64)
+            if len(values) and np.issubdtype(values.dtype, np.integer) and values[-1] - values[0] < 1 << 20:
+                table = np.full(values[-1] - values[0] + 1, -1, dtype=np.intp)
+                table[values - values[0]] = np.arange(len(values))
+                self._lookups[dim] = (values[0], table)
+
+        self.sample = get_in_memory_analytics(self.rows_path)
+        self.filters = PartitionedFilters(self._bounds, self._uniques, self.sample.filters)
+        self._cubes = LRUCache(cache_size)
+        self._fits = LRUCache(cache_size * 4)
+        self._summaries = LRUCache(cache_size)
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(*ensure_partitions(path))
+
+    def _partitions(self, columns):
+        import pyarrow.parquet as pq
+
+        for path in self._paths:
+            yield pq.read_table(path, columns=list(columns)).to_pandas()
+
+    def _codes(self, dim, series):
+        uniques = self._uniques[dim]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return uniques.get_indexer(series.cat.categories)[series.cat.codes.to_numpy()]
+        if dim in self._lookups:
+            offset, table = self._lookups[dim]
+            values = series.to_numpy()
+            if dim == 'date':
+                values = values.astype('datetime64[D]')
+            return table[values.astype(np.int64) - offset]
+        return uniques.get_indexer(series)
+
+    # Rows of a partition that pass the filters and chart selections
+
+    def _chunk_mask(self, chunk, state, selection):
+        mask = np.ones(len(chunk), dtype=bool)
+        for col in RANGE_COLUMNS:
+            low, high = getattr(state, col)
+            values = chunk[col].to_numpy()
+            mask &= (values >= low) & (values <= high)
+        for col in CATEGORY_COLUMNS:
+            if not set(self.filters.categories(col)) <= set(getattr(state, col)):
+                mask &= chunk[col].isin(getattr(state, col)).to_numpy()
+        for key, values in selection:
+            if isinstance(key, tuple):
+                n_columns = len(self._uniques[key[1]])
+                cells = self._codes(key[0], chunk[key[0]]) * n_columns + self._codes(key[1], chunk[key[1]])
+                wanted = self._uniques[key[0]].get_indexer([cell[0] for cell in values]) * n_columns \
+                    + self._uniques[key[1]].get_indexer([cell[1] for cell in values])
+                mask &= np.isin(cells, wanted)
+            else:
+                mask &= chunk[key].isin(list(values)).to_numpy()
+        return mask
+
+    def _scan_cube(self, state, selection):
+        return self._cubes.get((state, selection), lambda: self._build_cube(state, selection))
+
+    def _build_cube(self, state, selection):
+        edges = log_edges(*self._bounds['price'])
+        groups = {dim: GroupedQuantiles(len(self._uniques[dim]), edges) for dim in DIMENSIONS}
+        crosstabs = {pair: np.zeros(len(self._uniques[pair[0]]) * len(self._uniques[pair[1]]), dtype=np.int64)
+                     for pair in CROSSTABS}
+        low, high = np.inf, -np.inf
+
+        for chunk in self._partitions(SCAN_COLUMNS):
+            chunk = chunk[self._chunk_mask(chunk, state, selection)]
+            if not len(chunk):
+                continue
+            prices = chunk['price'].to_numpy(dtype=np.float64)
+            buckets = bucket_of(edges, prices)
+            codes = {dim: self._codes(dim, chunk[dim]) for dim in DIMENSIONS}
+            for dim in DIMENSIONS:
+                groups[dim].add(codes[dim], prices, buckets)
+            for rows, columns in CROSSTABS:
+                cells = codes[rows].astype(np.intp) * len(self._uniques[columns]) + codes[columns]
+                crosstabs[rows, columns] += np.bincount(cells, minlength=len(crosstabs[rows, columns]))
+            low, high = min(low, prices.min()), max(high, prices.max())
+
+        n_rows = int(groups[DIMENSIONS[0]].n.sum())
+        if not n_rows:
+            stats = {dim: pd.DataFrame(columns=list(STAT_COLUMNS), index=self._uniques[dim][:0]) for dim in DIMENSIONS}
+            return PriceCube(0, stats, {pair: _crosstab_table(counts, self._uniques[pair[0]], self._uniques[pair[1]])
+                                        for pair, counts in crosstabs.items()}, None)
+
+        # Second pass: the prices the exact quantiles and fences need, and the histogram
+        for quantiles in groups.values():
+            quantiles.plan()
+        histogram_edges = np.linspace(low, high, HISTOGRAM_BINS + 1)
+        histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        for chunk in self._partitions(SCAN_COLUMNS):
+            chunk = chunk[self._chunk_mask(chunk, state, selection)]
+            if not len(chunk):
+                continue
+            prices = chunk['price'].to_numpy(dtype=np.float64)
+            buckets = bucket_of(edges, prices)
+            for dim in DIMENSIONS:
+                groups[dim].collect(self._codes(dim, chunk[dim]), prices, buckets)
+            # Same bins as CubeIndex: a price on an inner edge counts in the bin above it
+            histogram += np.bincount(np.searchsorted(histogram_edges[1:-1], prices, side='right'),
+                                     minlength=HISTOGRAM_BINS)
+
+        stats = {dim: quantiles.stats(self._uniques[dim]) for dim, quantiles in groups.items()}
+        tables = {pair: _crosstab_table(counts, self._uniques[pair[0]], self._uniques[pair[1]])
+                  for pair, counts in crosstabs.items()}
+        return PriceCube(n_rows, stats, tables, pd.DataFrame(
+            {'low': histogram_edges[:-1], 'high': histogram_edges[1:], 'count': histogram}))
+
+    # Row masks (and the selection masks behind them) are over the sample
+
+    def mask(self, state, selection=()):
+        return self.sample.mask(state, selection)
+
+    def selection_mask(self, selection):
+        return self.sample.selection_mask(selection)
+
+    def count(self, state, selection=()):
+        return self._scan_cube(state, selection).n_rows
+
+    def cube(self, state, selection=()):
+        if selection:
+            return CrossFilteredCube(self, state, selection)
+        return self._scan_cube(state, ())
+
+    # Every piece comes from the whole cube of its selection, so a chart
+    # selection costs one scan per distinct selection the pieces ignore
+
+    def view_piece(self, piece, state, selection):
+        cube = self._scan_cube(state, selection)
+        if piece[0] == 'stats':
+            return cube.stats(piece[1])
+        if piece[0] == 'crosstab':
+            return cube.crosstab(piece[1], piece[2])
+        return cube.histogram
+
+    def price_summary(self, state):
+        def summarize():
+            edges = {'price': log_edges(*self._bounds['price']),
+                     'price_per_sqft': log_edges(*self._bounds['price_per_sqft'])}
+            quantiles = {name: GroupedQuantiles(1, edges[name]) for name in edges}
+
+            def values(chunk):
+                return {'price': chunk['price'].to_numpy(dtype=np.float64),
+                        'price_per_sqft': chunk['price'].to_numpy(dtype=np.float64) / chunk['sqft_living'].to_numpy()}
+
+            for step in ('add', 'collect'):
+                for chunk in self._partitions(FILTER_COLUMNS):
+                    chunk = chunk[self._chunk_mask(chunk, state, ())]
+                    for name, chunk_values in values(chunk).items():
+                        getattr(quantiles[name], step)(np.zeros(len(chunk), dtype=np.intp), chunk_values,
+                                                        bucket_of(edges[name], chunk_values))
+                if step == 'add':
+                    if not quantiles['price'].n[0]:
+                        return {'count': 0, 'mean': np.nan, 'median': np.nan, 'median_price_per_sqft': np.nan}
+                    for grouped in quantiles.values():
+                        grouped.plan()
+
+            index = pd.Index([0])
+            price, per_sqft = quantiles['price'].stats(index), quantiles['price_per_sqft'].stats(index)
+            return {'count': int(price['count'].iloc[0]), 'mean': float(price['mean'].iloc[0]),
+                    'median': float(price['median'].iloc[0]),
+                    'median_price_per_sqft': float(per_sqft['median'].iloc[0])}
+
+        return self._summaries.get(state, summarize)
+
+    def trendline(self, x, y, state, selection=()):
+        columns = set(SCAN_COLUMNS) | {x, y}
+        for col in (x, y):
+            if col not in HOUSING_DTYPES:
+                raise KeyError(f'Unknown column {col!r}')
+
+        def fit():
+            sums = EMPTY_SUMS
+            for chunk in self._partitions(columns):
+                chunk = chunk[self._chunk_mask(chunk, state, selection)]
+                sums = merge_line_sums(sums, line_sums(chunk[x].to_numpy(), chunk[y].to_numpy()))
+            return fit_from_sums(sums)
+
+        return self._fits.get((x, y, state, selection), fit)
+
+
+# Shared by every session, like the in-memory engine
+
+@dataset_resource('partitioned_analytics', spinner='Partitioning the dataset...')
+def _partitioned_analytics(path, fingerprint):
+    return PartitionedAnalytics(*ensure_partitions(path, fingerprint))
+
+
+def get_partitioned_analytics(path):
+    return _partitioned_analytics(path, file_fingerprint(path))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Split a dataset into Parquet partitions for out-of-core queries.')
+    parser.add_argument('data', help='CSV or Feather file with the Housing.csv columns')
+    parser.add_argument('--rows-per-partition', type=int, default=PARTITION_ROWS)
+    parser.add_argument('--sample-rows', type=int, default=SAMPLE_ROWS)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    out_dir = write_partitions(args.data, rows_per_partition=args.rows_per_partition,
+                               sample_rows=args.sample_rows, log=print)
+    manifest = read_manifest(out_dir)
+    print(f"Wrote {len(manifest['partitions'])} partitions of {manifest['rows']:,} rows to {out_dir} "
+          f'in {time.perf_counter() - started:.1f}s')
@@ -0,0 +1,217 @@
+# Price prediction.
+# A ridge regression on log(price), fitted in closed form with NumPy, over
+# the numeric Housing columns plus a one-hot zipcode. Predictions are
+# exp(fitted log price) times Duan's smearing factor, so they estimate the
+# mean price rather than the median.
+#
+# The trained model is saved next to the dataset (Housing.model.npz) with
+# the dataset's fingerprint, and get_price_model() loads it once per process;
+# the model is refitted only when the fingerprint no longer matches.
+# predict() scores a whole frame with one matrix product, so a form with one
+# property and a bulk CSV go through the same code.
+#
+# Train ahead of time (e.g. at deploy) with:
+#     python pricing.py [Housing.csv]
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from housing_data import DATA_PATH, atomic_path, file_fingerprint, load_housing
+from resources import dataset_resource
+
+NUMERIC_FEATURES = ('bedrooms', 'bathrooms', 'sqft_living', 'sqft_lot', 'floors', 'waterfront', 'view',
+                    'condition', 'grade', 'sqft_above', 'sqft_basement', 'yr_built', 'yr_renovated',
+                    'lat', 'long', 'sqft_living15', 'sqft_lot15')
+
+INPUT_COLUMNS = NUMERIC_FEATURES + ('zipcode',)
+
+# What the model is trained on, by the page and the command line alike
+
+TRAINING_COLUMNS = list(INPUT_COLUMNS) + ['price']
+
+# Features added on a log scale as well, since price grows roughly with a
+# power of the area
+
+LOG_FEATURES = ('sqft_living', 'sqft_lot', 'sqft_living15', 'sqft_lot15')
+
+RIDGE_ALPHA = 1.0
+HOLDOUT_FRACTION = 0.2
+SEED = 0
+
+# Bumped when the features or the file layout change, so old files are retrained
+
+MODEL_VERSION = 1
+
+
+def model_path(path=DATA_PATH):
+    return os.path.splitext(path)[0] + '.model.npz'
+
+
+def _raw_features(df):
+    numeric = df[list(NUMERIC_FEATURES)].to_numpy(dtype=np.float64)
+    logs = np.log1p(df[list(LOG_FEATURES)].to_numpy(dtype=np.float64).clip(0))
+    renovated = (df['yr_renovated'].to_numpy() > 0).astype(np.float64)[:, None]
+    return np.hstack([numeric, logs, renovated])
+
+
+class PriceModel:
+
+    def __init__(self, coef, intercept, center, scale, zipcodes, smearing, metrics,
+                 fingerprint='', train_seconds=0.0):
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.center = center
+        self.scale = scale
+        self.zipcodes = np.asarray(zipcodes, dtype=str)
+        self.smearing = float(smearing)
+        self.metrics = metrics
+        self.fingerprint = fingerprint
+        self.train_seconds = float(train_seconds)
+
+    # Standardized numeric features followed by the zipcode one-hot columns.
+    # Zipcodes not seen in training get no zipcode term.
+
+    def design(self, df):
+        numeric = (_raw_features(df) - self.center) / self.scale
+        codes = np.searchsorted(self.zipcodes, df['zipcode'].astype(str).to_numpy())
+        codes = np.minimum(codes, len(self.zipcodes) - 1)
+        known = self.zipcodes[codes] == df['zipcode'].astype(str).to_numpy()
+        onehot = np.zeros((len(df), len(self.zipcodes)))
+        onehot[np.flatnonzero(known), codes[known]] = 1
+        return np.hstack([numeric, onehot])
+
+    def predict(self, df):
+        return np.exp(self.design(df) @ self.coef + self.intercept) * self.smearing
+
+    # Predicted prices for a frame, with the time the scoring took
+
+    def timed_predict(self, df):
+        started = time.perf_counter()
+        prices = self.predict(df)
+        return prices, time.perf_counter() - started
+
+    @classmethod
+    def fit(cls, df, alpha=RIDGE_ALPHA):
+        started = time.perf_counter()
+        features = _raw_features(df)
+        center = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1
+        zipcodes = np.unique(df['zipcode'].astype(str).to_numpy())
+        model = cls(None, 0.0, center, scale, zipcodes, 1.0, {})
+        X = model.design(df)
+        y = np.log(df['price'].to_numpy(dtype=np.float64))
+
+        # Ridge normal equations on centred data (the intercept is not penalized)
+        x_mean = X.mean(axis=0)
+        y_mean = y.mean()
+        Xc = X - x_mean
+        gram = Xc.T @ Xc
+        gram[np.diag_indices_from(gram)] += alpha
+        model.coef = np.linalg.solve(gram, Xc.T @ (y - y_mean))
+        model.intercept = y_mean - x_mean @ model.coef
+        model.smearing = float(np.mean(np.exp(y - X @ model.coef - model.intercept)))
+        model.train_seconds = time.perf_counter() - started
+        return model
+
+    def save(self, path):
+        # np.savez adds .npz to any other name
+        with atomic_path(path, suffix='.tmp.npz') as tmp_path:
+            np.savez(tmp_path, version=MODEL_VERSION, coef=self.coef, intercept=self.intercept,
+                     center=self.center, scale=self.scale, zipcodes=self.zipcodes,
+                     smearing=self.smearing, fingerprint=self.fingerprint,
+                     train_seconds=self.train_seconds,
+                     metric_names=np.array(list(self.metrics), dtype=str),
+                     metric_values=np.array(list(self.metrics.values()), dtype=np.float64))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['version']) != MODEL_VERSION:
+                raise ValueError('Model file was written by another version')
+            metrics = dict(zip(data['metric_names'].tolist(), data['metric_values'].tolist()))
+            return cls(data['coef'], data['intercept'], data['center'], data['scale'],
+                       data['zipcodes'], data['smearing'], metrics,
+                       str(data['fingerprint']), float(data['train_seconds']))
+
+
+def _accuracy(model, df):
+    actual = df['price'].to_numpy(dtype=np.float64)
+    predicted = model.predict(df)
+    residual = actual - predicted
+    log_residual = np.log(actual) - np.log(predicted)
+    return {
+        'r2': 1 - residual @ residual / np.sum((actual - actual.mean()) ** 2),
+        'r2_log': 1 - log_residual @ log_residual / np.sum((np.log(actual) - np.log(actual).mean()) ** 2),
+        'mae': np.mean(np.abs(residual)),
+        'median_ape': np.median(np.abs(residual) / actual),
+    }
+
+
+# Fit on a random split to measure accuracy on unseen sales, then refit on
+# every sale for the model that is kept
+
+def train_price_model(df, fingerprint=''):
+    holdout = np.random.default_rng(SEED).random(len(df)) < HOLDOUT_FRACTION
+    trial = PriceModel.fit(df[~holdout])
+    metrics = {'holdout_' + name: float(value) for name, value in _accuracy(trial, df[holdout]).items()}
+    metrics['holdout_rows'] = float(holdout.sum())
+
+    model = PriceModel.fit(df)
+    model.metrics = metrics
+    model.fingerprint = fingerprint
+    return model
+
+
+# Reuse the saved model when it was trained on this exact dataset; otherwise
+# train and save (in memory only if the folder is read-only)
+
+def load_or_train(path=DATA_PATH, fingerprint=None):
+    fingerprint = fingerprint or file_fingerprint(path)
+    saved_path = model_path(path)
+    if os.path.exists(saved_path):
+        try:
+            model = PriceModel.load(saved_path)
+            if model.fingerprint == fingerprint:
+                return model
+        except (OSError, KeyError, ValueError):
+            pass
+    model = train_price_model(load_housing(path, columns=TRAINING_COLUMNS), fingerprint)
+    try:
+        model.save(saved_path)
+    except OSError:
+        pass
+    return model
+
+
+# One model per process and dataset version
+
+@dataset_resource('price_model', spinner='Training the price model...')
+def _price_model(path, fingerprint):
+    return load_or_train(path, fingerprint)
+
+
+def get_price_model(path=DATA_PATH):
+    return _price_model(path, file_fingerprint(path))
+
+
+# Score a frame of properties; returns a copy with 'predicted_price'
+
+def score_frame(model, df):
+    missing = [col for col in INPUT_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError('Missing columns: ' + ', '.join(missing))
+    scored = df.copy()
+    scored['predicted_price'] = model.predict(df)
+    return scored
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    model = train_price_model(load_housing(source, columns=TRAINING_COLUMNS), file_fingerprint(source))
+    model.save(model_path(source))
+    print('Wrote %s in %.2fs, holdout R^2 %.3f' % (model_path(source), model.train_seconds,
+                                                    model.metrics['holdout_r2']))
@@ -0,0 +1,348 @@
+# Opt-in profiling of page reruns.
+# Turn it on for one browser tab with ?profile=1 in the page URL, or for
+# every session with DASHBOARD_PROFILE=1 in the server's environment. A page
+# calls start_profile() first and profile_panel() last, and wraps each of its
+# chart blocks in chart_section(name). While profiling, every section records:
+#     wall time      time spent in the block
+#     peak memory    largest Python/NumPy allocation above the level at the
+#                    start of the block (tracemalloc; process-wide, so other
+#                    sessions rerunning at the same time are counted too)
+#     figure bytes   size of the JSON of every figure shown through
+#                    cached_figure() in the block
+# profile_panel() shows them in a collapsible debug panel, logs the rerun as
+# one JSON line (logger 'profiling') and adds it to the process-wide metrics
+# returned by prometheus_text(). With DASHBOARD_PROFILE_TEXTFILE set, those
+# metrics are also written to that file after each profiled rerun, for the
+# Prometheus node exporter's textfile collector.
+#
+# The panel also reports memory: the frames shared by every session, this
+# session's state and per-rerun objects (e.g. the filter mask), the
+# per-dataset resource cache against its budget (see resources.py), the
+# process's resident memory and the number of open sessions, so the memory
+# each extra user costs can be read off directly.
+#
+# When profiling is off, chart_section() returns a shared no-op context
+# manager and record_figure() returns at once, so the hooks cost a function
+# call each.
+
+import contextlib
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+
+import pandas as pd
+import streamlit as st
+
+from housing_data import write_atomic
+from resources import get_resource_cache, object_bytes
+
+ENV_FLAG = 'DASHBOARD_PROFILE'
+TEXTFILE_ENV = 'DASHBOARD_PROFILE_TEXTFILE'
+QUERY_PARAM = 'profile'
+
+logger = logging.getLogger('profiling')
+
+_NOOP = contextlib.nullcontext()
+
+# Reruns run in one thread per session; each sees only its own profile
+
+_local = threading.local()
+
+# Figure JSON sizes, by figure object (cached figures are shared and reused)
+
+_figure_bytes = {}
+FIGURE_BYTES_ENTRIES = 512
+
+
+# tracemalloc is process-wide: it runs while any rerun is being profiled, and
+# is stopped by the last one to finish (unless something else started it)
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        if not _tracing_users:
+            _tracing_started = not tracemalloc.is_tracing()
+            if _tracing_started:
+                tracemalloc.start()
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if not _tracing_users and _tracing_started:
+            tracemalloc.stop()
+
+
+def profiling_enabled():
+    if os.environ.get(ENV_FLAG, '').lower() in ('1', 'true', 'yes'):
+        return True
+    try:
+        return st.query_params.get(QUERY_PARAM) in ('1', 'true')
+    except Exception:
+        return False
+
+
+class RerunProfile:
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.sections = []
+        self.current = None
+        _acquire_tracing()
+        # Released by finish(), or when a rerun that never got there is collected
+        self._tracing = weakref.finalize(self, _release_tracing)
+
+    @contextlib.contextmanager
+    def section(self, name):
+        record = {'section': name, 'seconds': 0.0, 'peak_bytes': 0, 'figures': 0, 'figure_bytes': 0,
+                  'measure_seconds': 0.0}
+        outer = self.current
+        self.current = record
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - started
+            record['peak_bytes'] = max(tracemalloc.get_traced_memory()[1] - start_bytes, 0)
+            # Serializing figures to measure them is not part of the block's cost
+            record['seconds'] = max(elapsed - record['measure_seconds'], 0.0)
+            self.current = outer
+            self.sections.append(record)
+
+    def add_figure(self, fig):
+        if self.current is None:
+            return
+        started = time.perf_counter()
+        entry = _figure_bytes.get(id(fig))
+        if entry is None or entry[0]() is not fig:
+            if len(_figure_bytes) >= FIGURE_BYTES_ENTRIES:
+                _figure_bytes.clear()
+            entry = (weakref.ref(fig), len(fig.to_json()))
+            _figure_bytes[id(fig)] = entry
+        self.current['figures'] += 1
+        self.current['figure_bytes'] += entry[1]
+        self.current['measure_seconds'] += time.perf_counter() - started
+
+    def finish(self):
+        self._tracing()
+        return time.perf_counter() - self.started
+
+
+def start_profile(page):
+    _local.profile = RerunProfile(page) if profiling_enabled() else None
+    return _local.profile
+
+
+def current_profile():
+    return getattr(_local, 'profile', None)
+
+
+def chart_section(name):
+    profile = current_profile()
+    if profile is None:
+        return _NOOP
+    return profile.section(name)
+
+
+def record_figure(fig):
+    profile = current_profile()
+    if profile is not None:
+        profile.add_figure(fig)
+
+
+GAUGE_HELP = {
+    'dashboard_shared_bytes': 'Bytes of an object shared by every session.',
+    'dashboard_session_bytes': 'Bytes held for one session (its state and per-rerun objects), last profiled rerun.',
+    'dashboard_process_resident_bytes': 'Resident memory of the Streamlit process.',
+    'dashboard_active_sessions': 'Open Streamlit sessions.',
+    'dashboard_resource_cache_bytes': 'Estimated bytes of the per-dataset resource cache.',
+    'dashboard_resource_cache_budget_bytes': 'Memory budget of the per-dataset resource cache.',
+}
+
+
+def process_rss():
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def active_sessions():
+    try:
+        from streamlit import runtime
+
+        return runtime.get_instance()._session_mgr.num_active_sessions()
+    except Exception:
+        return None
+
+
+# Memory table: shared objects once, then what this session adds
+
+def memory_report(shared=None, transient=None):
+    rows = []
+    for name, value in (shared or {}).items():
+        rows.append({'Scope': 'shared', 'Object': name, 'Bytes': object_bytes(value)})
+    state = {key: st.session_state[key] for key in st.session_state}
+    for key, value in state.items():
+        rows.append({'Scope': 'session state', 'Object': str(key), 'Bytes': object_bytes(value)})
+    for name, value in (transient or {}).items():
+        rows.append({'Scope': 'this rerun', 'Object': name, 'Bytes': object_bytes(value)})
+    return pd.DataFrame(rows, columns=['Scope', 'Object', 'Bytes'])
+
+
+# Process-wide totals per (page, section), for prometheus_text()
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _observe(page, section, seconds, peak_bytes=0, figure_bytes=0):
+    with _metrics_lock:
+        totals = _metrics.setdefault((page, section), {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                                                        'peak_bytes': 0, 'figure_bytes': 0})
+        totals['count'] += 1
+        totals['seconds'] += seconds
+        totals['max_seconds'] = max(totals['max_seconds'], seconds)
+        totals['peak_bytes'] = peak_bytes
+        totals['figure_bytes'] = figure_bytes
+
+
+# Last measured value of each memory gauge, by (metric, labels)
+
+_gauges = {}
+
+
+def _set_gauge(name, labels, value):
+    with _metrics_lock:
+        _gauges[(name, tuple(sorted(labels.items())))] = value
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Metrics in the Prometheus text exposition format
+
+def prometheus_text():
+    with _metrics_lock:
+        items = sorted((key, dict(totals)) for key, totals in _metrics.items())
+    families = (
+        ('dashboard_section_seconds', 'summary', 'Wall time of a page section per profiled rerun.'),
+        ('dashboard_section_max_seconds', 'gauge', 'Slowest profiled rerun of a page section.'),
+        ('dashboard_section_peak_bytes', 'gauge', 'Peak traced memory of a page section, last profiled rerun.'),
+        ('dashboard_section_figure_bytes', 'gauge', 'JSON bytes of the figures a page section sent, last profiled rerun.'),
+    )
+    lines = []
+    for name, kind, help_text in families:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (page, section), totals in items:
+            labels = f'page="{_label(page)}",section="{_label(section)}"'
+            if kind == 'summary':
+                lines.append(f'{name}_sum{{{labels}}} {totals["seconds"]:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {totals["count"]}')
+            else:
+                key = name[len('dashboard_section_'):]
+                lines.append(f'{name}{{{labels}}} {totals[key]}')
+    with _metrics_lock:
+        gauges = sorted(_gauges.items())
+    for name, help_text in GAUGE_HELP.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for (gauge, labels), value in gauges:
+            if gauge == name:
+                label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels)
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def _write_textfile(path):
+    # One temporary file per call: sessions can finish profiled reruns at once
+    write_atomic(path, prometheus_text())
+
+
+# Ends the rerun's profile: log it, add it to the metrics and show the
+# panel. shared and transient map names to the objects the memory report
+# should cover (e.g. {'dataset': df} and {'filter mask': mask}).
+
+def profile_panel(shared=None, transient=None):
+    profile = current_profile()
+    if profile is None:
+        return None
+    _local.profile = None
+    total = profile.finish()
+
+    memory = memory_report(shared, transient)
+    session_bytes = int(memory.loc[memory['Scope'] != 'shared', 'Bytes'].sum())
+    shared_bytes = int(memory.loc[memory['Scope'] == 'shared', 'Bytes'].sum())
+    rss = process_rss()
+    sessions = active_sessions()
+    resource_cache = get_resource_cache()
+    cache_bytes = resource_cache.nbytes
+    for _, row in memory[memory['Scope'] == 'shared'].iterrows():
+        _set_gauge('dashboard_shared_bytes', {'page': profile.page, 'object': row['Object']}, row['Bytes'])
+    _set_gauge('dashboard_session_bytes', {'page': profile.page}, session_bytes)
+    _set_gauge('dashboard_process_resident_bytes', {}, rss)
+    _set_gauge('dashboard_resource_cache_bytes', {}, cache_bytes)
+    _set_gauge('dashboard_resource_cache_budget_bytes', {}, resource_cache.budget_bytes)
+    if sessions is not None:
+        _set_gauge('dashboard_active_sessions', {}, sessions)
+
+    for record in profile.sections:
+        _observe(profile.page, record['section'], record['seconds'], record['peak_bytes'], record['figure_bytes'])
+    _observe(profile.page, '__rerun__', total)
+    logger.info(json.dumps({'event': 'rerun_profile', 'page': profile.page, 'seconds': round(total, 6),
+                            'session_bytes': session_bytes, 'shared_bytes': shared_bytes, 'rss_bytes': rss,
+                            'sections': [{key: value for key, value in record.items() if key != 'measure_seconds'}
+                                         for record in profile.sections]}))
+    textfile = os.environ.get(TEXTFILE_ENV)
+    if textfile:
+        _write_textfile(textfile)
+
+    sections = pd.DataFrame(profile.sections, columns=['section', 'seconds', 'peak_bytes', 'figures',
+                                                       'figure_bytes'])
+    with st.expander(f'Profiling: rerun took {total * 1000:,.0f} ms'):
+        table = pd.DataFrame({
+            'Section': sections['section'],
+            'Wall time (ms)': (sections['seconds'] * 1000).round(1),
+            'Peak memory (MB)': (sections['peak_bytes'] / 2 ** 20).round(2),
+            'Figures': sections['figures'],
+            'Figure JSON (KB)': (sections['figure_bytes'] / 1024).round(1),
+        }).sort_values('Wall time (ms)', ascending=False)
+        st.dataframe(table, hide_index=True)
+        outside = total - sections['seconds'].sum() - sum(r['measure_seconds'] for r in profile.sections)
+        st.caption(f'{outside * 1000:,.0f} ms of the rerun was outside the sections listed.')
+
+        shared_col, session_col, rss_col = st.columns(3)
+        shared_col.metric('Shared by all sessions', f'{shared_bytes / 2 ** 20:,.1f} MB')
+        session_col.metric('This session', f'{session_bytes / 2 ** 10:,.1f} KB')
+        rss_col.metric('Process', f'{rss / 2 ** 20:,.0f} MB',
+                       help=None if sessions is None else f'{sessions} open sessions')
+        st.dataframe(memory.assign(KB=(memory['Bytes'] / 1024).round(1)).drop(columns='Bytes')
+                     .sort_values('KB', ascending=False), hide_index=True)
+        usage = resource_cache.usage()
+        st.caption(f'Dataset resource cache: {cache_bytes / 2 ** 20:,.1f} MB of a '
+                   f'{resource_cache.budget_bytes / 2 ** 20:,.0f} MB budget, {len(usage)} resources '
+                   '(most recently used first)')
+        st.dataframe(usage.assign(MB=(usage['bytes'] / 2 ** 20).round(2)).drop(columns='bytes'), hide_index=True)
+        st.code(prometheus_text(), language='text')
+    return sections
@@ -0,0 +1,104 @@
+# Straight-line (OLS) trendlines without statsmodels.
+# The fit is closed-form least squares over numpy arrays, cached per chart,
+# dataset version and filter state, and drawn as a two-point line trace.
+
+import collections
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+LineFit = collections.namedtuple('LineFit', ['slope', 'intercept', 'r_squared', 'n', 'x_min', 'x_max'])
+
+
+def fit_line(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n < 2:
+        return LineFit(np.nan, np.nan, np.nan, n, np.nan, np.nan)
+
+    x_mean, y_mean = x.mean(), y.mean()
+    dx, dy = x - x_mean, y - y_mean
+    sxx, sxy, syy = dx @ dx, dx @ dy, dy @ dy
+    slope = sxy / sxx if sxx else 0.0
+    intercept = y_mean - slope * x_mean
+    r_squared = sxy * sxy / (sxx * syy) if sxx and syy else 0.0
+    return LineFit(float(slope), float(intercept), float(r_squared), n, float(x.min()), float(x.max()))
+
+
+# The same fit from data seen in chunks: line_sums() of each chunk, combined
+# with merge_line_sums() (Chan's pairwise formulas, so no large sums of
+# squares lose precision), then fit_from_sums(). With weights, each point
+# counts that many times (n is then their sum).
+
+LineSums = collections.namedtuple('LineSums', ['n', 'x_mean', 'y_mean', 'sxx', 'sxy', 'syy', 'x_min', 'x_max'])
+
+EMPTY_SUMS = LineSums(0, 0.0, 0.0, 0.0, 0.0, 0.0, np.inf, -np.inf)
+
+
+def line_sums(x, y, weights=None):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if not len(x):
+        return EMPTY_SUMS
+    if weights is None:
+        x_mean, y_mean = x.mean(), y.mean()
+        dx, dy = x - x_mean, y - y_mean
+        return LineSums(len(x), x_mean, y_mean, dx @ dx, dx @ dy, dy @ dy, x.min(), x.max())
+    weights = np.asarray(weights, dtype=float)
+    n = weights.sum()
+    x_mean, y_mean = weights @ x / n, weights @ y / n
+    dx, dy = x - x_mean, y - y_mean
+    return LineSums(n, x_mean, y_mean, (weights * dx) @ dx, (weights * dx) @ dy, (weights * dy) @ dy,
+                    x.min(), x.max())
+
+
+def merge_line_sums(a, b):
+    if not b.n:
+        return a
+    if not a.n:
+        return b
+    n = a.n + b.n
+    dx, dy = b.x_mean - a.x_mean, b.y_mean - a.y_mean
+    weight = a.n * b.n / n
+    return LineSums(n, a.x_mean + dx * b.n / n, a.y_mean + dy * b.n / n,
+                    a.sxx + b.sxx + dx * dx * weight, a.sxy + b.sxy + dx * dy * weight,
+                    a.syy + b.syy + dy * dy * weight, min(a.x_min, b.x_min), max(a.x_max, b.x_max))
+
+
+def fit_from_sums(sums):
+    if sums.n < 2:
+        return LineFit(np.nan, np.nan, np.nan, sums.n, np.nan, np.nan)
+    slope = sums.sxy / sums.sxx if sums.sxx else 0.0
+    intercept = sums.y_mean - slope * sums.x_mean
+    r_squared = sums.sxy * sums.sxy / (sums.sxx * sums.syy) if sums.sxx and sums.syy else 0.0
+    return LineFit(float(slope), float(intercept), float(r_squared), sums.n, float(sums.x_min), float(sums.x_max))
+
+
+# x and y are not hashed; the (chart, fingerprint, filter_state) key already
+# identifies the data they were taken from.
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_line_fit(chart, fingerprint, filter_state, _x, _y):
+    return fit_line(_x, _y)
+
+
+def add_trendline(fig, fit, color='#d62728', name='OLS trendline'):
+    if fit.n < 2:
+        return fig
+    x = [fit.x_min, fit.x_max]
+    y = [fit.intercept + fit.slope * value for value in x]
+    fig.add_trace(go.Scatter(
+        x=x, y=y, mode='lines', name=name, line=dict(color=color, width=2),
+        hovertemplate=(f'y = {fit.slope:,.2f} x + {fit.intercept:,.0f}'
+                       f'<br>R² = {fit.r_squared:.3f} (n = {fit.n:,})<extra></extra>'),
+    ))
+    return fig
+
+
+def describe_fit(fit, x_label, y_label='price'):
+    if fit.n < 2:
+        return f'Not enough data for a trendline (n = {fit.n}).'
+    return (f'OLS fit: {y_label} = {fit.slope:,.2f} × {x_label} {"+" if fit.intercept >= 0 else "−"} '
+            f'{abs(fit.intercept):,.0f} · R² = {fit.r_squared:.3f} · n = {fit.n:,}')
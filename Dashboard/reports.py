@@ -0,0 +1,218 @@
+# Per-zipcode market reports, generated in parallel.
+# Each zipcode gets a folder with report.html (price distribution, grade mix,
+# monthly trend, waterfront premium), one CSV per table and, when kaleido is
+# installed, a PNG per chart. The charts use the Dashboard's builders and
+# statistics (charts.py, aggregations.py, timeseries.py).
+#
+# Workers memory-map the dataset's Feather sidecar instead of receiving a
+# pickled copy, so every process reads the same pages from the OS cache and
+# a task is just a zipcode. A report is written to a temporary folder and
+# renamed into place, followed by a manifest with the dataset fingerprint;
+# rerunning skips zipcodes whose manifest matches, so an interrupted batch
+# resumes where it stopped.
+#
+# Run with:
+#     python reports.py [--data Housing.csv] [--out reports] [--workers N] [--force]
+
+import argparse
+import concurrent.futures
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from aggregations import CubeIndex
+from charts import box_figure, histogram_figure
+from housing_data import (DATA_PATH, atomic_path, ensure_binary, file_fingerprint, read_housing_binary,
+                          read_housing_csv, write_atomic)
+from timeseries import TimeSeriesIndex, add_rolling
+
+REPORT_DIR = 'reports'
+MANIFEST = 'manifest.json'
+COLORS = px.colors.sequential.Plasma
+
+# Rolling window (months) of the trend chart
+
+TREND_WINDOW = 3
+
+
+def report_is_current(out_dir, zipcode, fingerprint):
+    try:
+        with open(os.path.join(out_dir, zipcode, MANIFEST), encoding='utf-8') as handle:
+            return json.load(handle).get('fingerprint') == fingerprint
+    except (OSError, ValueError):
+        return False
+
+
+# Tables and figures of one zipcode's report
+
+def build_report(zipcode, df):
+    cube = CubeIndex(df).cube()
+    prices = df['price'].to_numpy(dtype=np.float64)
+    per_sqft = prices / df['sqft_living'].to_numpy(dtype=np.float64)
+
+    summary = pd.DataFrame([{
+        'zipcode': zipcode, 'sales': len(df),
+        'median_price': np.median(prices), 'mean_price': prices.mean(),
+        'min_price': prices.min(), 'max_price': prices.max(),
+        'median_price_per_sqft': np.median(per_sqft),
+        'first_sale': df['date'].min(), 'last_sale': df['date'].max(),
+    }])
+
+    grade = cube.stats('grade')[['count', 'median', 'mean']].reset_index()
+    grade['share'] = grade['count'] / grade['count'].sum()
+
+    monthly = add_rolling(TimeSeriesIndex(df).series('M'), TREND_WINDOW)[['date', 'count', 'median', 'rolling_median']]
+
+    # Premium of waterfront over other sales, in price and in price per sqft
+    waterfront = df.assign(price_per_sqft=per_sqft).groupby('waterfront', observed=True).agg(
+        sales=('price', 'size'), median_price=('price', 'median'),
+        median_price_per_sqft=('price_per_sqft', 'median')).reindex([0, 1])
+    premium = waterfront.loc[1] / waterfront.loc[0] - 1
+    summary['waterfront_premium'] = premium['median_price']
+    summary['waterfront_premium_per_sqft'] = premium['median_price_per_sqft']
+
+    figures = {
+        'price_distribution': histogram_figure(cube.histogram, title=f'Price Distribution in {zipcode}',
+                                               labels={'price': 'Property Prices'},
+                                               color_discrete_sequence=COLORS),
+        'price_by_grade': box_figure(cube.stats('grade'), 'grade', 'price', title=f'Price by Grade in {zipcode}',
+                                     labels={'grade': 'Grade', 'price': 'Price'}, colors=COLORS),
+        'grade_mix': px.bar(grade, x='grade', y='count', title=f'Grade Mix in {zipcode}',
+                            labels={'grade': 'Grade', 'count': 'Sales'}, color_discrete_sequence=COLORS),
+        'monthly_trend': px.line(monthly, x='date', y=['median', 'rolling_median'],
+                                 title=f'Median Price by Month in {zipcode}',
+                                 labels={'date': 'Month', 'value': 'Median Price', 'variable': ''},
+                                 color_discrete_sequence=COLORS),
+        'waterfront_premium': px.bar(waterfront.reset_index().dropna(), x='waterfront', y='median_price',
+                                     title=f'Waterfront vs Other Sales in {zipcode}',
+                                     labels={'waterfront': 'Waterfront', 'median_price': 'Median Price'},
+                                     color_discrete_sequence=COLORS),
+    }
+    tables = {'summary': summary, 'grade': grade, 'monthly': monthly,
+              'waterfront': waterfront.reset_index()}
+    return tables, figures
+
+
+def render_html(zipcode, tables, figures):
+    summary = tables['summary'].iloc[0]
+    parts = [f'<html><head><meta charset="utf-8"><title>Market report {zipcode}</title></head><body>',
+             f'<h1>Market report for {zipcode}</h1>',
+             tables['summary'].T.to_html(header=False)]
+    if pd.notna(summary['waterfront_premium']):
+        parts.append(f"<p>Waterfront sales sold for a median {summary['waterfront_premium']:+.0%} "
+                     f"({summary['waterfront_premium_per_sqft']:+.0%} per sqft) against other sales.</p>")
+    else:
+        parts.append('<p>No waterfront sales in this zipcode.</p>')
+    for i, fig in enumerate(figures.values()):
+        parts.append(fig.to_html(full_html=False, include_plotlyjs='cdn' if i == 0 else False))
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def write_report(out_dir, zipcode, df, fingerprint, formats):
+    tables, figures = build_report(zipcode, df)
+    final_dir = os.path.join(out_dir, zipcode)
+    with atomic_path(final_dir, directory=True) as tmp_dir:
+        if 'csv' in formats:
+            for name, table in tables.items():
+                table.to_csv(os.path.join(tmp_dir, f'{name}.csv'), index=False)
+        if 'html' in formats:
+            write_atomic(os.path.join(tmp_dir, 'report.html'), render_html(zipcode, tables, figures))
+        if 'png' in formats:
+            for name, fig in figures.items():
+                fig.write_image(os.path.join(tmp_dir, f'{name}.png'))
+
+    # Written last: a folder without a current manifest is regenerated
+    write_atomic(os.path.join(final_dir, MANIFEST),
+                 json.dumps({'zipcode': zipcode, 'fingerprint': fingerprint, 'sales': len(df),
+                             'formats': sorted(formats)}))
+    return tables['summary']
+
+
+# Per-worker state: the dataset (memory-mapped when it is a Feather file) and
+# the row numbers of every zipcode
+
+_worker = {}
+
+
+def _init_worker(path):
+    df = read_housing_binary(path) if path.endswith('.feather') else read_housing_csv(path)
+    codes, uniques = pd.factorize(df['zipcode'].astype(str))
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    _worker['df'] = df
+    _worker['rows'] = {zipcode: order[bounds[i]:bounds[i + 1]] for i, zipcode in enumerate(uniques)}
+
+
+def _report_task(out_dir, zipcode, fingerprint, formats):
+    started = time.perf_counter()
+    df = _worker['df'].iloc[_worker['rows'][zipcode]].reset_index(drop=True)
+    write_report(out_dir, zipcode, df, fingerprint, formats)
+    return zipcode, len(df), time.perf_counter() - started
+
+
+def zipcodes_of(path):
+    df = read_housing_binary(path, columns=['zipcode']) if path.endswith('.feather') \
+        else read_housing_csv(path, columns=['zipcode'])
+    return sorted(df['zipcode'].astype(str).unique())
+
+
+def generate_reports(data_path=DATA_PATH, out_dir=REPORT_DIR, workers=None, formats=('html', 'csv'), force=False,
+                     log=print):
+    fingerprint = file_fingerprint(data_path)
+    try:
+        shared_path = ensure_binary(data_path, fingerprint)
+    except (ImportError, OSError, ValueError):
+        # Without pyarrow (or a writable folder) every worker parses the CSV
+        shared_path = data_path
+    formats = set(formats)
+    if 'png' in formats:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            log('kaleido is not installed; skipping PNG output')
+            formats.discard('png')
+
+    os.makedirs(out_dir, exist_ok=True)
+    zipcodes = zipcodes_of(shared_path)
+    todo = [z for z in zipcodes if force or not report_is_current(out_dir, z, fingerprint)]
+    log(f'{len(zipcodes) - len(todo)} of {len(zipcodes)} reports are current; generating {len(todo)}')
+
+    started = time.perf_counter()
+    if todo:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                    initargs=(shared_path,)) as pool:
+            futures = [pool.submit(_report_task, out_dir, z, fingerprint, formats) for z in todo]
+            for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+                zipcode, rows, seconds = future.result()
+                log(f'[{done}/{len(todo)}] {zipcode}: {rows:,} sales in {seconds:.2f}s')
+
+    # Index of every report, from their summary tables
+    summaries = [pd.read_csv(os.path.join(out_dir, z, 'summary.csv'), dtype={'zipcode': str})
+                 for z in zipcodes if os.path.exists(os.path.join(out_dir, z, 'summary.csv'))]
+    if summaries:
+        index = pd.concat(summaries, ignore_index=True)
+        index.to_csv(os.path.join(out_dir, 'summary.csv'), index=False)
+        links = index.assign(zipcode=[f'<a href="{z}/report.html">{z}</a>' for z in index['zipcode']])
+        write_atomic(os.path.join(out_dir, 'index.html'),
+                     '<html><head><meta charset="utf-8"><title>Market reports</title></head><body>'
+                     '<h1>Market reports by zipcode</h1>' + links.to_html(index=False, escape=False)
+                     + '</body></html>')
+    elapsed = time.perf_counter() - started
+    log(f'Done in {elapsed:.1f}s')
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate one market report per zipcode.')
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--out', default=REPORT_DIR)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per core)')
+    parser.add_argument('--formats', default='html,csv', help='comma-separated: html, csv, png')
+    parser.add_argument('--force', action='store_true', help='regenerate reports that are current')
+    args = parser.parse_args()
+    generate_reports(args.data, args.out, args.workers, args.formats.split(','), args.force)
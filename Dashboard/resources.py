@@ -0,0 +1,171 @@
+# Process-wide cache of per-dataset resources (frames, indexes, engines and
+# models), shared by every session and every dataset under one memory
+# budget. Each resource is built on first use. Datasets (a path and its
+# fingerprint) are kept in LRU order of their resources' last use; when the
+# estimated size of everything cached exceeds the budget, every resource of
+# the least recently used dataset is dropped, then the next one, and so on.
+# So opening one more region evicts the regions nobody has looked at lately
+# instead of growing the process until it runs out of memory. Resources are
+# evicted a whole dataset at a time because they hold on to each other (an
+# analytics engine keeps its dataset's filter and cube indexes).
+#
+# Sizes are estimates (see object_bytes), taken when a resource is built. A
+# buffer shared by several cached resources, such as a column an index keeps
+# from the dataset's frame, is counted once, in the resource cached first.
+# Memos inside a resource (an engine's per-filter cubes) grow after that and
+# are bounded by their own entry counts instead.
+#
+# The budget is DASHBOARD_CACHE_MB megabytes (default 2048).
+
+import collections
+import functools
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+DEFAULT_BUDGET_BYTES = int(float(os.environ.get('DASHBOARD_CACHE_MB', 2048)) * (1 << 20))
+
+Entry = collections.namedtuple('Entry', ['value', 'nbytes', 'ids'])
+
+
+# Estimated bytes held by value: arrays by the buffer they view (each
+# buffer counted once), frames by their columns' buffers, containers and
+# plain objects by what they reference. Objects and buffers whose ids are in
+# seen are skipped; the ids of those counted are added to it.
+
+def object_bytes(value, seen=None):
+    seen = set() if seen is None else seen
+    if isinstance(value, pd.DataFrame):
+        return sum(object_bytes(value.iloc[:, i], seen) for i in range(value.shape[1])) \
+            + object_bytes(value.index, seen)
+    if isinstance(value, pd.Series) and isinstance(value.dtype, np.dtype) and value.dtype.kind in 'biufcmM':
+        return object_bytes(value.to_numpy(), seen)
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        root = value
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        if id(root) in seen:
+            return 0
+        seen.add(id(root))
+        return int(root.nbytes)
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(object_bytes(key, seen) + object_bytes(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(object_bytes(item, seen) for item in value)
+    elif hasattr(value, '__dict__') and not isinstance(value, type):
+        size += object_bytes(vars(value), seen)
+    return size
+
+
+class ResourceCache:
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._entries = {}
+        self._datasets = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._building = collections.defaultdict(threading.Lock)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(entry.nbytes for entry in self._entries.values())
+
+    # Keys are (kind, path, fingerprint, ...); (path, fingerprint) names the dataset
+
+    def lookup(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._datasets.move_to_end(key[1:3])
+                return self._entries[key].value
+        return default
+
+    # The cached value for key, or build() stored. A key is built by one
+    # thread at a time; the others wait for it rather than build it again.
+
+    def get(self, key, build):
+        missing = object()
+        value = self.lookup(key, missing)
+        if value is not missing:
+            return value
+        with self._lock:
+            building = self._building[key]
+        with building:
+            value = self.lookup(key, missing)
+            if value is missing:
+                value = build()
+                self.put(key, value)
+        with self._lock:
+            self._building.pop(key, None)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            shared = set().union(*(entry.ids for other, entry in self._entries.items() if other != key))
+        seen = set(shared)
+        nbytes = object_bytes(value, seen)
+        with self._lock:
+            self._entries[key] = Entry(value, nbytes, frozenset(seen - shared))
+            self._datasets.setdefault(key[1:3], set()).add(key)
+            self._datasets.move_to_end(key[1:3])
+            total = sum(entry.nbytes for entry in self._entries.values())
+            # The newest dataset stays even if it alone is over budget
+            while total > self.budget_bytes and len(self._datasets) > 1:
+                _, keys = self._datasets.popitem(last=False)
+                total -= sum(self._entries.pop(evicted).nbytes for evicted in keys)
+
+    # Drop everything cached for one dataset path, or everything
+
+    def evict(self, path=None):
+        with self._lock:
+            for dataset in [dataset for dataset in self._datasets if path is None or dataset[0] == path]:
+                for key in self._datasets.pop(dataset):
+                    del self._entries[key]
+
+    def clear(self):
+        self.evict()
+
+    # One row per cached resource, most recently used datasets first
+
+    def usage(self):
+        with self._lock:
+            rows = [{'path': dataset[0], 'resource': key[0], 'bytes': self._entries[key].nbytes}
+                    for dataset, keys in reversed(self._datasets.items()) for key in sorted(keys, key=repr)]
+        return pd.DataFrame(rows, columns=['path', 'resource', 'bytes'])
+
+
+_cache = ResourceCache()
+
+
+def get_resource_cache():
+    return _cache
+
+
+# Decorator for functions building a resource from (path, fingerprint,
+# *args): results are cached in the shared budgeted cache under
+# (kind, path, fingerprint, *args). spinner is shown while building inside
+# a Streamlit page.
+
+def dataset_resource(kind, spinner=None):
+    def decorator(build):
+        @functools.wraps(build)
+        def cached(path, fingerprint, *args):
+            def make():
+                if spinner is None:
+                    return build(path, fingerprint, *args)
+                with st.spinner(spinner):
+                    return build(path, fingerprint, *args)
+
+            return _cache.get((kind, path, fingerprint) + args, make)
+        return cached
+    return decorator
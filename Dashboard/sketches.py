@@ -0,0 +1,85 @@
+# Mergeable quantile sketch for positive values such as prices.
+# Values are counted in logarithmic buckets (the DDSketch scheme), so any
+# quantile is returned within RELATIVE_ACCURACY of the true value, sketches
+# of different chunks can be merged by adding counts, and memory depends on
+# the value range rather than on the number of rows.
+
+import math
+
+import numpy as np
+
+RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._counts = {}
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[values > 0]
+        if not len(values):
+            return self
+        keys, counts = np.unique(np.ceil(np.log(values) / self._log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self._counts[key] = self._counts.get(key, 0) + count
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    def merge(self, other):
+        if other._gamma != self._gamma:
+            raise ValueError('Cannot merge sketches with different accuracy')
+        for key, count in other._counts.items():
+            self._counts[key] = self._counts.get(key, 0) + count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantiles(self, qs):
+        if not self.count:
+            return np.full(len(qs), np.nan)
+        keys = np.array(sorted(self._counts))
+        cumulative = np.cumsum([self._counts[key] for key in keys])
+        ranks = np.asarray(qs, dtype=float) * (self.count - 1)
+
+        def value_at(rank):
+            position = np.searchsorted(cumulative, rank, side='right')
+            value = 2 * self._gamma ** keys[np.minimum(position, len(keys) - 1)] / (self._gamma + 1)
+            return np.clip(value, self.min, self.max)
+
+        # Interpolate between neighbouring ranks, like numpy's 'linear' method
+        low = np.floor(ranks)
+        values = value_at(low) + (ranks - low) * (value_at(np.ceil(ranks)) - value_at(low))
+        # The extremes are tracked exactly
+        values[ranks <= 0] = self.min
+        values[ranks >= self.count - 1] = self.max
+        return values
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    # Plain JSON-able form, and back
+
+    def to_dict(self):
+        return {'relative_accuracy': self.relative_accuracy, 'count': self.count, 'min': self.min, 'max': self.max,
+                'counts': sorted(self._counts.items())}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch._counts = {int(key): int(count) for key, count in data['counts']}
+        sketch.count = data['count']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        return sketch
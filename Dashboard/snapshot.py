@@ -0,0 +1,327 @@
+# Pre-rendered snapshot of the Dashboard's default view.
+# Most visitors only read the page as it opens: every property, no filters,
+# no chart selections. The build command runs Pages/Dashboard.py headlessly
+# (streamlit.testing, as benchmarks.py does), opens each narrative section
+# and writes what the page drew (headings, commentary, captions and the
+# figures' JSON) to one static HTML file with its own tabs:
+#     snapshot/index.html     the page; figures are drawn by plotly.js when
+#                             their tab is first opened
+#     snapshot/manifest.json  the dataset's fingerprint and the default
+#                             filter bounds, written last
+# Figure JSON is minified: no whitespace, and the layout template every
+# figure repeats is stored once.
+#
+# While the sidebar filters are at their defaults and the session hasn't
+# asked for more, the Dashboard shows this file instead of loading the
+# dataset's indexes and building figures. Changing a filter (or clicking
+# "Explore interactively") switches the session to the live page. A snapshot
+# built from another version of the dataset is ignored.
+#
+# Build it (e.g. at deploy, after the data changes) with:
+#     python snapshot.py [--data Housing.csv] [--out snapshot] [--inline-plotlyjs]
+
+import argparse
+import base64
+import datetime
+import functools
+import html
+import json
+import os
+import re
+import time
+
+import numpy as np
+import plotly
+import plotly.offline
+import streamlit as st
+
+from analytics import get_analytics
+from filters import make_filter_state
+from housing_data import DATA_PATH, file_fingerprint, write_atomic
+
+SNAPSHOT_DIR = os.environ.get('DASHBOARD_SNAPSHOT', 'snapshot')
+MANIFEST = 'manifest.json'
+PAGE = 'index.html'
+PAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Pages', 'Dashboard.py')
+SECTIONS = ('Size & Rooms', 'Price & Time', 'Floors & Quality', 'Location & Views', 'Summary')
+
+# Session flag set once the visitor interacts; the page is live from then on
+
+LIVE_KEY = 'dashboard_live'
+
+SNAPSHOT_VERSION = 1
+
+# Typed arrays are narrowed to the first of these that is exact
+
+SHRINKABLE_DTYPES = ('f8', 'f4', 'i4', 'u4', 'i2', 'u2')
+SMALLER_DTYPES = ('i1', 'i2', 'i4', 'f4')
+
+
+# Stand-in for the filter index while the snapshot is shown: the sidebar
+# widgets only need the default bounds and options, which the manifest keeps
+
+class SnapshotFilters:
+
+    def __init__(self, filters):
+        self._filters = filters
+
+    def bounds(self, col):
+        return tuple(self._filters[col])
+
+    def categories(self, col):
+        return list(self._filters[col])
+
+    def full_state(self):
+        return make_filter_state(self.bounds('price'), self.bounds('sqft_living'),
+                                 self.categories('floors'), self.categories('waterfront'))
+
+
+class Snapshot:
+
+    def __init__(self, manifest, page):
+        self.manifest = manifest
+        self.page = page
+        self.filters = SnapshotFilters(manifest['filters'])
+
+
+# Elements of the page kept in the snapshot. Widgets (the time series
+# controls) and expanders are left out; they need the live page.
+
+def _page_elements(node):
+    for child in getattr(node, 'children', {}).values():
+        if child.type == 'expander':
+            continue
+        if child.type in ('markdown', 'caption', 'plotly_chart', 'info', 'warning'):
+            yield child
+        else:
+            yield from _page_elements(child)
+
+
+def _open_tab(app):
+    for tab in app.tabs:
+        if tab.children:
+            return tab
+    return None
+
+
+# Each section's elements as drawn by the page on path, with no filters and
+# no chart selections: a list of (type, value) per section, where value is
+# the text or the figure's JSON
+
+def render_sections(path=DATA_PATH, sections=SECTIONS, timeout=600):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(PAGE_PATH, default_timeout=timeout)
+    app.session_state['dataset_path'] = path
+    app.session_state[LIVE_KEY] = True
+    # Exact numbers only, never estimates still being refined (see approximate.py)
+    app.session_state['approximate'] = False
+    rendered = {}
+    for section in sections:
+        app.session_state['dashboard_section'] = section
+        app.run()
+        if app.exception:
+            raise RuntimeError(f'{section} raised: {app.exception[0].value}')
+        tab = _open_tab(app)
+        if tab is None:
+            raise RuntimeError(f'{section} drew nothing')
+        rendered[section] = [(element.type, element.proto.spec if element.type == 'plotly_chart' else element.value)
+                             for element in _page_elements(tab)]
+    return rendered
+
+
+# Typed arrays ({'dtype', 'bdata'} in plotly's JSON) stored in the smallest
+# dtype that holds every value exactly, e.g. whole-dollar float64 prices as int32
+
+def _shrink_array(array):
+    values = np.frombuffer(base64.b64decode(array['bdata']), dtype=array['dtype'])
+    for dtype in SMALLER_DTYPES:
+        if np.dtype(dtype).itemsize >= values.dtype.itemsize:
+            break
+        with np.errstate(invalid='ignore', over='ignore'):
+            narrowed = values.astype(dtype)
+        if np.array_equal(narrowed, values):
+            return dict(array, dtype=dtype, bdata=base64.b64encode(narrowed.tobytes()).decode())
+    return array
+
+
+def _shrink(value):
+    if isinstance(value, dict):
+        if 'bdata' in value and value.get('dtype') in SHRINKABLE_DTYPES:
+            return _shrink_array(value)
+        return {key: _shrink(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_shrink(item) for item in value]
+    return value
+
+
+# Figure JSON with its arrays shrunk and without its layout template, which
+# is returned separately so identical templates are stored once
+
+def minify_figure(spec):
+    figure = _shrink(json.loads(spec))
+    layout = figure.setdefault('layout', {})
+    template = layout.pop('template', None)
+    return figure, template
+
+
+def _compact(value):
+    return json.dumps(value, separators=(',', ':')).replace('</', '<\\/')
+
+
+def _markdown_html(text):
+    text = text.strip()
+    if text.startswith('<'):
+        return text
+    text = html.escape(text)
+    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
+    return '<p>' + text.replace('\n\n', '</p><p>') + '</p>'
+
+
+# The snapshot page
+
+def render_html(rendered, title, built, plotlyjs):
+    templates = []
+    figures = []
+    tabs = []
+    panels = []
+    for number, (section, elements) in enumerate(rendered.items()):
+        parts = []
+        for kind, value in elements:
+            if kind == 'plotly_chart':
+                figure, template = minify_figure(value)
+                if template not in templates:
+                    templates.append(template)
+                figures.append({'section': number, 'template': templates.index(template),
+                                'data': figure.get('data', []), 'layout': figure['layout']})
+                parts.append(f'<div class="figure" id="figure-{len(figures) - 1}"></div>')
+            elif kind == 'markdown':
+                parts.append(_markdown_html(value))
+            else:
+                parts.append(f'<p class="{kind}">{html.escape(value)}</p>')
+        tabs.append(f'<button data-section="{number}">{html.escape(section)}</button>')
+        panels.append(f'<section id="section-{number}" hidden>{"".join(parts)}</section>')
+
+    return f'''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+{plotlyjs}
+<style>
+body {{ font-family: "Source Sans Pro", sans-serif; margin: 0 8px; color: #31333F; }}
+nav {{ display: flex; gap: 4px; border-bottom: 1px solid #ddd; margin-bottom: 12px; flex-wrap: wrap; }}
+nav button {{ border: 0; background: none; padding: 10px 14px; font-size: 15px; cursor: pointer; }}
+nav button.open {{ border-bottom: 3px solid #ff4b4b; color: #ff4b4b; }}
+.caption {{ color: #808495; font-size: 14px; }}
+.info, .warning {{ padding: 12px; border-radius: 6px; background: #e8f2fc; }}
+.warning {{ background: #fffce7; }}
+footer {{ color: #808495; font-size: 13px; margin: 24px 0; }}
+.custom-heading {{ color: #FFFFFF; font-weight: bolder; background-color: #2C3E50; border: 2px solid #1ABC9C;
+    text-align: center; padding: 10px; border-radius: 10px; font-size: 26px; width: 100%; box-sizing: border-box; }}
+</style>
+</head>
+<body>
+<nav>{"".join(tabs)}</nav>
+{"".join(panels)}
+<footer>Pre-rendered {html.escape(built)} from every property, with no filters applied.</footer>
+<script>
+const TEMPLATES = {_compact(templates)};
+const FIGURES = {_compact(figures)};
+const drawn = new Set();
+function openSection(number) {{
+  document.querySelectorAll('nav button').forEach(b => b.classList.toggle('open', b.dataset.section == number));
+  document.querySelectorAll('section').forEach(s => s.hidden = s.id != 'section-' + number);
+  FIGURES.forEach((figure, i) => {{
+    if (figure.section != number || drawn.has(i)) return;
+    drawn.add(i);
+    const layout = Object.assign({{template: TEMPLATES[figure.template]}}, figure.layout);
+    Plotly.newPlot('figure-' + i, figure.data, layout, {{responsive: true, displaylogo: false}});
+  }});
+}}
+document.querySelectorAll('nav button').forEach(b => b.onclick = () => openSection(b.dataset.section));
+openSection(0);
+</script>
+</body>
+</html>
+'''
+
+
+def _plotlyjs(inline):
+    if inline:
+        return f'<script>{plotly.offline.get_plotlyjs()}</script>'
+    return f'<script src="https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js"></script>'
+
+
+def build_snapshot(path=DATA_PATH, out_dir=SNAPSHOT_DIR, inline_plotlyjs=False, timeout=600):
+    fingerprint = file_fingerprint(path)
+    rendered = render_sections(path, timeout=timeout)
+    built = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
+    page = render_html(rendered, 'Analyzing Housing Price Dataset', built, _plotlyjs(inline_plotlyjs))
+
+    filters = get_analytics(path).filters
+    os.makedirs(out_dir, exist_ok=True)
+    write_atomic(os.path.join(out_dir, PAGE), page)
+    # Written last: the app ignores a snapshot without a current manifest
+    write_atomic(os.path.join(out_dir, MANIFEST), json.dumps({
+        'version': SNAPSHOT_VERSION, 'source': path, 'fingerprint': fingerprint, 'built': built,
+        'sections': list(rendered),
+        'filters': {'price': [int(bound) for bound in filters.bounds('price')],
+                    'sqft_living': [int(bound) for bound in filters.bounds('sqft_living')],
+                    'floors': filters.categories('floors'), 'waterfront': filters.categories('waterfront')},
+    }, indent=1))
+    return os.path.join(out_dir, PAGE), len(page.encode())
+
+
+# Snapshot files are read once per version of the manifest
+
+@functools.lru_cache(maxsize=4)
+def _read_snapshot(out_dir, mtime_ns):
+    with open(os.path.join(out_dir, MANIFEST), encoding='utf-8') as handle:
+        manifest = json.load(handle)
+    with open(os.path.join(out_dir, PAGE), encoding='utf-8') as handle:
+        return Snapshot(manifest, handle.read())
+
+
+# The snapshot of the dataset with this fingerprint, or None when there is
+# none, it was built from other data, or this session already went live
+
+def current_snapshot(fingerprint, out_dir=SNAPSHOT_DIR):
+    if st.session_state.get(LIVE_KEY):
+        return None
+    try:
+        snapshot = _read_snapshot(out_dir, os.stat(os.path.join(out_dir, MANIFEST)).st_mtime_ns)
+    except (OSError, ValueError, KeyError):
+        return None
+    manifest = snapshot.manifest
+    if manifest.get('version') != SNAPSHOT_VERSION or manifest.get('fingerprint') != fingerprint:
+        return None
+    return snapshot
+
+
+def go_live():
+    st.session_state[LIVE_KEY] = True
+
+
+def snapshot_view(snapshot):
+    caption_col, button_col = st.columns([4, 1])
+    caption_col.caption(f"Every property, no filters (pre-rendered {snapshot.manifest['built']}). "
+                        'Change a sidebar filter or explore interactively for the data table, comparable '
+                        'sales, region comparisons and clickable charts.')
+    button_col.button('Explore interactively', key='snapshot_live', on_click=go_live)
+    # Sized to its content, and resized as its tabs are switched
+    st.iframe(snapshot.page, height='content')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-render the Dashboard's default view to static HTML.")
+    parser.add_argument('--data', default=DATA_PATH, help='dataset the snapshot is built from')
+    parser.add_argument('--out', default=SNAPSHOT_DIR)
+    parser.add_argument('--inline-plotlyjs', action='store_true',
+                        help='embed plotly.js (about 4.5 MB) instead of loading it from the CDN')
+    parser.add_argument('--timeout', type=int, default=600, help='seconds allowed per section')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    page_path, n_bytes = build_snapshot(args.data, args.out, args.inline_plotlyjs, args.timeout)
+    print(f'Wrote {page_path} ({n_bytes / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s')
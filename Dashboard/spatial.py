@@ -0,0 +1,253 @@
+# Spatial index over the lat/long of every sale, for the Map page.
+# Coordinates are snapped to a 2^BASE_LEVEL x 2^BASE_LEVEL grid over the
+# dataset's extent and the rows are sorted by the Morton (Z-order) code of
+# their cell. Every square tile of the grid, at any zoom level, is then one
+# contiguous run of rows, so:
+# - a bounding box is covered by at most ~COVER_TILES^2 tiles, i.e. that many
+#   binary searches, and only the rows of those tiles are looked at;
+# - per-tile price statistics for a zoom level are a single reduceat pass
+#   over the sorted rows, computed once per level and kept on the index.
+# A viewport with at most RAW_POINT_LIMIT sales is returned as raw rows;
+# anything larger is returned as tiles sized to about TILES_ACROSS per side.
+
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from housing_data import DATA_PATH, file_fingerprint, load_housing
+from resources import dataset_resource
+
+BASE_LEVEL = 16
+COVER_TILES = 32
+TILES_ACROSS = 64
+
+# Finest level with tile statistics (~4096 tiles across the whole extent);
+# deeper views are usually small enough for raw points anyway
+
+MAX_TILE_LEVEL = 12
+RAW_POINT_LIMIT = 3000
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+# Spread the low 16 bits of v so a zero bit sits between each of them
+
+def _part1by1(v):
+    v = v.astype(np.uint64) & 0xFFFF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def _compact1by1(v):
+    v = v & 0x55555555
+    v = (v | (v >> 1)) & 0x33333333
+    v = (v | (v >> 2)) & 0x0F0F0F0F
+    v = (v | (v >> 4)) & 0x00FF00FF
+    v = (v | (v >> 8)) & 0x0000FFFF
+    return v
+
+
+def morton_code(x, y):
+    return _part1by1(x) | (_part1by1(y) << np.uint64(1))
+
+
+# Concatenation of the ranges low[i]:high[i], without a Python loop
+
+def _concat_ranges(low, high):
+    lengths = np.maximum(high - low, 0)
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.intp)
+    offsets = np.repeat(low - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return np.arange(total) + offsets
+
+
+def haversine_km(lat, long, center_lat, center_long):
+    lat, long = np.radians(lat), np.radians(long)
+    center_lat, center_long = math.radians(center_lat), math.radians(center_long)
+    a = (np.sin((lat - center_lat) / 2) ** 2
+         + np.cos(lat) * math.cos(center_lat) * np.sin((long - center_long) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+# Bounding box (lat_low, lat_high, long_low, long_high) around a circle
+
+def radius_bbox(center_lat, center_long, radius_km):
+    dlat = radius_km / KM_PER_DEGREE
+    dlong = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(center_lat)), 1e-6))
+    return center_lat - dlat, center_lat + dlat, center_long - dlong, center_long + dlong
+
+
+# Map zoom (web mercator) that fits a bounding box in a ~600px wide chart
+
+def map_zoom(lat_low, lat_high, long_low, long_high):
+    span = max(long_high - long_low, (lat_high - lat_low) * 1.5, 1e-6)
+    return max(0.0, min(18.0, math.log2(360 / span) + 1))
+
+
+class SpatialIndex:
+
+    def __init__(self, df):
+        lat = df['lat'].to_numpy(dtype=np.float64)
+        long = df['long'].to_numpy(dtype=np.float64)
+        self.lat_range = (float(lat.min()), float(lat.max()))
+        self.long_range = (float(long.min()), float(long.max()))
+
+        codes = morton_code(self._cells(long, self.long_range), self._cells(lat, self.lat_range))
+        self._order = np.argsort(codes, kind='stable')
+        self._codes = codes[self._order]
+        self._lat = lat[self._order]
+        self._long = long[self._order]
+        self._prices = df['price'].to_numpy(dtype=np.float64)[self._order]
+
+        self._levels = {}
+        self._lock = threading.Lock()
+
+        centers = df.groupby('zipcode', observed=True)[['lat', 'long']].mean()
+        self.zipcode_centers = {str(zipcode): (float(row.lat), float(row.long))
+                                for zipcode, row in centers.iterrows()}
+
+    def __len__(self):
+        return len(self._order)
+
+    # Grid cell (0 .. 2^BASE_LEVEL - 1) of each coordinate along one axis
+
+    @staticmethod
+    def _cells(values, value_range):
+        low, high = value_range
+        scale = (1 << BASE_LEVEL) / max(high - low, 1e-12)
+        cells = np.floor((np.asarray(values, dtype=np.float64) - low) * scale)
+        return np.clip(cells, 0, (1 << BASE_LEVEL) - 1).astype(np.uint64)
+
+    def _cell_box(self, lat_low, lat_high, long_low, long_high):
+        x0, x1 = self._cells([long_low, long_high], self.long_range)
+        y0, y1 = self._cells([lat_low, lat_high], self.lat_range)
+        return int(x0), int(x1), int(y0), int(y1)
+
+    # Morton code ranges [start, end) of the tiles covering a box of cells,
+    # using tiles no finer than max_level
+
+    @staticmethod
+    def _cover(x0, x1, y0, y1, max_level=BASE_LEVEL):
+        shift = BASE_LEVEL - max_level
+        while max((x1 >> shift) - (x0 >> shift), (y1 >> shift) - (y0 >> shift)) >= COVER_TILES:
+            shift += 1
+        tx, ty = np.meshgrid(np.arange(x0 >> shift, (x1 >> shift) + 1, dtype=np.uint64),
+                             np.arange(y0 >> shift, (y1 >> shift) + 1, dtype=np.uint64))
+        tiles = np.sort(morton_code(tx.ravel(), ty.ravel()))
+        return tiles << np.uint64(2 * shift), (tiles + np.uint64(1)) << np.uint64(2 * shift)
+
+    def _candidates(self, box):
+        starts, ends = self._cover(*self._cell_box(*box))
+        return _concat_ranges(np.searchsorted(self._codes, starts, side='left'),
+                              np.searchsorted(self._codes, ends, side='left'))
+
+    # Positions (in the sorted order) of the sales inside a box
+
+    def _in_box(self, box):
+        lat_low, lat_high, long_low, long_high = box
+        candidates = self._candidates(box)
+        lat, long = self._lat[candidates], self._long[candidates]
+        inside = (lat >= lat_low) & (lat <= lat_high) & (long >= long_low) & (long <= long_high)
+        return candidates[inside]
+
+    # Row numbers (as in the DataFrame) of the sales inside a bounding box
+
+    def query_bbox(self, lat_low, lat_high, long_low, long_high):
+        return self._order[self._in_box((lat_low, lat_high, long_low, long_high))]
+
+    # Row numbers and distances of the sales within radius_km of a point
+
+    def query_radius(self, center_lat, center_long, radius_km):
+        candidates = self._in_box(radius_bbox(center_lat, center_long, radius_km))
+        distances = haversine_km(self._lat[candidates], self._long[candidates], center_lat, center_long)
+        inside = distances <= radius_km
+        return self._order[candidates[inside]], distances[inside]
+
+    # Per-tile statistics for one zoom level, computed on first use
+
+    def _level(self, level):
+        with self._lock:
+            if level in self._levels:
+                return self._levels[level]
+        tile_codes = self._codes >> np.uint64(2 * (BASE_LEVEL - level))
+        starts = np.flatnonzero(np.concatenate([[True], tile_codes[1:] != tile_codes[:-1]]))
+        counts = np.diff(np.append(starts, len(tile_codes)))
+        tiles = {
+            'code': tile_codes[starts] << np.uint64(2 * (BASE_LEVEL - level)),
+            'count': counts,
+            'lat': np.add.reduceat(self._lat, starts) / counts,
+            'long': np.add.reduceat(self._long, starts) / counts,
+            'mean': np.add.reduceat(self._prices, starts) / counts,
+            'min': np.minimum.reduceat(self._prices, starts),
+            'max': np.maximum.reduceat(self._prices, starts),
+        }
+        with self._lock:
+            self._levels[level] = tiles
+        return tiles
+
+    # Tile level at which a box is about TILES_ACROSS tiles wide
+
+    def tile_level(self, box):
+        x0, x1, y0, y1 = self._cell_box(*box)
+        span = max(x1 - x0, y1 - y0, 1)
+        return min(MAX_TILE_LEVEL, BASE_LEVEL - max(0, math.ceil(math.log2(span / TILES_ACROSS))))
+
+    # Statistics of the tiles at a level that overlap a box. Each row is
+    # placed at the mean position of its sales.
+
+    def tiles(self, box, level):
+        tiles = self._level(level)
+        x0, x1, y0, y1 = self._cell_box(*box)
+        starts, ends = self._cover(x0, x1, y0, y1, max_level=level)
+        picked = _concat_ranges(np.searchsorted(tiles['code'], starts, side='left'),
+                                np.searchsorted(tiles['code'], ends, side='left'))
+        # Drop tiles of the cover that lie outside the box
+        shift = np.uint64(BASE_LEVEL - level)
+        tile_x = _compact1by1(tiles['code'][picked]) >> shift
+        tile_y = _compact1by1(tiles['code'][picked] >> np.uint64(1)) >> shift
+        inside = ((tile_x >= x0 >> int(shift)) & (tile_x <= x1 >> int(shift))
+                  & (tile_y >= y0 >> int(shift)) & (tile_y <= y1 >> int(shift)))
+        picked = picked[inside]
+        return pd.DataFrame({name: tiles[name][picked]
+                             for name in ('lat', 'long', 'count', 'mean', 'min', 'max')})
+
+    # Everything the map needs for one viewport: raw rows when it holds at
+    # most max_points sales, per-tile statistics otherwise. The tile counts
+    # bound the number of sales first, so a wide view never touches the rows.
+    # With a radius, rows and tiles (by their mean position) are limited to
+    # the circle. Returns (kind, rows or tiles, number of sales).
+
+    def view(self, box, max_points=RAW_POINT_LIMIT, radius=None):
+        tiles = self.tiles(box, self.tile_level(box))
+        if radius is not None:
+            center_lat, center_long, radius_km = radius
+            tiles = tiles[haversine_km(tiles['lat'].to_numpy(), tiles['long'].to_numpy(),
+                                       center_lat, center_long) <= radius_km]
+        if tiles['count'].sum() > 4 * max_points:
+            return 'tiles', tiles, int(tiles['count'].sum())
+
+        positions = self._in_box(box)
+        if radius is not None:
+            distances = haversine_km(self._lat[positions], self._long[positions], center_lat, center_long)
+            positions = positions[distances <= radius_km]
+        if len(positions) <= max_points:
+            return 'points', self._order[positions], len(positions)
+        return 'tiles', tiles, len(positions)
+
+
+# Shared by every session; rebuilt when the dataset fingerprint changes
+
+@dataset_resource('spatial_index')
+def _spatial_index(path, fingerprint):
+    return SpatialIndex(load_housing(path, columns=['price', 'zipcode', 'lat', 'long']))
+
+
+def get_spatial_index(path=DATA_PATH):
+    return _spatial_index(path, file_fingerprint(path))
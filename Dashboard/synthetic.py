@@ -0,0 +1,283 @@
+# Synthetic Housing datasets of any size, for load and memory testing.
+# A SyntheticModel is learned from an existing dataset (Housing.csv):
+#   - every numeric column keeps its own distribution: values are drawn
+#     through the column's empirical quantiles, so the share of zero
+#     basements or the spread of grades match the source;
+#   - the columns are tied together by a Gaussian copula (the correlation
+#     of their normal scores), which carries price against sqft_living and
+#     grade, living area against bathrooms, and so on;
+#   - zipcodes are drawn with their share of sales, and each zipcode's
+#     price level enters the copula, so expensive zipcodes stay expensive;
+#   - lat/long come from a Gaussian fitted to each zipcode's sales;
+#   - sale dates follow the daily sales counts of the source.
+# Output has the columns, order and value formats of Housing.csv.
+#
+# Rows are generated and written in chunks, so memory stays constant
+# whatever the size. Chunk i always comes from the seed (seed, i), so the
+# output does not depend on the number of worker processes.
+#
+# Run with:
+#     python synthetic.py --rows 5000000 --out synthetic.csv [--source Housing.csv]
+#                         [--format csv|parquet] [--workers N] [--seed 0]
+
+import argparse
+import collections
+import concurrent.futures
+import os
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from housing_data import DATA_PATH, DATE_FORMAT, HOUSING_COLUMNS, atomic_path, read_housing_csv
+
+# Columns drawn through the copula. above_share is sqft_above / sqft_living;
+# sqft_above and sqft_basement are derived from it.
+
+COPULA_COLUMNS = ('price', 'bedrooms', 'bathrooms', 'sqft_living', 'sqft_lot', 'floors', 'waterfront', 'view',
+                  'condition', 'grade', 'above_share', 'yr_built', 'yr_renovated', 'sqft_living15', 'sqft_lot15')
+
+# Interpolated between observed values; the others only take observed values
+
+CONTINUOUS_COLUMNS = ('price', 'sqft_living', 'sqft_lot', 'sqft_living15', 'sqft_lot15')
+
+# Normal scores <-> probabilities, by interpolation on a fine grid
+
+_Z_GRID = np.linspace(-7, 7, 8193)
+_U_GRID = np.array([statistics.NormalDist().cdf(z) for z in _Z_GRID])
+
+CHUNK_ROWS = 250_000
+
+# Price rounding of generated sales
+
+PRICE_STEP = 100
+
+
+def normal_scores(values):
+    ranks = pd.Series(values).rank(method='average').to_numpy()
+    return np.interp((ranks - 0.5) / len(ranks), _U_GRID, _Z_GRID)
+
+
+def _zipcode_gaussians(df, zipcodes):
+    means = np.zeros((len(zipcodes), 2))
+    factors = np.zeros((len(zipcodes), 2, 2))
+    coords = df[['lat', 'long']].to_numpy(dtype=np.float64)
+    codes = pd.Categorical(df['zipcode'].astype(str), categories=zipcodes).codes
+    for i in range(len(zipcodes)):
+        points = coords[codes == i]
+        means[i] = points.mean(axis=0)
+        cov = np.cov(points.T) if len(points) > 2 else np.zeros((2, 2))
+        factors[i] = np.linalg.cholesky(cov + np.eye(2) * 1e-8)
+    return means, factors
+
+
+class SyntheticModel:
+
+    def __init__(self, quantiles, correlation, zipcodes, zipcode_weights, zipcode_scores, coord_means,
+                 coord_factors, days, day_weights):
+        self.quantiles = quantiles
+        self.zipcodes = zipcodes
+        self.zipcode_weights = zipcode_weights
+        self.zipcode_scores = zipcode_scores
+        self.coord_means = coord_means
+        self.coord_factors = coord_factors
+        self.days = days
+        self.day_weights = day_weights
+        self.day_labels = pd.to_datetime(days).strftime(DATE_FORMAT).to_numpy(dtype=object)
+
+        # Copula columns given the zipcode score (the last variable): the
+        # mean moves with the score, the covariance does not
+        inner = correlation[:-1, :-1]
+        cross = correlation[:-1, -1]
+        self.loading = cross
+        self.conditional_factor = np.linalg.cholesky(inner - np.outer(cross, cross) + np.eye(len(cross)) * 1e-9)
+
+    @classmethod
+    def fit(cls, df):
+        df = df.reset_index(drop=True)
+        source = pd.DataFrame({col: df[col] for col in COPULA_COLUMNS if col != 'above_share'})
+        source['above_share'] = df['sqft_above'] / df['sqft_living'].clip(lower=1)
+        source = source[list(COPULA_COLUMNS)]
+        quantiles = {col: np.sort(source[col].to_numpy(dtype=np.float64)) for col in COPULA_COLUMNS}
+
+        zipcode = df['zipcode'].astype(str)
+        counts = zipcode.value_counts().sort_index()
+        zipcodes = counts.index.tolist()
+        log_price = np.log(df['price'].to_numpy(dtype=np.float64))
+        levels = pd.Series(log_price).groupby(zipcode.to_numpy()).median().reindex(zipcodes)
+        score_of = dict(zip(zipcodes, normal_scores(levels.to_numpy())))
+
+        scores = np.column_stack([normal_scores(source[col].to_numpy()) for col in COPULA_COLUMNS]
+                                 + [zipcode.map(score_of).to_numpy(dtype=np.float64)])
+        correlation = np.corrcoef(scores, rowvar=False)
+        coord_means, coord_factors = _zipcode_gaussians(df, zipcodes)
+
+        days = df['date'].to_numpy(dtype='datetime64[D]')
+        unique_days, day_counts = np.unique(days, return_counts=True)
+        return cls(quantiles, correlation, zipcodes, counts.to_numpy() / counts.sum(),
+                   np.array([score_of[z] for z in zipcodes]), coord_means, coord_factors,
+                   unique_days, day_counts / day_counts.sum())
+
+    @classmethod
+    def from_path(cls, path=DATA_PATH):
+        return cls.fit(read_housing_csv(path))
+
+    def _column(self, col, u):
+        table = self.quantiles[col]
+        if col in CONTINUOUS_COLUMNS:
+            return np.interp(u * (len(table) - 1), np.arange(len(table)), table)
+        return table[np.minimum((u * len(table)).astype(np.intp), len(table) - 1)]
+
+    # n_rows sales with fresh ids from first_id; dates as DATE_FORMAT text
+    # (like Housing.csv) or as datetimes
+
+    def sample(self, n_rows, rng, first_id=1, text_dates=True):
+        zip_index = rng.choice(len(self.zipcodes), size=n_rows, p=self.zipcode_weights)
+        normals = rng.standard_normal((n_rows, len(COPULA_COLUMNS))) @ self.conditional_factor.T
+        normals += self.zipcode_scores[zip_index][:, None] * self.loading
+        u = np.interp(normals, _Z_GRID, _U_GRID)
+        values = {col: self._column(col, u[:, i]) for i, col in enumerate(COPULA_COLUMNS)}
+
+        sqft_living = values['sqft_living'].round()
+        sqft_above = np.minimum((sqft_living * values['above_share']).round(), sqft_living)
+        yr_built = values['yr_built']
+        yr_renovated = np.where(values['yr_renovated'] >= yr_built, values['yr_renovated'], 0)
+        coords = self.coord_means[zip_index] + np.einsum(
+            'nij,nj->ni', self.coord_factors[zip_index], rng.standard_normal((n_rows, 2)))
+        day_index = rng.choice(len(self.days), size=n_rows, p=self.day_weights)
+
+        frame = pd.DataFrame({
+            'id': np.arange(first_id, first_id + n_rows, dtype=np.int64),
+            'date': self.day_labels[day_index] if text_dates else self.days[day_index].astype('datetime64[ns]'),
+            'price': (values['price'] / PRICE_STEP).round().clip(1) * PRICE_STEP,
+            'bedrooms': values['bedrooms'].astype(np.int64),
+            'bathrooms': values['bathrooms'],
+            'sqft_living': sqft_living.astype(np.int64),
+            'sqft_lot': values['sqft_lot'].round().astype(np.int64),
+            'floors': values['floors'],
+            'waterfront': values['waterfront'].astype(np.int64),
+            'view': values['view'].astype(np.int64),
+            'condition': values['condition'].astype(np.int64),
+            'grade': values['grade'].astype(np.int64),
+            'sqft_above': sqft_above.astype(np.int64),
+            'sqft_basement': (sqft_living - sqft_above).astype(np.int64),
+            'yr_built': yr_built.astype(np.int64),
+            'yr_renovated': yr_renovated.astype(np.int64),
+            'zipcode': np.asarray(self.zipcodes)[zip_index].astype(np.int64),
+            'lat': coords[:, 0].round(4),
+            'long': coords[:, 1].round(3),
+            'sqft_living15': values['sqft_living15'].round().astype(np.int64),
+            'sqft_lot15': values['sqft_lot15'].round().astype(np.int64),
+        })
+        return frame[HOUSING_COLUMNS]
+
+
+def chunk_sizes(n_rows, chunk_rows=CHUNK_ROWS):
+    return [min(chunk_rows, n_rows - start) for start in range(0, n_rows, chunk_rows)]
+
+
+def _generate_chunk(model, seed, index, n_rows, first_id, text_dates):
+    return model.sample(n_rows, np.random.default_rng([seed, index]), first_id, text_dates)
+
+
+# Worker processes receive the model once, then only chunk numbers
+
+_worker = {}
+
+
+def _init_worker(model):
+    _worker['model'] = model
+
+
+def _worker_chunk(seed, index, n_rows, first_id, text_dates):
+    return _generate_chunk(_worker['model'], seed, index, n_rows, first_id, text_dates)
+
+
+# Chunks in order. With several workers at most two chunks per worker are
+# in flight, so memory stays bounded when the writer is slower.
+
+def generate_chunks(model, n_rows, seed=0, chunk_rows=CHUNK_ROWS, workers=1, text_dates=True):
+    tasks = []
+    first_id = 1
+    for index, size in enumerate(chunk_sizes(n_rows, chunk_rows)):
+        tasks.append((seed, index, size, first_id, text_dates))
+        first_id += size
+    if workers <= 1:
+        for task in tasks:
+            yield _generate_chunk(model, *task)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(model,)) as pool:
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(pool.submit(_worker_chunk, *task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def output_format(path):
+    return 'parquet' if path.lower().endswith(('.parquet', '.pq')) else 'csv'
+
+
+# Writes n_rows synthetic sales to path (CSV, or Parquet with one row group
+# per chunk) and returns the path. The file appears only once complete.
+
+def write_synthetic(path, n_rows, model=None, source_path=DATA_PATH, file_format=None, seed=0,
+                    chunk_rows=CHUNK_ROWS, workers=1, log=None):
+    model = model or SyntheticModel.from_path(source_path)
+    file_format = file_format or output_format(path)
+    if file_format not in ('csv', 'parquet'):
+        raise ValueError(f'Unknown format {file_format!r}; choose csv or parquet')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    chunks = generate_chunks(model, n_rows, seed, chunk_rows, workers, text_dates=file_format == 'csv')
+    written = 0
+    started = time.perf_counter()
+
+    def progress(chunk):
+        nonlocal written
+        written += len(chunk)
+        if log:
+            log(f'{written:,} / {n_rows:,} rows ({time.perf_counter() - started:.1f}s)')
+
+    with atomic_path(path) as tmp_path:
+        if file_format == 'csv':
+            with open(tmp_path, 'w', newline='') as handle:
+                for chunk in chunks:
+                    chunk.to_csv(handle, header=written == 0, index=False)
+                    progress(chunk)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            writer = None
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, table.schema)
+                    writer.write_table(table)
+                    progress(chunk)
+            finally:
+                if writer is not None:
+                    writer.close()
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic dataset shaped like Housing.csv.')
+    parser.add_argument('--rows', type=int, required=True)
+    parser.add_argument('--out', required=True, help='.csv or .parquet file')
+    parser.add_argument('--source', default=DATA_PATH, help='dataset the distributions are learned from')
+    parser.add_argument('--format', choices=('csv', 'parquet'), default=None, help='default: from --out')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=1, help='processes generating chunks')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    write_synthetic(args.out, args.rows, source_path=args.source, file_format=args.format, seed=args.seed,
+                    chunk_rows=args.chunk_rows, workers=args.workers, log=print)
+    print(f'Wrote {args.out} in {time.perf_counter() - started:.1f}s')
@@ -0,0 +1,72 @@
+# Paginated table for large frames.
+# Only the current page is serialized and sent to the browser, so the payload
+# stays the same size however many rows the dataset (or filter) has. Sorting
+# uses a per-column row order computed once per dataset version and reused
+# for every filter, page and session.
+
+import math
+
+import numpy as np
+import streamlit as st
+
+PAGE_SIZES = (25, 50, 100, 250)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _cached_sort_order(fingerprint, column, _df):
+    return _df[column].argsort(kind='stable').to_numpy()
+
+
+def _sort_order(df, column, fingerprint):
+    if fingerprint is None:
+        return df[column].argsort(kind='stable').to_numpy()
+    return _cached_sort_order(fingerprint, column, df)
+
+
+# Row positions to show, in display order
+
+def _row_positions(df, mask, sort_by, ascending, fingerprint):
+    if sort_by is None:
+        return np.arange(len(df)) if mask is None else np.flatnonzero(mask)
+    order = _sort_order(df, sort_by, fingerprint)
+    if not ascending:
+        order = order[::-1]
+    return order if mask is None else order[mask[order]]
+
+
+# Show df (optionally restricted to a boolean row mask) one page at a time.
+# Pass the dataset fingerprint to cache sort orders across reruns.
+
+def paged_table(df, key, mask=None, fingerprint=None, title=None):
+    if title:
+        st.subheader(title)
+
+    controls = st.columns([3, 2, 1, 1])
+    columns = controls[0].multiselect('Columns', options=list(df.columns),
+                                      default=list(df.columns), key=f'{key}_columns')
+    sort_by = controls[1].selectbox('Sort by', options=[None] + list(df.columns),
+                                    format_func=lambda col: '(dataset order)' if col is None else col,
+                                    key=f'{key}_sort_by')
+    ascending = controls[2].radio('Order', options=('Asc', 'Desc'), key=f'{key}_order',
+                                  horizontal=True) == 'Asc'
+    page_size = controls[3].selectbox('Rows', options=PAGE_SIZES, index=1, key=f'{key}_page_size')
+
+    positions = _row_positions(df, mask, sort_by, ascending, fingerprint)
+    n_rows = len(positions)
+    n_pages = max(1, math.ceil(n_rows / page_size))
+
+    # Keep the page number valid when a filter shrinks the result
+    page_key = f'{key}_page'
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+    page = st.number_input(f'Page (of {n_pages:,})', min_value=1, max_value=n_pages,
+                           step=1, key=page_key)
+
+    start = (page - 1) * page_size
+    stop = min(start + page_size, n_rows)
+    st.dataframe(df.iloc[positions[start:stop]][columns or list(df.columns)])
+
+    summary = f'Showing rows {start + 1 if n_rows else 0:,}–{stop:,} of {n_rows:,}'
+    if n_rows != len(df):
+        summary += f' (filtered from {len(df):,})'
+    st.caption(summary)
@@ -0,0 +1,188 @@
+# Price over time.
+# A TimeSeriesIndex is built once per dataset version: every sale gets an
+# integer period code for each resolution (day, Monday-based week, month)
+# and, per resolution, the rows are sorted by (period, price) on first use. For a
+# filter mask (and optionally one zipcode) the rows of every period are then
+# contiguous with their prices sorted, so counts, means and medians for all
+# periods come from the same vectorized pass as the Dashboard's price cube.
+# Series cover every period between the first and last sale, with empty
+# periods kept (count 0), so rolling windows, year-over-year shifts and the
+# seasonal decomposition line up with the calendar.
+
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from aggregations import group_stats
+from housing_data import DATA_PATH, file_fingerprint, load_housing
+from resources import dataset_resource
+
+FREQUENCIES = {'D': 'Daily', 'W': 'Weekly', 'M': 'Monthly'}
+
+PERIODS_PER_YEAR = {'D': 365, 'W': 52, 'M': 12}
+
+# Cycle length used by decompose() at each resolution
+
+SEASONAL_PERIODS = {'D': 7, 'W': 52, 'M': 12}
+
+
+def period_codes(dates, freq):
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    if freq == 'D':
+        return days
+    if freq == 'W':
+        # 1970-01-01 was a Thursday
+        return (days + 3) // 7
+    if freq == 'M':
+        return np.asarray(dates, dtype='datetime64[M]').astype(np.int64)
+    raise ValueError(f'Unknown frequency {freq!r}')
+
+
+def period_starts(codes, freq):
+    codes = np.asarray(codes, dtype=np.int64)
+    if freq == 'D':
+        return pd.to_datetime(codes.astype('datetime64[D]'))
+    if freq == 'W':
+        return pd.to_datetime((codes * 7 - 3).astype('datetime64[D]'))
+    return pd.to_datetime(codes.astype('datetime64[M]'))
+
+
+class TimeSeriesIndex:
+
+    def __init__(self, df):
+        dates = df['date'].to_numpy(dtype='datetime64[ns]')
+        self._prices = df['price'].to_numpy(dtype=np.float64)
+        self._price_order = np.argsort(self._prices, kind='stable')
+        codes, uniques = pd.factorize(df['zipcode'], sort=True)
+        self._zip_codes = codes
+        self.zipcodes = [str(zipcode) for zipcode in uniques]
+        self._periods = {}
+        self._ranges = {}
+        for freq in FREQUENCIES:
+            periods = period_codes(dates, freq)
+            self._ranges[freq] = (int(periods.min()), int(periods.max())) if len(periods) else (0, 0)
+            self._periods[freq] = periods - self._ranges[freq][0]
+        self._sorted = {}
+        self._lock = threading.Lock()
+
+    # Rows sorted by (period, price), or by (zipcode, period, price), with
+    # their prices and group codes in that order. A stable sort of the group
+    # codes of the price-ordered rows keeps prices sorted within each group.
+
+    def _sorted_rows(self, freq, by_zipcode=False):
+        key = (freq, by_zipcode)
+        with self._lock:
+            if key in self._sorted:
+                return self._sorted[key]
+        cells = self._periods[freq][self._price_order]
+        if by_zipcode:
+            n_periods = self._ranges[freq][1] - self._ranges[freq][0] + 1
+            cells = self._zip_codes[self._price_order].astype(np.int64) * n_periods + cells
+        # Stable sorts of 16-bit keys are radix sorts
+        sort_keys = cells.astype(np.int16) if cells.max(initial=0) < np.iinfo(np.int16).max else cells
+        within = np.argsort(sort_keys, kind='stable')
+        rows = self._price_order[within]
+        result = (rows, self._prices[rows], cells[within].astype(np.intp))
+        with self._lock:
+            self._sorted[key] = result
+        return result
+
+    def _select(self, freq, mask, zipcode=None, by_zipcode=False):
+        rows, prices, cells = self._sorted_rows(freq, by_zipcode)
+        keep = None if mask is None else mask[rows]
+        if zipcode is not None:
+            same = self._zip_codes[rows] == self.zipcodes.index(str(zipcode))
+            keep = same if keep is None else keep & same
+        if keep is None:
+            return prices, cells
+        return prices[keep], cells[keep]
+
+    # Price statistics per period (count, mean, median, quartiles, ...),
+    # one row for every period between the first and last sale
+
+    def series(self, freq, mask=None, zipcode=None):
+        first, last = self._ranges[freq]
+        prices, cells = self._select(freq, mask, zipcode)
+        uniques = pd.RangeIndex(last - first + 1)
+        stats = group_stats(prices, cells, uniques).reindex(uniques)
+        stats['count'] = stats['count'].fillna(0).astype(np.int64)
+        stats.index = pd.Index(period_starts(uniques + first, freq), name='date')
+        return stats.drop(columns=['lowerfence', 'upperfence']).reset_index()
+
+    # Long frame (zipcode, date, count, mean, median, ...) of every zipcode's
+    # non-empty periods, from one pass over the rows
+
+    def zipcode_series(self, freq, mask=None):
+        first, last = self._ranges[freq]
+        n_periods = last - first + 1
+        prices, cells = self._select(freq, mask, by_zipcode=True)
+        stats = group_stats(prices, cells, pd.RangeIndex(len(self.zipcodes) * n_periods))
+        cells = stats.index.to_numpy()
+        stats = stats.drop(columns=['lowerfence', 'upperfence']).reset_index(drop=True)
+        stats.insert(0, 'date', period_starts(cells % n_periods + first, freq))
+        stats.insert(0, 'zipcode', np.asarray(self.zipcodes, dtype=object)[cells // n_periods])
+        return stats
+
+
+# Trailing rolling median of one column, ignoring empty periods
+
+def add_rolling(series, window, column='median'):
+    series[f'rolling_{column}'] = series[column].rolling(window, min_periods=1).median()
+    return series
+
+
+# Change against the same period one year earlier
+
+def add_yoy(series, freq, column='median'):
+    series[f'yoy_{column}'] = series[column] / series[column].shift(PERIODS_PER_YEAR[freq]) - 1
+    return series
+
+
+# Classical additive decomposition into trend (centred moving average over
+# one cycle), seasonal (mean detrended value at each position of the cycle)
+# and residual. Empty periods are interpolated first. Needs two full cycles;
+# returns None otherwise.
+
+def decompose(series, period, column='median'):
+    values = series[column].interpolate(limit_direction='both').to_numpy(dtype=np.float64)
+    n = len(values)
+    if n < 2 * period or np.isnan(values).all():
+        return None
+    if period % 2:
+        weights = np.full(period, 1.0 / period)
+    else:
+        weights = np.r_[0.5, np.ones(period - 1), 0.5] / period
+    half = len(weights) // 2
+    trend = np.full(n, np.nan)
+    trend[half:n - half] = np.convolve(values, weights, mode='valid')
+
+    detrended = values - trend
+    position = np.arange(n) % period
+    present = ~np.isnan(detrended)
+    sums = np.bincount(position[present], weights=detrended[present], minlength=period)
+    counts = np.bincount(position[present], minlength=period)
+    cycle = sums / np.maximum(counts, 1)
+    seasonal = (cycle - cycle.mean())[position]
+
+    return pd.DataFrame({'date': series['date'], 'observed': values, 'trend': trend,
+                         'seasonal': seasonal, 'resid': values - trend - seasonal})
+
+
+# Shared by every session; rebuilt when the dataset fingerprint changes
+
+@dataset_resource('time_series_index')
+def _time_series_index(path, fingerprint):
+    return TimeSeriesIndex(load_housing(path, columns=['date', 'price', 'zipcode']))
+
+
+def get_time_series_index(path=DATA_PATH):
+    return _time_series_index(path, file_fingerprint(path))
+
+
+# The mask is not hashed; (fingerprint, filter_state) identifies it
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_series(fingerprint, filter_state, freq, zipcode, _index, _mask):
+    return _index.series(freq, _mask, zipcode)
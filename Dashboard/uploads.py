@@ -0,0 +1,144 @@
+# User-uploaded datasets.
+# An uploaded CSV or Parquet file is parsed in chunks of CHUNK_ROWS rows,
+# each chunk is validated against the Housing schema and appended to an
+# uncompressed Feather file under uploads/, named after the upload's content
+# hash, and the pages then memory-map the result through load_housing().
+# Re-uploading the same content (in any session) reuses the parsed file.
+#
+# Streamlit holds the whole upload in memory, up to server.maxUploadSize
+# (1 GB, set in .streamlit/config.toml); parsing adds about one chunk on top
+# of that, however large the upload is. Parsing runs in the session's own
+# script thread, behind a progress bar.
+
+import hashlib
+import os
+
+import pandas as pd
+import streamlit as st
+
+from housing_data import DATA_PATH, SchemaError, atomic_path, check_columns, validate_housing_frame
+
+UPLOAD_DIR = 'uploads'
+CHUNK_ROWS = 100_000
+
+# Rejected rows kept for display; the rest are only counted
+
+REJECTED_SAMPLE = 100
+
+# Session state key holding the path of the dataset the pages should use
+
+DATASET_KEY = 'dataset_path'
+
+
+def content_hash(uploaded_file):
+    digest = hashlib.sha1()
+    buffer = uploaded_file.getbuffer()
+    for start in range(0, len(buffer), 1 << 24):
+        digest.update(buffer[start:start + (1 << 24)])
+    return digest.hexdigest()
+
+
+def _raw_chunks(uploaded_file):
+    uploaded_file.seek(0)
+    if uploaded_file.name.lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(uploaded_file)
+        check_columns(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=CHUNK_ROWS):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(uploaded_file, dtype=str, chunksize=CHUNK_ROWS):
+            yield chunk
+
+
+# Parse, validate and write the upload; returns a summary dict
+
+def parse_upload(uploaded_file, target_path, progress=None):
+    import pyarrow as pa
+
+    total_bytes = max(uploaded_file.size, 1)
+    accepted = rejected = 0
+    rejected_sample = []
+    writer = None
+    with atomic_path(target_path) as tmp_path:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            for raw in _raw_chunks(uploaded_file):
+                valid, bad = validate_housing_frame(raw)
+                valid['zipcode'] = valid['zipcode'].astype(str)
+                table = pa.Table.from_pandas(valid, preserve_index=False)
+                if writer is None:
+                    writer = pa.ipc.new_file(sink, table.schema)
+                writer.write_table(table)
+                accepted += len(valid)
+                rejected += len(bad)
+                if len(rejected_sample) < REJECTED_SAMPLE and len(bad):
+                    rejected_sample.extend(bad.head(REJECTED_SAMPLE - len(rejected_sample)).to_dict('records'))
+                if progress is not None:
+                    progress(min(uploaded_file.tell() / total_bytes, 1.0), accepted)
+            if writer is not None:
+                writer.close()
+        if not accepted:
+            raise SchemaError('No valid rows in the uploaded file')
+    return dict(name=uploaded_file.name, path=target_path, rows=accepted, rejected=rejected,
+                rejected_sample=pd.DataFrame(rejected_sample))
+
+
+# Parse an upload once: per session by content hash, and across sessions
+# through the file on disk
+
+def load_upload(uploaded_file, progress=None):
+    parsed = st.session_state.setdefault('parsed_uploads', {})
+    digest = content_hash(uploaded_file)
+    if digest in parsed:
+        return parsed[digest]
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    target_path = os.path.join(UPLOAD_DIR, digest + '.feather')
+    if os.path.exists(target_path):
+        import pyarrow as pa
+
+        with pa.memory_map(target_path) as source:
+            rows = pa.ipc.open_file(source).read_all().num_rows
+        result = dict(name=uploaded_file.name, path=target_path, rows=rows, rejected=None,
+                      rejected_sample=pd.DataFrame())
+    else:
+        result = parse_upload(uploaded_file, target_path, progress)
+    parsed[digest] = result
+    return result
+
+
+def active_dataset_path():
+    return st.session_state.get(DATASET_KEY, DATA_PATH)
+
+
+def use_dataset(path):
+    st.session_state[DATASET_KEY] = path
+
+
+def uploader_section():
+    uploaded_file = st.file_uploader('Upload a CSV or Parquet file with the same columns as Housing.csv',
+                                     type=['csv', 'parquet'],
+                                     help=f"Up to {st.get_option('server.maxUploadSize'):,} MB. The upload is "
+                                          'held in memory while it is parsed.')
+    if uploaded_file is not None:
+        bar = st.progress(0.0, text='Parsing upload...')
+        try:
+            result = load_upload(uploaded_file, lambda done, rows: bar.progress(done, text=f'Parsed {rows:,} rows'))
+        except (SchemaError, ValueError) as exc:
+            bar.empty()
+            st.error(f'Could not use {uploaded_file.name}: {exc}')
+            return
+        bar.empty()
+        use_dataset(result['path'])
+        message = f"Using **{result['name']}**: {result['rows']:,} valid rows"
+        if result['rejected']:
+            message += f", {result['rejected']:,} rows rejected"
+        st.success(message + '. Open the Dashboard page to explore it.')
+        if len(result['rejected_sample']):
+            with st.expander('Rejected rows (sample)'):
+                st.dataframe(result['rejected_sample'])
+
+    if active_dataset_path() != DATA_PATH and st.button('Back to the bundled Housing.csv'):
+        use_dataset(DATA_PATH)
+        st.rerun()